@@ -12,8 +12,8 @@ import atexit
 import config
 import signal
 import sys
-from webapp import create_app, requestManager, db
-from webapp.models import Monitor
+from webapp import create_app, requestManager, resultWriter, db
+from webapp.models import Monitor, CheckResult, CheckRollup, RunnerLease
 
 
 config_class = config.configuration()
@@ -55,8 +55,11 @@ def signal_handler(signal, frame):
 
 
 def teardown():
+    if config_class.CHECK_RUNNER:
+        return  # the runner process owns the checks
     requestManager.clear()
     requestManager.stop(join=True)
+    resultWriter.stop()
 
 
 configure_logging(config_class)
@@ -71,5 +74,8 @@ app.logger.info("EPMonitor has started")
 def make_shell_context():
     return {
         'db': db,
-        'Monitor': Monitor
+        'Monitor': Monitor,
+        'CheckResult': CheckResult,
+        'CheckRollup': CheckRollup,
+        'RunnerLease': RunnerLease
     }
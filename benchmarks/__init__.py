@@ -0,0 +1,5 @@
+"""Benchmarks.
+
+Stand-alone throughput benchmarks; run each module with ``python -m``.
+
+"""
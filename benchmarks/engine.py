@@ -0,0 +1,253 @@
+"""Check engine load benchmark.
+
+Loads N synthetic monitors pointing at a local fake target (see
+`benchmarks.server`) into a `RequestsManager`, runs it for a while and
+reports:
+
+    checks/s        results recorded per second (and the rate the schedule
+                    asked for)
+    missed          share of scheduled checks that never ran
+    errors          share of checks that failed or got a 4xx/5xx response
+    burst           most checks started in any 100 ms over the mean (1 is
+                    perfectly flat)
+    drift           mean difference between the gap separating consecutive
+                    checks of a monitor and its frequency (ms)
+    lag p50/p99     how late checks started after their due time (ms)
+    rss, cpu        resident memory and CPU (% of one core) of the process
+
+Every measure is taken from the results themselves, so the engines and
+schedulers are compared on equal terms.  Save a run with ``--save`` and
+compare later runs against it with ``--baseline``.  ``baseline.json`` in
+this package was recorded with the first command below; the saved run
+includes the CPU count and Python version it ran on, so re-record it
+before comparing on other hardware::
+
+    python -m benchmarks.engine --monitors 2000 --frequency 10 \\
+        --engine threads --threads 50 --save benchmarks/baseline.json
+    python -m benchmarks.engine --monitors 2000 --frequency 10 \\
+        --engine asyncio --baseline benchmarks/baseline.json
+
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import numpy as np
+import psutil
+from benchmarks.server import FakeTarget
+from checks.endpoint import Endpoint
+from checks.manager import RequestsManager
+
+# Reported measures: key, label, format, True if higher is better
+MEASURES = (
+    ('checks_per_second', 'checks/s', '{:.1f}', True),
+    ('expected_per_second', 'expected/s', '{:.1f}', True),
+    ('missed', 'missed', '{:.2%}', False),
+    ('errors', 'errors', '{:.2%}', False),
+    ('burst', 'burst', '{:.1f}', False),
+    ('drift_ms', 'drift ms', '{:.1f}', False),
+    ('lag_p50_ms', 'lag p50 ms', '{:.1f}', False),
+    ('lag_p99_ms', 'lag p99 ms', '{:.1f}', False),
+    ('elapsed_p50_ms', 'check p50 ms', '{:.1f}', False),
+    ('rss_mib', 'rss MiB', '{:.1f}', False),
+    ('cpu_percent', 'cpu %', '{:.1f}', False),
+)
+
+
+class Recorder(object):
+    """Result writer that keeps when every check started.
+
+    Passed to the manager as its `writer`, so it sees every result.
+
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = []   # (slug, timestamp, elapsed, error)
+
+    def put(self, slug, result):
+        error = not result.status or result.status_code >= 400
+        with self.lock:
+            self.results.append((slug, result.timestamp, result.elapsed,
+                                 error))
+
+    def stop(self):
+        pass
+
+
+def endpoints(count, frequency, port):
+    """Return `count` synthetic endpoints checking the fake target."""
+    eps = []
+    for i in range(count):
+        ep = Endpoint(f"bench-{i}")
+        ep.name = ep.slug
+        ep.frequency = frequency
+        ep.scheme = 'http'
+        ep.server = '127.0.0.1'
+        ep.port = port
+        ep.path = f"/{ep.slug}"
+        eps.append(ep)
+    return eps
+
+
+def analyze(results, origins, frequency, started, duration, warmup):
+    """Return the measures of `results` over the measured window.
+
+    A monitor is due every `frequency` seconds from its origin in `origins`
+    (slug to the wall clock time it was first due), and its checks are
+    attributed to the last due time before they started; lag is how long
+    after it they started.  Only runs due from `warmup` seconds after
+    `started` until one frequency before the end are measured.
+
+    """
+    window_from = started + warmup
+    window_to = started + duration - frequency
+    span = window_to - window_from
+    by_slug = {}
+    for slug, timestamp, elapsed, error in results:
+        by_slug.setdefault(slug, []).append((timestamp, elapsed, error))
+
+    expected = 0
+    starts, lags, gaps, elapsed, errors = [], [], [], [], 0
+    for slug, origin in origins.items():
+        first = np.ceil((window_from - origin) / frequency)
+        last = np.ceil((window_to - origin) / frequency) - 1
+        expected += max(int(last - first) + 1, 0)
+        if slug not in by_slug:
+            continue
+        rows = np.array(sorted(by_slug[slug]))
+        offsets = rows[:, 0] - origin
+        due = np.floor((offsets + 0.001) / frequency)
+        measured = (due >= first) & (due <= last)
+        rows, offsets = rows[measured], offsets[measured]
+        starts.extend(rows[:, 0].tolist())
+        lags.extend((offsets - due[measured] * frequency).tolist())
+        gaps.extend(np.abs(np.diff(rows[:, 0]) - frequency).tolist())
+        elapsed.extend(rows[:, 1].tolist())
+        errors += int(rows[:, 2].sum())
+
+    checks = len(lags)
+    burst = 0.0
+    if checks and span > 0:
+        bins = np.histogram(starts, bins=max(int(span * 10), 1),
+                            range=(window_from, window_to + frequency))[0]
+        burst = float(bins.max() / bins.mean()) if bins.mean() else 0.0
+    lags = np.array(lags or [0]) * 1000
+    return {
+        'checks_per_second': checks / span if span > 0 else 0.0,
+        'expected_per_second': expected / span if span > 0 else 0.0,
+        'missed': max(0.0, 1 - checks / expected) if expected else 0.0,
+        'errors': errors / checks if checks else 0.0,
+        'burst': burst,
+        'drift_ms': float(np.mean(gaps)) * 1000 if gaps else 0.0,
+        'lag_p50_ms': float(np.percentile(lags, 50)),
+        'lag_p99_ms': float(np.percentile(lags, 99)),
+        'elapsed_p50_ms': float(np.percentile(elapsed or [0], 50)),
+    }
+
+
+def run(args):
+    """Run the benchmark described by `args` and return its measures."""
+    process = psutil.Process(os.getpid())
+    target = FakeTarget(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate,
+                        body_bytes=args.body_bytes)
+    with target:
+        recorder = Recorder()
+        manager = RequestsManager(
+            thread_count=args.threads, engine=args.engine,
+            concurrency=args.concurrency, pool_size=args.pool_size,
+            writer=recorder, validation_workers=0, spread=args.spread,
+            host_concurrency=args.host_concurrency)
+        cpu = process.cpu_times()
+        started = time.time()
+        origins = {}
+        for endpoint in endpoints(args.monitors, args.frequency,
+                                  target.port):
+            due = manager.scheduler.first_due(endpoint)
+            origins[endpoint.slug] = time.time() + due - time.monotonic()
+            manager.add(endpoint)
+        manager.start()
+        time.sleep(args.duration)
+        stopped = time.time()
+        cpu_after = process.cpu_times()
+        rss = process.memory_info().rss
+        manager.stop(join=True)
+
+    measures = analyze(recorder.results, origins, args.frequency,
+                       started, args.duration, args.warmup)
+    busy = (cpu_after.user - cpu.user) + (cpu_after.system - cpu.system)
+    measures['rss_mib'] = rss / 1048576
+    measures['cpu_percent'] = busy / (stopped - started) * 100
+    return measures
+
+
+def report(config, measures, baseline=None):
+    """Print `measures`, compared with `baseline` when given."""
+    print(' '.join(f"{k}={v}" for k, v in config.items()))
+    for key, label, fmt, higher in MEASURES:
+        line = f"{label:>14} {fmt.format(measures[key]):>12}"
+        if baseline and key in baseline['measures']:
+            before = baseline['measures'][key]
+            line += f" {fmt.format(before):>12}"
+            if before:
+                change = (measures[key] - before) / abs(before)
+                line += f" {change:>+8.1%}"
+                if change:
+                    line += ' better' if (change > 0) == higher else ' worse'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--monitors', type=int, default=500)
+    parser.add_argument('--frequency', type=int, default=10,
+                        help="seconds between checks of a monitor")
+    parser.add_argument('--duration', type=float, default=60,
+                        help="seconds to run")
+    parser.add_argument('--warmup', type=float, default=None,
+                        help="seconds left out of the measures "
+                             "(default: one frequency)")
+    parser.add_argument('--engine', default='threads',
+                        choices=RequestsManager.ENGINES)
+    parser.add_argument('--threads', type=int, default=10,
+                        help="REQUEST_THREADS of the threads engine")
+    parser.add_argument('--concurrency', type=int, default=100,
+                        help="REQUEST_CONCURRENCY of the asyncio engine")
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--no-spread', dest='spread', action='store_false',
+                        help="run every monitor's first check at once")
+    parser.add_argument('--host-concurrency', type=int, default=0,
+                        help="SCHEDULE_HOST_CONCURRENCY; 0 is no limit")
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--body-bytes', type=int, default=1024)
+    parser.add_argument('--save', help="write the run to this JSON file")
+    parser.add_argument('--baseline', help="compare with this saved run")
+    args = parser.parse_args()
+    if args.warmup is None:
+        args.warmup = min(args.frequency, args.duration / 2)
+    logging.basicConfig(level=logging.WARNING)
+
+    config = {k: v for k, v in vars(args).items()
+              if k not in ('save', 'baseline')}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    measures = run(args)
+    report(config, measures, baseline)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'config': config, 'measures': measures,
+                       'host': {'cpus': os.cpu_count(),
+                                'python': platform.python_version()}},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Fake check target.
+
+A local HTTP stand-in for monitored endpoints, with configurable latency,
+error rate and body size.  It runs in its own process so its CPU time is
+not charged to the check engine being measured::
+
+    python -m benchmarks.server --latency-ms 50 --error-rate 0.01
+
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+from aiohttp import web
+
+
+def make_app(latency_ms=20, jitter_ms=0, error_rate=0, body_bytes=1024):
+    """Return the aiohttp application of the fake target.
+
+    Every request waits `latency_ms` (plus up to `jitter_ms`) and answers
+    with `body_bytes` bytes; a share `error_rate` of them get a 500.
+
+    """
+    body = b'x' * body_bytes
+    counts = {'requests': 0, 'errors': 0}
+
+    async def handle(request):
+        counts['requests'] += 1
+        delay = latency_ms + random.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and random.random() < error_rate:
+            counts['errors'] += 1
+            return web.Response(status=500, body=b'error')
+        return web.Response(body=body, content_type='text/plain')
+
+    async def stats(request):
+        return web.json_response(counts)
+
+    app = web.Application()
+    app.router.add_get('/_stats', stats)
+    app.router.add_route('*', '/{tail:.*}', handle)
+    return app
+
+
+def serve(port, ready=None, **kwargs):
+    """Serve the fake target on 127.0.0.1:`port` until killed.
+
+    The bound port is sent on the `ready` connection once listening (pass
+    0 as `port` to bind any free port).
+
+    """
+    async def start():
+        runner = web.AppRunner(make_app(**kwargs), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', port, backlog=4096)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.send(bound)
+            ready.close()
+        await asyncio.Event().wait()
+
+    asyncio.run(start())
+
+
+class FakeTarget(object):
+    """Run the fake target in a child process.
+
+    Use as a context manager; `port` is set once the target listens.
+
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.port = None
+        self.process = None
+
+    def start(self):
+        """Start the target and wait until it listens."""
+        context = multiprocessing.get_context('spawn')
+        receive, send = context.Pipe(duplex=False)
+        self.process = context.Process(target=serve, args=(0, send),
+                                       kwargs=self.kwargs, daemon=True)
+        self.process.start()
+        if not receive.poll(30):
+            self.stop()
+            raise RuntimeError("The fake target did not start")
+        self.port = receive.recv()
+        return self
+
+    def stop(self):
+        """Stop the target."""
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--body-bytes', type=int, default=1024)
+    args = parser.parse_args()
+    print(f"Fake target listening on 127.0.0.1:{args.port}")
+    serve(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+          error_rate=args.error_rate, body_bytes=args.body_bytes)
+
+
+if __name__ == '__main__':
+    main()
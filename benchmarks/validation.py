@@ -0,0 +1,87 @@
+"""Response validation throughput.
+
+Validates a large JSON body from several request threads, inline and with
+process pools of increasing size, and prints the validations per second
+of each.  Inline validation is bound to one core by the GIL; a process
+pool should scale with the number of cores::
+
+    python -m benchmarks.validation --body-kib 1024 --seconds 5
+
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from checks.validation import Validator
+
+ASSERTIONS = [
+    {'json': 'status', 'equals': 'ok'},
+    {'json': 'items.0.id', 'equals': 0},
+    {'regex': r'"name": "item-\d+-end"'},
+]
+
+
+def make_body(kib):
+    """Return a JSON body of about `kib` KiB."""
+    items = []
+    size = 0
+    while size < kib * 1024:
+        item = {'id': len(items), 'name': f"item-{len(items)}-end",
+                'tags': ['a', 'b', 'c'], 'value': len(items) * 1.5}
+        items.append(item)
+        size += len(json.dumps(item)) + 2
+    return json.dumps({'status': 'ok', 'items': items}).encode()
+
+
+def run(validator, body, threads, seconds):
+    """Return validations per second of `threads` submitting to `validator`."""
+    count = [0] * threads
+    deadline = time.monotonic() + seconds
+
+    def submit(i):
+        while time.monotonic() < deadline:
+            failure = validator.submit(ASSERTIONS, body).result()
+            assert failure is None, failure
+            count[i] += 1
+
+    workers = [threading.Thread(target=submit, args=(i,))
+               for i in range(threads)]
+    start = time.monotonic()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(count) / (time.monotonic() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--body-kib', type=int, default=1024)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=16,
+                        help="request threads submitting validations")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    body = make_body(args.body_kib)
+    print(f"body {len(body) // 1024} KiB, {args.threads} threads, "
+          f"{os.cpu_count()} cores")
+    print(f"{'workers':>8} {'per second':>12} {'speedup':>8}")
+    baseline = None
+    for count in [0] + [w for w in (1, 2, 4, 8, 16, 32, 64)
+                        if w <= args.max_workers]:
+        validator = Validator(count)
+        validator.start()
+        try:
+            validator.submit(ASSERTIONS, body).result()  # warm the pool
+            rate = run(validator, body, args.threads, args.seconds)
+        finally:
+            validator.stop()
+        baseline = baseline or rate
+        print(f"{count or 'inline':>8} {rate:>12.1f} "
+              f"{rate / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
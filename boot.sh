@@ -1,3 +1,10 @@
 #!/bin/bash
 source venv/bin/activate
-exec gunicorn -b :5000 -w 4 --access-logfile - --error-logfile - app:app
+export CHECK_RUNNER=${CHECK_RUNNER:-127.0.0.1:5050}
+# the runner and the web workers share this key; generate one unless given
+export CHECK_RUNNER_AUTHKEY=${CHECK_RUNNER_AUTHKEY:-$(python -c \
+    'import secrets; print(secrets.token_hex(32))')}
+python -m runner &
+# result streams hold a thread each; keep WEB_THREADS above STREAM_MAX_CLIENTS
+exec gunicorn -b :5000 -w ${WEB_WORKERS:-4} -k gthread \
+    --threads ${WEB_THREADS:-16} --access-logfile - --error-logfile - app:app
@@ -0,0 +1,65 @@
+"""Response Body Digest.
+
+Check results never keep response bodies.  The body is streamed through a
+`ResponseBody`, which records how much was read, a hash of what was read and
+an optional sample from the start of the body.  Bodies are only kept whole
+when they are to be validated (see `checks.validation`).
+
+"""
+import hashlib
+
+
+class ResponseBody(object):
+    """Streaming digest of a response body.
+
+    At most `max_bytes` are read; the remainder of a larger body is left
+    unread and `truncated` is set.  The first `sample_bytes` bytes are kept as
+    `sample` (`None` when sampling is disabled).  With `keep` the bytes read
+    are kept as `content`.
+
+    """
+
+    def __init__(self, max_bytes=1048576, sample_bytes=0, keep=False):
+        self.max_bytes = max_bytes
+        self.sample_bytes = sample_bytes
+        self.size = 0
+        self.truncated = False
+        self._hash = hashlib.sha256()
+        self._sample = bytearray()
+        self._content = bytearray() if keep else None
+
+    def feed(self, chunk):
+        """Add `chunk` to the digest.
+
+        Return False once the body has gone past `max_bytes` and the caller
+        should stop reading.
+
+        """
+        remaining = self.max_bytes - self.size
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._content is not None:
+            self._content += chunk
+        if len(self._sample) < self.sample_bytes:
+            self._sample += chunk[:self.sample_bytes - len(self._sample)]
+        return not self.truncated
+
+    @property
+    def digest(self):
+        """Return the hex SHA-256 of the bytes read."""
+        return self._hash.hexdigest()
+
+    @property
+    def sample(self):
+        """Return the sampled bytes, or None if sampling is disabled."""
+        if not self.sample_bytes:
+            return None
+        return bytes(self._sample)
+
+    @property
+    def content(self):
+        """Return the bytes read, or None if they were not kept."""
+        return self._content
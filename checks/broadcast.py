@@ -0,0 +1,150 @@
+"""Result Broadcast.
+
+Streams of new results (see ``/api/v1/stream``) all want the same thing:
+the latest result of every monitor whenever it changes.  A
+`ResultBroadcast` reads the request manager's latest results once per
+`interval`, whatever the number of open streams, and fans the new ones out
+to every subscriber.  With check runners every read is a round trip to
+them, so it is made once per process rather than once per stream.
+
+The reader thread runs only while someone is subscribed, and the number of
+subscribers is capped; every open stream holds a web worker thread.
+
+"""
+import collections
+import logging
+import threading
+import time
+
+
+class Subscription(object):
+    """New results waiting to be sent to one stream.
+
+    The first result of every monitor -- the `snapshot` of the latest
+    results, then those of monitors it did not have -- is sent first and
+    does not count against `backlog`, however many monitors there are.
+    Later results are dropped, and the subscription `closed`, if the stream
+    falls more than `backlog` of them behind.
+
+    """
+
+    def __init__(self, slugs=None, backlog=1000, snapshot=None):
+        self.slugs = set(slugs or ())   # empty for every monitor
+        self.backlog = backlog
+        self.snapshot = {slug: result
+                         for slug, result in (snapshot or {}).items()
+                         if self.wants(slug)}
+        self.seen = set(self.snapshot)   # slugs with a result queued
+        self.results = collections.deque()   # (slug, result)
+        self.ready = threading.Condition()
+        self.closed = False
+
+    def wants(self, slug):
+        """Return True if results of `slug` are sent to this stream."""
+        return not self.slugs or slug in self.slugs
+
+    def put(self, slug, result):
+        """Queue `result` of `slug`; return False if the stream fell behind."""
+        if not self.wants(slug):
+            return True
+        with self.ready:
+            if slug not in self.seen:
+                self.seen.add(slug)
+                self.snapshot[slug] = result
+            elif len(self.results) >= self.backlog:
+                self.closed = True
+            else:
+                self.results.append((slug, result))
+            self.ready.notify()
+        return not self.closed
+
+    def get(self, timeout=None):
+        """Return the queued ``(slug, result)`` pairs, waiting for some."""
+        with self.ready:
+            if not (self.snapshot or self.results or self.closed):
+                self.ready.wait(timeout)
+            results = list(self.snapshot.items()) + list(self.results)
+            self.snapshot = {}
+            self.results.clear()
+        return results
+
+
+class ResultBroadcast(object):
+    """Fan the latest results of the request manager out to subscribers."""
+
+    def __init__(self, manager=None, interval=1.0, max_clients=8,
+                 backlog=1000, logger=None):
+        """Initialize the broadcast.
+
+        Args:
+            manager: the `RequestsManager` (or remote manager) to read
+            interval(float): seconds between reads of the latest results
+            max_clients(int): subscribers allowed at once
+            backlog(int): results a subscriber may fall behind by
+
+        """
+        self.manager = manager
+        self.interval = interval
+        self.max_clients = max_clients
+        self.backlog = backlog
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.latest = {}   # slug -> latest result sent
+        self.thread = None
+
+    def subscribe(self, slugs=None):
+        """Return a new `Subscription`, or None if `max_clients` are open.
+
+        The latest result of every monitor already read is queued first.
+
+        """
+        with self.lock:
+            if len(self.subscriptions) >= self.max_clients:
+                return None
+            subscription = Subscription(slugs, self.backlog, self.latest)
+            self.subscriptions.add(subscription)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="ResultBroadcast", daemon=True)
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop sending results to `subscription`."""
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    @property
+    def clients(self):
+        """Return the number of open subscriptions."""
+        with self.lock:
+            return len(self.subscriptions)
+
+    def publish(self, latest):
+        """Send the results of `latest` that changed to every subscriber."""
+        with self.lock:
+            for slug, result in latest.items():
+                sent = self.latest.get(slug)
+                if sent is not None and sent.timestamp == result.timestamp:
+                    continue
+                self.latest[slug] = result
+                for subscription in list(self.subscriptions):
+                    if not subscription.put(slug, result):
+                        self.subscriptions.discard(subscription)
+            for slug in set(self.latest) - set(latest):
+                del self.latest[slug]
+
+    def run(self):
+        """Reader thread; returns once nobody is subscribed."""
+        while True:
+            with self.lock:
+                if not self.subscriptions:
+                    self.thread = None
+                    self.latest = {}
+                    return
+            try:
+                self.publish(self.manager.latest)
+            except Exception:
+                self.logger.exception("Failed to read the latest results")
+            time.sleep(self.interval)
@@ -0,0 +1,155 @@
+"""Monitor Change Feed.
+
+The change feed tells the check runners which monitors changed, so edits
+reach the schedule within a second instead of waiting for a reload.  A
+publisher announces the slug of every monitor it adds, edits, enables,
+disables or deletes; subscribers receive the changed slugs in small
+batches.
+
+On Postgres, changes travel between processes with ``NOTIFY`` and
+``LISTEN``.  Other databases fall back to an in-process queue, which only
+reaches subscribers in the publishing process.
+
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+import sqlalchemy as sa
+
+
+class ChangeFeed(object):
+    """Publish and subscribe to monitor changes.
+
+    The feed is local until `configure` gives it a Postgres engine.  Changed
+    slugs are handed to the subscriber by a background thread, batched over
+    `batch_interval` seconds.
+
+    """
+
+    def __init__(self, batch_interval=0.2, channel='monitor_changes',
+                 logger=None):
+        """Initialize a local change feed.
+
+        Args:
+            batch_interval(float): seconds changes are collected per batch
+            channel(str): the Postgres notification channel
+
+        """
+        self.batch_interval = batch_interval
+        self.channel = channel
+        self.logger = logger or logging.getLogger(__name__)
+        self.engine = None
+        self.queue = queue.Queue()
+        self.callback = None
+        self.thread = None
+        self.should_die = False  # flag to terminate thread
+
+    def configure(self, engine):
+        """Carry changes over ``NOTIFY`` if `engine` is a Postgres engine."""
+        self.engine = engine if engine.dialect.name == 'postgresql' else None
+
+    @property
+    def shared(self):
+        """Return True if other processes receive the published changes."""
+        return self.engine is not None
+
+    def publish(self, *slugs):
+        """Announce that the monitors `slugs` changed."""
+        if not slugs:
+            return
+        if self.engine is None:
+            for slug in slugs:
+                self.queue.put(slug)
+            return
+        with self.engine.begin() as conn:
+            conn.execute(sa.text("SELECT pg_notify(:channel, :payload)"),
+                         {'channel': self.channel,
+                          'payload': json.dumps(list(slugs))})
+
+    def subscribe(self, callback):
+        """Call `callback` with every batch of changed slugs."""
+        self.callback = callback
+        if self.thread is None or not self.thread.is_alive():
+            self.should_die = False
+            target = self.listen if self.shared else self.consume
+            self.thread = threading.Thread(
+                target=target, name="MonitorChanges", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Tell the subscriber thread to die."""
+        self.should_die = True
+
+    def deliver(self, slugs):
+        """Hand `slugs` to the subscriber, logging any failure."""
+        if not slugs or self.callback is None:
+            return
+        try:
+            self.callback(slugs)
+        except Exception:
+            self.logger.exception(
+                f"Failed to apply changes to {len(slugs)} monitors")
+
+    def consume(self):
+        """Subscriber thread of a local feed."""
+        while not self.should_die:
+            try:
+                slugs = {self.queue.get(timeout=1)}
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.batch_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    slugs.add(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.deliver(slugs)
+
+    def _listen(self):
+        """Return a dedicated, autocommit connection listening on `channel`."""
+        raw = self.engine.raw_connection()
+        conn = getattr(raw, 'dbapi_connection', None) or raw.connection
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return raw, conn
+
+    def listen(self):
+        """Subscriber thread of a Postgres feed.
+
+        Listen for notifications, reconnecting after a lost connection.
+        Other tools can publish too, with a JSON list of slugs as the
+        payload of a notification on `channel`.
+
+        """
+        raw = None
+        while not self.should_die:
+            try:
+                if raw is None:
+                    raw, conn = self._listen()
+                if not select.select([conn], [], [], 1)[0]:
+                    continue
+                slugs = set()
+                deadline = time.monotonic() + self.batch_interval
+                while True:
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        slugs.update(json.loads(notify.payload))
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or \
+                            not select.select([conn], [], [], remaining)[0]:
+                        break
+                self.deliver(slugs)
+            except Exception:
+                self.logger.exception("Lost the monitor change listener")
+                if raw is not None:
+                    raw.invalidate()
+                    raw = None
+                time.sleep(1)
@@ -39,7 +39,7 @@ class Endpoint(object):
             slug(str): A unique identifier for this endpoint.
 
         Properties:
-            frequency(int): The maximum frequency to make requests in seconds
+            frequency(int): The frequency to make requests in seconds
             scheme(str): The scheme of the URI
             server(str): The server to make requests to
             port(int): The port the server is listening on
@@ -64,6 +64,12 @@ class Endpoint(object):
         # TODO: turn these into properties
         self.timeout = 5
         self.verify = False
+        self.cold_connection = False  # open a new connection every check
+        self.dns_cache = True  # resolve the server through the DNS cache
+        self.updated = None  # version of the monitor it was built from
+        self.assertions = []  # checked against each response body
+        self.window_size = None  # results kept in memory, or
+        self.window_span = None  # seconds of results kept in memory
 
     @property
     def payload(self):
@@ -217,12 +223,11 @@ class Endpoint(object):
 
     @property
     def frequency(self):
-        """Return the maximum frequency of requests for this endpoint.
+        """Return the frequency of requests for this endpoint.
 
-        This is the *maximum* frequency.  A request will take `frequency` plus
-        the endpoint response time.  If the endpoint responds in 1 second and
-        frequency is set to 10 seconds, the endpoint can be checked a maximum
-        of once every `11` seconds.
+        Checks start every `frequency` seconds regardless of the endpoint
+        response time.  If a check takes longer than `frequency` the checks
+        that would have started while it was running are skipped.
 
         """
         return self._frequency
@@ -236,6 +241,17 @@ class Endpoint(object):
             raise ValueError(
                 "Endpoint frequencies are measured in seconds as an integer.")
 
+    def window_length(self, default=20):
+        """Return the number of results to keep in memory for this endpoint.
+
+        A `window_span` is converted to results at the endpoint frequency;
+        without a `window_size` or `window_span` `default` is returned.
+
+        """
+        if self.window_span:
+            return max(1, -(-self.window_span // max(self.frequency, 1)))
+        return self.window_size or default
+
     @property
     def url(self):
         """Return a URL.
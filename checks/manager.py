@@ -4,44 +4,268 @@ The manager module is responsible for managing the threads and queues
 responsible for issuing check requests.
 
 """
-import collections
+import aiohttp
+import asyncio
+import concurrent.futures
+import contextlib
 import datetime
 import logging
 import requests
 import threading
-import time
 import queue
+import time
+from checks import timing
+from checks.body import ResponseBody
+from checks.ratelimit import HostLimiter
+from checks.resolver import CachedResolver, DNSCache
+from checks.results import RequestDimension, ResultStore
+from checks.scheduler import Scheduler
+from checks.sessions import SessionPool
+from checks.validation import Validator
+
+# Response bodies are streamed in chunks of this many bytes
+CHUNK_SIZE = 65536
+
+
+def build_dimension(result, message, start, timings,
+                    status_code=0, body=None, TTFB=None, throttle=0.0):
+    """Build a `RequestDimension` from the parts of a finished request.
+
+    `start` is the timezone aware wall clock time the request started,
+    `timings` the stopped `timing.Timings` of the request and `body` the
+    `ResponseBody` the response was streamed through.  `TTFB`, in
+    milliseconds, overrides the measured time to first byte when the request
+    could not be instrumented.  `throttle` is the number of seconds the
+    check was held by the per-host limits before the request started.
+    Every check engine builds its results here so they are interchangeable.
 
-
-RequestDimension = collections.namedtuple('RequestDimension', [
-    'date',           # datetime.datetime
-    'timestamp',      # timestamp()
-    'status',         # Boolean (did the request fail or not)
-    'status_code',    # HTTP status code
-    'TTFB',           # Time to first Byte
-    'elapsed',        # Total elapsed time
-    'content',        # Content of the Request
-    'message',        # Any passed message (usually failure reason)
-])
+    """
+    if TTFB is None:
+        TTFB = timings.ttfb * 1000.0
+    if body is None:
+        size, digest, sample = 0, None, None
+    else:
+        size, digest, sample = body.size, body.digest, body.sample
+    return RequestDimension(
+        start,
+        start.timestamp(),
+        result,
+        status_code,
+        TTFB,
+        timings.elapsed * 1000.0,
+        size,
+        digest,
+        sample,
+        message,
+        timings.dns * 1000.0,
+        timings.connect * 1000.0,
+        timings.tls * 1000.0,
+        timings.transfer * 1000.0 if result else 0.0,
+        throttle * 1000.0,
+    )
 
 
 class RequestsManager(object):
+    """Request Manager.
+
+    The request manager owns the endpoint schedule and the worker pool.
+    Endpoints are added to the schedule with `add`; the scheduler thread puts
+    each endpoint on `request_queue` when its check is due and a worker
+    thread makes the request and hands the endpoint back to the scheduler.
+
+    The worker pool is sized by the number of requests expected to be in
+    flight at once, not by the number of endpoints.
+
+    """
 
-    def __init__(self, thread_count=1, logger=None):
+    ENGINES = ('threads', 'asyncio')
+
+    def __init__(self, thread_count=1, logger=None, engine='threads',
+                 concurrency=100, pool_size=10, pool_idle_timeout=60,
+                 body_limit=1048576, body_sample=0, writer=None,
+                 validation_workers=0, spread=True, host_concurrency=0,
+                 host_rate=0, host_burst=1, host_max_wait=60):
         """Initialize a new Request Manager.
 
         Args:
             thread_count(int): Number of threads to spawn for requests.
-
+            engine(str): `threads` or `asyncio`
+            concurrency(int): Maximum in-flight requests of the asyncio engine
+            pool_size(int): Keep-alive connections kept per target
+            pool_idle_timeout(int): Seconds before idle connections are closed
+            body_limit(int): Maximum bytes of a response body to read
+            body_sample(int): Bytes of each response body to keep
+            writer(`ResultWriter`): Persists every result, when set
+            validation_workers(int): Processes evaluating response
+                assertions; 0 evaluates them in the checking thread
+            spread(bool): Spread first checks over each endpoint's interval
+            host_concurrency(int): Most checks in flight per server and
+                port; 0 is no limit
+            host_rate(float): Most checks per second per server and port;
+                0 is no limit
+            host_burst(int): Checks per server and port allowed back to
+                back before `host_rate` applies
+            host_max_wait(float): Longest seconds a check waits for
+                `host_rate`; checks that would wait longer are skipped
+
+        The `threads` engine runs `thread_count` blocking worker threads.  The
+        `asyncio` engine runs every check on a single event loop with at most
+        `concurrency` requests in flight.
         """
         self.logger = logger or logging.getLogger(__name__)
         self.thread_count = thread_count
+        self.engine = engine
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.body_limit = body_limit
+        self.body_sample = body_sample
+        self.writer = writer
+        self.validation_workers = validation_workers
+        self.validator = Validator(validation_workers, self.logger)
+        self.limiter = HostLimiter(host_rate, host_burst, host_max_wait)
+        self.resolver = DNSCache()
+        self.sessions = SessionPool(pool_size, pool_idle_timeout)
         self.request_queue = queue.Queue()
+        self.scheduler = Scheduler(self.request_queue.put, logger=self.logger,
+                                   spread=spread, host_limit=host_concurrency,
+                                   limiter=self.limiter)
         self.threads = []
-        self.results = {}
-        self.lock = threading.Lock()
+        self.results = ResultStore()
+        self.endpoints = {}   # slug -> every endpoint assigned, owned or not
+        self.ring = None      # `HashRing` of runners when sharded
+        self.node = None      # this runner's name on `ring`
         self.logger.debug("Created a new RequestManager")
 
+    def owns(self, slug):
+        """Return True if this manager checks `slug`.
+
+        An unsharded manager checks every endpoint; a sharded one only the
+        slugs `node` owns on `ring` (see `checks.shard`).
+
+        """
+        return self.ring is None or self.ring.owner(slug) == self.node
+
+    def add(self, endpoint):
+        """Assign `endpoint`; if owned, schedule its first check.
+
+        The first check is due at the endpoint's phase of its interval (see
+        `Scheduler.first_due`).
+
+        """
+        if not self.checkable(endpoint):
+            return
+        self.endpoints[endpoint.slug] = endpoint
+        if self.owns(endpoint.slug):
+            self.reserve(endpoint)
+            self.scheduler.add(endpoint, self.scheduler.first_due(endpoint))
+
+    def checkable(self, endpoint):
+        """Return True if `endpoint` can be scheduled, logging why not."""
+        if endpoint.frequency >= 1:
+            return True
+        self.logger.error(f"Not checking {endpoint.name}: it is checked every "
+                          f"{endpoint.frequency}s; the least is 1s")
+        return False
+
+    def reserve(self, endpoint):
+        """Size the result window of `endpoint` to its `window_length`."""
+        self.results.resize(
+            endpoint.slug, endpoint.window_length(self.results.window_size))
+
+    def remove(self, endpoint):
+        """Stop checking `endpoint` and forget its results."""
+        endpoint = self.endpoints.pop(endpoint.slug, endpoint)
+        self.scheduler.remove(endpoint)
+        self.results.discard(endpoint.slug)
+
+    def update(self, endpoint):
+        """Apply a changed `endpoint` to the assigned endpoint of its slug.
+
+        The assigned endpoint is updated in place, so its schedule, results
+        and any check in flight carry on; only a shortened frequency moves
+        the next check.
+
+        """
+        current = self.endpoints.get(endpoint.slug)
+        if current is None:
+            self.add(endpoint)
+            return
+        if not self.checkable(endpoint):
+            self.remove(current)
+            return
+        current.__dict__.update(endpoint.__dict__)
+        if self.owns(current.slug):
+            self.reserve(current)
+        self.scheduler.pull_in(current)
+
+    @property
+    def versions(self):
+        """Return the `updated` version of every assigned endpoint."""
+        return {slug: ep.updated for slug, ep in self.endpoints.items()}
+
+    def sync(self, endpoints, removed=(), start=True):
+        """Apply changed `endpoints` and `removed` slugs to the schedule.
+
+        Unlike `load`, the pool keeps running: endpoints not mentioned are
+        untouched and keep their schedule.  New slugs are added, known ones
+        are updated in place and `removed` slugs are dropped.  The pool is
+        started if it is not running and `start` is set.  Returns the
+        number of endpoints added, updated and removed.
+
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        for slug in removed:
+            if slug in self.endpoints:
+                self.remove(self.endpoints[slug])
+                counts['removed'] += 1
+        for endpoint in endpoints:
+            if endpoint.slug in self.endpoints:
+                self.update(endpoint)
+                counts['updated'] += 1
+            else:
+                self.add(endpoint)
+                counts['added'] += 1
+        if start and not self.threads:
+            self.start()
+        return counts
+
+    def load(self, endpoints):
+        """Replace the schedule with `endpoints` and (re)start the pool.
+
+        Results of endpoints still checked are kept; the windows of every
+        other endpoint are dropped.
+
+        """
+        self.stop(join=True)
+        self.clear()
+        for endpoint in endpoints:
+            self.add(endpoint)
+        self.results.retain(
+            slug for slug in self.endpoints if self.owns(slug))
+        self.start()
+        return len(endpoints)
+
+    def rebalance(self, ring, node, delay=0):
+        """Check only the endpoints `node` owns on `ring`.
+
+        Endpoints no longer owned are dropped at once, along with their
+        results; endpoints gained are first due at their phase, at least
+        `delay` seconds from now.
+
+        """
+        self.ring = ring
+        self.node = node
+        due = time.monotonic() + delay
+        for slug, endpoint in list(self.endpoints.items()):
+            if not self.owns(slug):
+                self.scheduler.remove(endpoint)
+                self.results.discard(slug)
+            elif endpoint not in self.scheduler:
+                self.reserve(endpoint)
+                self.scheduler.add(endpoint,
+                                   self.scheduler.first_due(endpoint, due))
+
     @property
     def window(self):
         """Return a copy of the current result window.
@@ -49,13 +273,77 @@ class RequestsManager(object):
         Result windows are returned as a dictionary with endpoint slugs as keys
 
         """
-        _w = {}
-        with self.lock:
-            for endpoint, data in self.results.items():
-                _w[endpoint.slug] = []
-                for window in data:
-                    _w[endpoint.slug].append(window)
-        return _w
+        return self.results.snapshot()
+
+    @property
+    def latest(self):
+        """Return the most recent result of every endpoint, keyed by slug."""
+        return self.results.latest()
+
+    def results_of(self, slug):
+        """Return the result window of `slug` (oldest first).
+
+        Only the window of `slug` is read; no other window is copied.
+
+        """
+        return self.results.results_of(slug)
+
+    @property
+    def state(self):
+        """Return a snapshot of the request pool.
+
+        The snapshot is a dictionary with the `engine`, the runner `node`,
+        `thread_count`, `queue_size`, `endpoint_count` (endpoints checked
+        here), `result_bytes` (memory held by result windows), the
+        `schedule` timing summary (see `Scheduler.timing`), the `dns` cache
+        counters (see `DNSCache.stats`) and the `threads` as a list of
+        dictionaries of their `name`, `status`, the `endpoint` and
+        `frequency` being checked (None when idle) and whether they are
+        `alive`.
+
+        """
+        return {
+            'engine': self.engine,
+            'node': self.node,
+            'thread_count': self.thread_count,
+            'queue_size': self.request_queue.qsize(),
+            'endpoint_count': self.scheduler.endpoint_count,
+            'result_bytes': self.results.nbytes,
+            'schedule': self.scheduler.timing,
+            'dns': self.resolver.stats,
+            'threads': [t.state for t in self.threads],
+        }
+
+    def timings(self, worst=None):
+        """Return the schedule timing counters of every endpoint.
+
+        See `Scheduler.timings`; the `worst` endpoints by lag when given.
+
+        """
+        return self.scheduler.timings(worst)
+
+    def metrics(self):
+        """Return the Prometheus exposition lines of every endpoint.
+
+        See `checks.metrics.collect`; the lines were rendered as results
+        arrived.
+
+        """
+        return self.results.metrics()
+
+    def summary(self, slug):
+        """Return the statistics of the result window of `slug`.
+
+        Statistics are maintained as results arrive; this does not walk the
+        window.  Returns None if `slug` has no results yet.
+
+        """
+        return self.results.summary(slug)
+
+    @property
+    def summaries(self):
+        """Return the statistics of every result window, keyed by slug."""
+        return self.results.summaries()
 
     def start(self):
         """Start a new thread pool.
@@ -66,10 +354,45 @@ class RequestsManager(object):
         """
         if len(self.threads) > 0:  # if there is a pool already, kill it
             self.stop()
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"{self.engine} is not a valid request engine")
+        self.scheduler.logger = self.logger
+        self.scheduler.start()
+        self.sessions.pool_size = self.pool_size
+        self.sessions.idle_timeout = self.pool_idle_timeout
+        self.sessions.logger = self.logger
+        self.validator.workers = self.validation_workers
+        self.validator.logger = self.logger
+        self.validator.start()
+        if self.engine == 'asyncio':
+            t = AsyncRequestEngine(request_queue=self.request_queue,
+                                   request_results=self.results,
+                                   scheduler=self.scheduler,
+                                   body_limit=self.body_limit,
+                                   body_sample=self.body_sample,
+                                   writer=self.writer,
+                                   validator=self.validator,
+                                   resolver=self.resolver,
+                                   concurrency=self.concurrency,
+                                   pool_size=self.pool_size,
+                                   pool_idle_timeout=self.pool_idle_timeout)
+            t.logger = self.logger
+            self.threads.append(t)
+            t.start()
+            self.logger.info(
+                "Started a new asyncio engine with a concurrency of "
+                f"{self.concurrency}")
+            return
         for i in range(self.thread_count):
-            t = EndpointRequestThread(lock=self.lock,
-                                      request_queue=self.request_queue,
-                                      request_results=self.results)
+            t = EndpointRequestThread(request_queue=self.request_queue,
+                                      request_results=self.results,
+                                      scheduler=self.scheduler,
+                                      sessions=self.sessions,
+                                      body_limit=self.body_limit,
+                                      body_sample=self.body_sample,
+                                      writer=self.writer,
+                                      validator=self.validator,
+                                      resolver=self.resolver)
             t.logger = self.logger
             self.threads.append(t)
             t.start()
@@ -77,16 +400,21 @@ class RequestsManager(object):
             f"Started a new thread pool with {self.thread_count} threads")
 
     def clear(self):
-        """Remove all items from the queue."""
+        """Remove all endpoints from the schedule and the queue."""
+        self.endpoints = {}
+        self.scheduler.clear()
         while not self.request_queue.empty():
             item = self.request_queue.get()
             self.request_queue.task_done()
-            print(f'popped a queue item: {item}')
+            self.logger.debug(f"Dropped the queued check of {item.name}")
 
     def stop(self, join=False):
         """Enumerate all threads and tell them to die.
 
+        The schedule is kept; `start` resumes checking the same endpoints.
+
         """
+        self.scheduler.stop(join=join)
         for t in self.threads:
             self.logger.debug(f"Stopping {t.name}")
             t.should_die = True
@@ -97,6 +425,8 @@ class RequestsManager(object):
             for t in self.threads:
                 self.logger.debug(f"joining {t.name}")
                 t.join()
+            self.sessions.close()
+            self.validator.stop()
 
         self.threads = []
 
@@ -107,35 +437,19 @@ class EndpointRequestThread(threading.Thread):
     The endpoint request thread is responsible for making a request to an
     endpoint and storing the results.
 
-    Each thread pops an Endpoint object off the request queue to process.  When
-    the request is completed, the thread adds the Endpoint back to the queue.
+    Each thread pops a due Endpoint object off the request queue to process.
+    When the request is completed, the thread hands the Endpoint back to the
+    scheduler, which queues it again when its next check is due.
 
 
     Endpoint Results:
-        Endpoint results are stored in a shared dictionary that maps endpoint
-        objects to a deque of dimensions::
-
-            {
-              EndPointObject: [{
-                'timestamp': timestamp of request,
-                'TTFB': Time to first byte (ms),
-                'elapsed': Time to last byte (ms),
-                'status_code': status code returned
-              }],
-              'System': {
-                'count': number of requests
-              }
-            }
-
-        The deque is configurable at thread creation time with the purpose of
-        operating as a moving time window of results.
-
-        The `timestamp` is stored as a timezone aware datetime object.  The
-        timezone is `UTC`.
+        Endpoint results are stored as `RequestDimension`s in a shared
+        `ResultStore`, which keeps a moving window of results per endpoint
+        slug.  Each window has its own lock, so threads recording results
+        for different endpoints never contend.
 
-        The `System` key contains information about the runtime of the manager.
-        `count` contains the number of requests that have been made since the
-        system was started.
+        The `date` is stored as a timezone aware datetime object.  The
+        timezone is `UTC`.
 
     """
     COUNT = 0
@@ -144,10 +458,15 @@ class EndpointRequestThread(threading.Thread):
                  group=None,
                  target=None,
                  name=None,
-                 lock=None,
                  request_queue=queue.Queue(),
-                 request_results={},
-                 window_size=20,
+                 request_results=None,
+                 scheduler=None,
+                 sessions=None,
+                 body_limit=1048576,
+                 body_sample=0,
+                 writer=None,
+                 validator=None,
+                 resolver=None,
                  verbose=None,
                  args=(),
                  kwargs=None):
@@ -156,9 +475,15 @@ class EndpointRequestThread(threading.Thread):
         Initialize an endpoint request thread.
 
         Args:
-            lock(`threading.Lock`): primitive lock for `request_results`
             request_queue(`queue.Queue`): queue for storing endpoints
-            request_results(`dict`):  results of endpoint requests.
+            request_results(`ResultStore`):  results of endpoint requests.
+            scheduler(`Scheduler`): schedule to return checked endpoints to
+            sessions(`SessionPool`): keep-alive sessions shared by threads
+            body_limit(int): maximum bytes of a response body to read
+            body_sample(int): bytes of each response body to keep
+            writer(`ResultWriter`): persists every result, when set
+            validator(`Validator`): evaluates response assertions
+            resolver(`DNSCache`): resolves the servers of checks
 
         The lifetime of a thread is controlled by the member variable
         `should_die`.  The thread will continue to wait for requests from the
@@ -171,86 +496,147 @@ class EndpointRequestThread(threading.Thread):
                                                     name=name)
         self.args = args
         self.kwargs = kwargs
-        self.lock = lock
         self.request_queue = request_queue
-        self.request_results = request_results
-        self.window_size = window_size
+        self.request_results = request_results if request_results \
+            is not None else ResultStore()
+        self.scheduler = scheduler
+        self.sessions = sessions
+        self.body_limit = body_limit
+        self.body_sample = body_sample
+        self.writer = writer
+        self.validator = validator if validator is not None else Validator()
+        self.resolver = resolver if resolver is not None else DNSCache()
         self.should_die = False  # flag to terminate thread
         self.status = "Waiting for an endpoint request"
+        self.endpoint = None     # endpoint being checked
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def state(self):
+        """Return the status of the thread and the endpoint it checks."""
+        endpoint = self.endpoint
+        return {
+            'name': self.name,
+            'status': self.status,
+            'endpoint': endpoint.name if endpoint is not None else None,
+            'frequency': endpoint.frequency if endpoint is not None else None,
+            'alive': self.is_alive(),
+        }
+
     def update(self, endpoint, request_dimension):
         """Update the results.
 
-        Update `request_results` with the latest data from a request.
+        Update `request_results` and the window statistics with the latest
+        data from a request and queue it for the persistent store.
 
         """
+        rd = request_dimension
         self.status = "Updating result window"
-        with self.lock:
-            if endpoint not in self.request_results:
-                self.request_results[endpoint] = collections.deque(
-                    maxlen=self.window_size)
-            self.request_results[endpoint].append(request_dimension)
+        self.request_results.append(endpoint.slug, rd)
+        if self.writer is not None:
+            self.writer.put(endpoint.slug, rd)
 
-    def _build_dimensions(self, result, message, start, end, response=None):
+    def _build_dimensions(self, result, message, start, timings,
+                          response=None, body=None, throttle=0.0):
         """Build a `RequestDimension`
 
-        Build a new `RequestDimension` for the current request.
+        Build a new `RequestDimension` for the current request.  Requests
+        made without an instrumented connection fall back to the
+        `requests` measure of time to first byte.
 
         """
+        TTFB = None
         if result:  # the request was successful
             status_code = response.status_code
-            content = response.content
-            TTFB = sum((r.elapsed for r in response.history),
-                       response.elapsed).total_seconds() * 1000.0
+            if timings.headers is None:
+                TTFB = sum((r.elapsed for r in response.history),
+                           response.elapsed).total_seconds() * 1000.0
         else:
             status_code = 0
-            content = None
+            body = None
             TTFB = 0
-        return RequestDimension(
-            start,
-            start.timestamp(),
-            result,
-            status_code,
-            TTFB,
-            (end - start).total_seconds() * 1000.0,
-            content,
-            message
-        )
-
-    def request(self, endpoint):
+        return build_dimension(result, message, start, timings,
+                               status_code, body, TTFB, throttle)
+
+    def validation(self, endpoint, body):
+        """Return a future of why `body` fails the assertions of `endpoint`.
+
+        The future's result is None if the body passes.
+
+        """
+        self.status = "Validating a response"
+        return self.validator.submit(endpoint.assertions, body.content)
+
+    def validated(self, endpoint, rd, failure):
+        """Return `rd`, failed with `failure` if the body failed validation.
+
+        `failure` is the message of a failed assertion, None, or the
+        exception raised while validating.
+
+        """
+        if isinstance(failure, Exception):
+            self.logger.error(
+                f"{self.name} failed to validate {endpoint.name}: {failure!r}")
+            failure = f"Validation error: {failure!r}"
+        if failure is None:
+            return rd
+        return rd._replace(status=False, message=failure)
+
+    def read(self, response, keep=False):
+        """Stream the body of `response` into a `ResponseBody`.
+
+        Reading stops at `body_limit` bytes; the connection of a truncated
+        response is closed rather than returned to the pool.  With `keep`
+        the body is kept for validation.
+
+        """
+        body = ResponseBody(self.body_limit, self.body_sample, keep)
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if not body.feed(chunk):
+                    break
+        finally:
+            response.close()
+        return body
+
+    def request(self, endpoint, throttle=0.0):
         """Make a request to the `endpoint`.
 
         Make the request to the passed `endpoint` and record the results.
+        `throttle` is the number of seconds the scheduler held the check.
 
         """
-        self.status = f"Sending a request to an endpoint, {endpoint.name}"
+        self.status = "Sending a request to an endpoint"
         start = datetime.datetime.now(datetime.timezone.utc)
+        timing.begin(self.resolver.getaddrinfo if endpoint.dns_cache else None)
         result = True
         message = ''
         response = None
+        body = None
         try:
-            url, payload = endpoint.request
-            response = requests.request(endpoint.verb, url, **payload)
+            if self.sessions is not None:
+                response = self.sessions.request(endpoint)
+            else:
+                url, payload = endpoint.request
+                response = requests.request(endpoint.verb, url, stream=True,
+                                            **payload)
+            body = self.read(response, keep=bool(endpoint.assertions))
         except requests.exceptions.RequestException as ex:
             result = False
             message = f"{getattr(ex, 'message', repr(ex))}"
+        finally:
+            timings = timing.end()
 
-        end = datetime.datetime.now(datetime.timezone.utc)
-        rd = self._build_dimensions(result, message, start, end, response)
+        rd = self._build_dimensions(result, message, start, timings,
+                                    response, body, throttle)
+        if result and endpoint.assertions:
+            try:
+                failure = self.validation(endpoint, body).result()
+            except Exception as ex:
+                failure = ex
+            rd = self.validated(endpoint, rd, failure)
         self.update(endpoint, rd)
 
-    def wait_for_frequency(self, frequency, name):
-        """wait for this run's frequency to expire"""
-        self.status = \
-            f"waiting for endpoint frequency to expire, {name}, {frequency}"
-        while frequency > 0:
-            # check if the thread wants to die
-            if self.should_die:
-                return
-            time.sleep(1)
-            frequency -= 1
-
     def run(self):
         """Thread execution point.
 
@@ -269,11 +655,197 @@ class EndpointRequestThread(threading.Thread):
                 # TODO: make sure this is actually an `Endpoint`
                 endpoint = self.request_queue.get(timeout=3)
                 self.logger.debug(f"{self.name} is checking {endpoint.name}")
-                self.request(endpoint)
-                self.wait_for_frequency(endpoint.frequency, endpoint.name)
-                self.request_queue.task_done()
-                self.request_queue.put(endpoint)
+                self.endpoint = endpoint
+                held = 0.0
+                if self.scheduler is not None:
+                    held = self.scheduler.started(endpoint)
+                try:
+                    self.request(endpoint, held)
+                finally:
+                    self.endpoint = None
+                    self.request_queue.task_done()
+                    if self.scheduler is not None:
+                        self.scheduler.reschedule(endpoint)
             except queue.Empty:
                 self.status = "Queue is empty"
                 continue  # give the thread a chance
             self.status = "Waiting for an endpoint request"
+
+
+class AsyncRequestEngine(EndpointRequestThread):
+    """Asyncio Request Engine.
+
+    The asyncio engine is a single thread running an event loop.  Due
+    endpoints are taken off the request queue and checked concurrently with a
+    non-blocking HTTP client, at most `concurrency` at a time.  Results are
+    built and stored exactly like `EndpointRequestThread` results.
+
+    The request queue is a blocking `queue.Queue` shared with the scheduler;
+    a single feeder thread waits on it so the event loop never blocks.
+
+    """
+
+    def __init__(self, concurrency=100, pool_size=10, pool_idle_timeout=60,
+                 **kwargs):
+        """Initialize the asyncio engine.
+
+        Args:
+            concurrency(int): maximum number of requests in flight
+            pool_size(int): keep-alive connections kept per target
+            pool_idle_timeout(int): seconds before idle connections close
+
+        All other arguments are passed to `EndpointRequestThread`.
+        """
+        if not kwargs.get('name'):
+            kwargs['name'] = \
+                f"AsyncEndpointRequest-{EndpointRequestThread.COUNT + 1}"
+        super(AsyncRequestEngine, self).__init__(**kwargs)
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.in_flight = 0
+
+    async def request(self, sessions, endpoint, throttle=0.0):
+        """Make a request to the `endpoint`.
+
+        Make the request to the passed `endpoint` and record the results.
+        `sessions` are client sessions keyed by ``(cold, cached)``: whether
+        they open a new connection every request and whether they resolve
+        through the DNS cache.  `throttle` is the number of seconds the
+        scheduler held the check.
+
+        """
+        session = sessions[endpoint.cold_connection, endpoint.dns_cache]
+        start = datetime.datetime.now(datetime.timezone.utc)
+        timings = timing.Timings()
+        result = True
+        message = ''
+        status_code = 0
+        body = ResponseBody(self.body_limit, self.body_sample,
+                            bool(endpoint.assertions))
+        url, payload = endpoint.request
+        timeout = aiohttp.ClientTimeout(sock_connect=payload['timeout'],
+                                        sock_read=payload['timeout'])
+        ssl = None if payload['verify'] else False
+        try:
+            async with session.request(endpoint.verb, url,
+                                       headers=payload['headers'],
+                                       data=payload['data'],
+                                       ssl=ssl,
+                                       timeout=timeout,
+                                       trace_request_ctx=timings) as response:
+                status_code = response.status
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    if not body.feed(chunk):
+                        break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            result = False
+            message = f"{getattr(ex, 'message', repr(ex))}"
+            status_code = 0
+            body = None
+        timings.stop()
+
+        rd = build_dimension(result, message, start, timings,
+                             status_code, body, None if result else 0,
+                             throttle)
+        if result and endpoint.assertions:
+            try:
+                failure = await asyncio.wrap_future(
+                    self.validation(endpoint, body))
+            except Exception as ex:
+                failure = ex
+            rd = self.validated(endpoint, rd, failure)
+        self.update(endpoint, rd)
+
+    async def check(self, sessions, endpoint, limit, held=0.0):
+        """Check `endpoint` and hand it back to the scheduler.
+
+        `held` is the number of seconds the scheduler held the check.
+
+        """
+        self.in_flight += 1
+        try:
+            await self.request(sessions, endpoint, held)
+        except Exception:
+            self.logger.exception(
+                f"{self.name} failed to check {endpoint.name}")
+        finally:
+            self.in_flight -= 1
+            self.request_queue.task_done()
+            if self.scheduler is not None:
+                self.scheduler.reschedule(endpoint)
+            limit.release()
+            self.status = f"{self.in_flight} requests in flight"
+
+    async def serve(self):
+        """Feed due endpoints to the event loop until `should_die` is true.
+
+        Outstanding checks are allowed to finish before returning so every
+        endpoint makes it back to the scheduler.
+
+        """
+        loop = asyncio.get_event_loop()
+        feeder = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"{self.name}-feeder")
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        resolver = CachedResolver(self.resolver)
+        jar = aiohttp.DummyCookieJar()
+        traces = [timing.trace_config()]
+        async with contextlib.AsyncExitStack() as stack:
+            sessions = {}
+            for cold in (False, True):
+                for cached in (False, True):
+                    # the shared DNS cache replaces aiohttp's own
+                    options = {'use_dns_cache': False}
+                    if cached:
+                        options['resolver'] = resolver
+                    if cold:
+                        connector = aiohttp.TCPConnector(
+                            limit=self.concurrency, force_close=True,
+                            **options)
+                    else:
+                        connector = aiohttp.TCPConnector(
+                            limit=self.concurrency,
+                            limit_per_host=self.pool_size,
+                            keepalive_timeout=self.pool_idle_timeout,
+                            **options)
+                    sessions[cold, cached] = await stack.enter_async_context(
+                        aiohttp.ClientSession(connector=connector,
+                                              cookie_jar=jar,
+                                              trace_configs=traces))
+            while not self.should_die:
+                await limit.acquire()
+                try:
+                    endpoint = await loop.run_in_executor(
+                        feeder, self.request_queue.get, True, 3)
+                except queue.Empty:
+                    limit.release()
+                    continue
+                self.logger.debug(f"{self.name} is checking {endpoint.name}")
+                held = 0.0
+                if self.scheduler is not None:
+                    held = self.scheduler.started(endpoint)
+                task = loop.create_task(
+                    self.check(sessions, endpoint, limit, held))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                self.status = f"{self.in_flight + 1} requests in flight"
+            if tasks:
+                await asyncio.wait(tasks)
+        feeder.shutdown()
+
+    def run(self):
+        """Thread execution point.
+
+        Run the engine's event loop until `should_die` is true.
+
+        """
+        self.logger.debug("Starting a new asyncio RequestManager engine")
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.serve())
+        finally:
+            loop.close()
+        self.status = "Stopped"
@@ -0,0 +1,142 @@
+"""Check Metrics.
+
+The metrics module exports check results in the Prometheus text format.
+Every result window keeps a `CheckMetrics` of cumulative counters: a
+latency histogram, success and failure counts, and the last status code
+and check time.  Unlike the window statistics these counters only ever
+grow, as Prometheus expects.
+
+A scrape of thousands of monitors has to be cheap, so each `CheckMetrics`
+renders its own exposition lines when a result is recorded, in the worker
+thread that recorded it.  A scrape then only joins the lines of every
+monitor (see `collect` and `render`); no window lock is taken.
+
+"""
+import numpy as np
+
+
+# Upper bounds (seconds) of the check duration histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+# Per-monitor metric families: name, type and help text
+CHECK_FAMILIES = (
+    ('epmonitor_check_duration_seconds', 'histogram',
+     'Total elapsed time of checks.'),
+    ('epmonitor_checks_total', 'counter',
+     'Checks made, by result.'),
+    ('epmonitor_check_up', 'gauge',
+     'Whether the last check succeeded.'),
+    ('epmonitor_check_status_code', 'gauge',
+     'HTTP status code of the last check; 0 if no response.'),
+    ('epmonitor_check_timestamp_seconds', 'gauge',
+     'Start of the last check.'),
+)
+
+
+def escape(value):
+    """Return `value` escaped for use as a label value."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"') \
+        .replace('\n', r'\n')
+
+
+def labels(**kwargs):
+    """Return `kwargs` formatted as a label set."""
+    if not kwargs:
+        return ''
+    return '{' + ','.join(f'{k}="{escape(v)}"'
+                          for k, v in kwargs.items()) + '}'
+
+
+class CheckMetrics(object):
+    """Cumulative metrics of one monitor.
+
+    `add` is called with every result, under the lock of the result window;
+    `lines` holds the rendered exposition lines of every family in
+    `CHECK_FAMILIES`, replaced as a whole so readers never see a partial
+    update.
+
+    """
+
+    def __init__(self, slug):
+        self.slug = slug
+        self.buckets = np.zeros(len(LATENCY_BUCKETS) + 1, dtype=np.int64)
+        self.elapsed_sum = 0.0  # seconds
+        self.successes = 0
+        self.failures = 0
+        self.lines = None
+
+    def add(self, result):
+        """Count `result` and render the exposition lines."""
+        seconds = result.elapsed / 1000
+        self.buckets[np.searchsorted(LATENCY_BUCKETS, seconds)] += 1
+        self.elapsed_sum += seconds
+        if result.status:
+            self.successes += 1
+        else:
+            self.failures += 1
+        self.lines = self.render(result)
+
+    def render(self, result):
+        """Return the exposition lines of every family, after `result`."""
+        monitor = escape(self.slug)
+        counts = np.cumsum(self.buckets).tolist()
+        name = CHECK_FAMILIES[0][0]
+        histogram = ''.join(
+            f'{name}_bucket{{monitor="{monitor}",le="{le}"}} {count}\n'
+            for le, count in zip(LATENCY_BUCKETS + ('+Inf',), counts))
+        histogram += (f'{name}_sum{{monitor="{monitor}"}} '
+                      f'{self.elapsed_sum!r}\n'
+                      f'{name}_count{{monitor="{monitor}"}} {counts[-1]}\n')
+        name = CHECK_FAMILIES[1][0]
+        checks = (f'{name}{{monitor="{monitor}",result="success"}} '
+                  f'{self.successes}\n'
+                  f'{name}{{monitor="{monitor}",result="failure"}} '
+                  f'{self.failures}\n')
+        return (
+            histogram,
+            checks,
+            f'{CHECK_FAMILIES[2][0]}{{monitor="{monitor}"}} '
+            f'{int(bool(result.status))}\n',
+            f'{CHECK_FAMILIES[3][0]}{{monitor="{monitor}"}} '
+            f'{int(result.status_code)}\n',
+            f'{CHECK_FAMILIES[4][0]}{{monitor="{monitor}"}} '
+            f'{float(result.timestamp)!r}\n',
+        )
+
+
+def collect(metrics):
+    """Return the exposition lines of `metrics`, joined per family.
+
+    Returns a dictionary of family name to the lines of every monitor in
+    `metrics` (an iterable of `CheckMetrics`), ready for `render`.
+
+    """
+    rendered = [m.lines for m in metrics if m.lines is not None]
+    return {family[0]: ''.join(lines[i] for lines in rendered)
+            for i, family in enumerate(CHECK_FAMILIES)}
+
+
+def render(families, gauges=()):
+    """Return the Prometheus text exposition of the metrics.
+
+    Args:
+        families(dict): family name to exposition lines (see `collect`)
+        gauges(list): ``(name, help, value)`` or ``(name, help, value,
+            labels)`` of every other gauge to export; gauges sharing a
+            name must be adjacent
+
+    """
+    out = []
+    for name, kind, text in CHECK_FAMILIES:
+        out.append(f'# HELP {name} {text}\n# TYPE {name} {kind}\n')
+        out.append(families.get(name, ''))
+    seen = set()
+    for gauge in gauges:
+        name, text, value = gauge[:3]
+        if name not in seen:
+            seen.add(name)
+            out.append(f'# HELP {name} {text}\n# TYPE {name} gauge\n')
+        label_set = labels(**gauge[3]) if len(gauge) > 3 else ''
+        out.append(f'{name}{label_set} {float(value)!r}\n')
+    return ''.join(out)
@@ -0,0 +1,100 @@
+"""Per-Host Rate Limits.
+
+Many monitors may check the same server.  A `HostLimiter` keeps a token
+bucket per ``(server, port)`` so checks against one target never exceed a
+configured rate, however many monitors point at it and whichever engine
+runs them.  Concurrency per target is limited by the scheduler (see
+`checks.scheduler`); this module only limits the rate.
+
+The scheduler reserves a token for every due check and holds the check
+for the returned delay before dispatching it (see `Scheduler`), so no
+worker sleeps on a busy target; the wait is recorded in the result apart
+from the request's own timings.  A check that would wait more than
+`max_wait` is skipped instead, so the waits cannot grow without bound when
+a target's monitors ask for more than its rate.
+
+"""
+import threading
+import time
+
+
+class TokenBucket(object):
+    """Token bucket of `rate` tokens per second holding at most `burst`.
+
+    Tokens are reserved rather than taken: a reservation made while the
+    bucket is empty drives it negative and returns how long the caller has
+    to wait for its token, so waiting callers are served in order.  The
+    bucket never owes more than `max_wait` seconds of tokens.
+
+    """
+
+    def __init__(self, rate, burst=1, now=None, max_wait=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def reserve(self, now):
+        """Reserve a token at `now`; return the seconds until it is due.
+
+        Returns None, reserving nothing, if the wait would exceed
+        `max_wait`.
+
+        """
+        tokens = min(self.burst,
+                     self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = (1 - tokens) / self.rate if tokens < 1 else 0.0
+        if self.max_wait is not None and wait > self.max_wait:
+            self.tokens = tokens
+            return None
+        self.tokens = tokens - 1
+        return wait
+
+
+class HostLimiter(object):
+    """Token buckets of every ``(server, port)`` checked.
+
+    With no `rate` nothing is limited.
+
+    """
+
+    def __init__(self, rate=0, burst=1, max_wait=60):
+        """Initialize the limiter.
+
+        Args:
+            rate(float): checks per second allowed per server and port
+            burst(int): checks allowed back to back before the rate applies
+            max_wait(float): longest seconds a check may wait for its token
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.buckets = {}   # (server, port) -> `TokenBucket`
+
+    def reserve(self, endpoint):
+        """Reserve a check of `endpoint`; return the seconds to wait.
+
+        Returns None if the check would wait more than `max_wait` and
+        should be skipped.
+
+        """
+        if not self.rate:
+            return 0.0
+        key = (endpoint.server, endpoint.port)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = \
+                    TokenBucket(self.rate, max(self.burst, 1), now,
+                                self.max_wait)
+            return bucket.reserve(now)
+
+    def clear(self):
+        """Forget every bucket, e.g. after the rate changed."""
+        with self.lock:
+            self.buckets = {}
@@ -0,0 +1,327 @@
+"""Remote Request Manager.
+
+The remote module lets a single check runner process own the
+`RequestsManager` while any number of web workers read its results.  The
+runner serves the manager with a `RunnerServer`; web workers talk to it
+through a `RemoteRequestsManager`, which offers the parts of the
+`RequestsManager` interface the web application uses.  When checks are
+sharded across several runners (see `checks.shard`), the remote manager
+talks to all of them and merges what they return.
+
+Calls travel over a `multiprocessing.connection` socket, authenticated with a
+shared key.  Calls are pickled, so whoever holds the key can run code on the
+runner: the key must be set explicitly (``CHECK_RUNNER_AUTHKEY``) and there
+is no default.  An address is either ``host:port`` or the path of a unix
+socket; several addresses are separated by commas.
+
+"""
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Listener, AuthenticationError
+from checks.resolver import merge_stats
+from checks.scheduler import merge_timing
+
+
+# Manager attributes and methods a runner serves
+RUNNER_METHODS = (
+    'window',
+    'latest',
+    'results_of',
+    'summary',
+    'summaries',
+    'metrics',
+    'state',
+    'timings',
+    'load',
+    'versions',
+    'sync',
+    'start',
+    'stop',
+)
+
+
+class RunnerError(Exception):
+    """The check runner could not be reached or the call failed."""
+
+
+def check_authkey(authkey):
+    """Raise `RunnerError` unless a key to authenticate with is set."""
+    if not authkey:
+        raise RunnerError("Check runners need CHECK_RUNNER_AUTHKEY set")
+
+
+def parse_address(address):
+    """Return the `multiprocessing.connection` address of `address`."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class RunnerServer(threading.Thread):
+    """Serve a `RequestsManager` to remote web workers.
+
+    Every connection is served by its own thread, so a slow web worker does
+    not hold up the others.  Only the names in `RUNNER_METHODS` can be
+    called; attributes are returned as is and methods are called with the
+    arguments sent.
+
+    """
+
+    def __init__(self, manager, address, authkey, logger=None):
+        """Initialize the server.
+
+        Args:
+            manager(`RequestsManager`): the manager to serve
+            address(str): ``host:port`` or unix socket path to listen on
+            authkey(bytes): key clients must authenticate with
+
+        """
+        check_authkey(authkey)
+        super(RunnerServer, self).__init__(name="RunnerServer")
+        self.daemon = True
+        self.manager = manager
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.logger = logger or logging.getLogger(__name__)
+        self.listener = None
+        self.should_die = False  # flag to terminate thread
+
+    def call(self, name, args, kwargs):
+        """Return the result of calling `name` on the manager."""
+        if name not in RUNNER_METHODS:
+            raise RunnerError(f"{name} is not served by the runner")
+        attribute = getattr(self.manager, name)
+        if callable(attribute):
+            return attribute(*args, **kwargs)
+        return attribute
+
+    def serve(self, conn):
+        """Answer calls on `conn` until the client disconnects."""
+        with conn:
+            while not self.should_die:
+                try:
+                    name, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self.call(name, args, kwargs))
+                except Exception as ex:
+                    self.logger.exception(f"Runner call {name} failed")
+                    reply = ('error', f"{type(ex).__name__}: {ex}")
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def stop(self):
+        """Stop accepting connections."""
+        self.should_die = True
+        if self.listener is not None:
+            self.listener.close()
+
+    def run(self):
+        """Thread execution point.
+
+        Accept connections until `should_die` is true.
+
+        """
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.logger.info(f"Check runner listening on {self.address}")
+        while not self.should_die:
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError:
+                self.logger.warning("Rejected an unauthenticated connection")
+                continue
+            except OSError:
+                if self.should_die:
+                    return
+                raise
+            threading.Thread(target=self.serve, args=(conn,),
+                             name="RunnerConnection", daemon=True).start()
+
+
+class RunnerConnection(object):
+    """Connection to one check runner.
+
+    Each process keeps its own connection, opened on first use and reopened
+    after a failure or a fork.
+
+    """
+
+    def __init__(self, address, authkey, timeout=5):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        """Return this process' connection to the runner."""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = Client(self.address, authkey=self.authkey)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _disconnect(self):
+        """Drop the current connection."""
+        if self._conn is not None and self._pid == os.getpid():
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+        self._conn = None
+
+    def call(self, name, *args, **kwargs):
+        """Call `name` on the runner's manager and return the result."""
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    conn = self._connect()
+                    conn.send((name, args, kwargs))
+                    if not conn.poll(self.timeout):
+                        raise TimeoutError(
+                            f"no reply within {self.timeout} seconds")
+                    status, value = conn.recv()
+                    break
+                except (EOFError, OSError, AuthenticationError) as ex:
+                    self._disconnect()
+                    if attempt or isinstance(ex, TimeoutError):
+                        raise RunnerError(
+                            f"Check runner at {self.address} is "
+                            f"unavailable: {ex}") from ex
+        if status == 'error':
+            raise RunnerError(value)
+        return value
+
+
+class RemoteRequestsManager(object):
+    """`RequestsManager` interface to check runners in other processes.
+
+    Reads are merged across every runner and skip runners that are
+    unreachable, so pages still render; control calls go to every runner
+    and raise `RunnerError` if any of them fails.
+
+    """
+
+    def __init__(self, address, authkey, timeout=5, logger=None):
+        """Initialize the remote manager.
+
+        Args:
+            address(str): comma separated ``host:port`` or unix socket
+                paths of the runners
+            authkey(bytes): key to authenticate with
+            timeout(float): seconds to wait for a reply
+
+        """
+        check_authkey(authkey)
+        self.runners = [RunnerConnection(a.strip(), authkey, timeout)
+                        for a in address.split(',') if a.strip()]
+        self.logger = logger or logging.getLogger(__name__)
+
+    def call(self, name, *args, **kwargs):
+        """Call `name` on every runner and return their results."""
+        return [runner.call(name, *args, **kwargs) for runner in self.runners]
+
+    def _read(self, name, *args):
+        """Call `name` on every reachable runner and return their results."""
+        results = []
+        for runner in self.runners:
+            try:
+                results.append(runner.call(name, *args))
+            except RunnerError as ex:
+                self.logger.warning(str(ex))
+        return results
+
+    def _merge(self, name):
+        """Return the dictionaries `name` returns merged into one."""
+        merged = {}
+        for result in self._read(name):
+            merged.update(result)
+        return merged
+
+    @property
+    def window(self):
+        """Return a copy of the runners' result windows."""
+        return self._merge('window')
+
+    @property
+    def latest(self):
+        """Return the most recent result of every endpoint."""
+        return self._merge('latest')
+
+    def results_of(self, slug):
+        """Return a copy of the result window of `slug`."""
+        for result in self._read('results_of', slug):
+            if result:
+                return result
+        return []
+
+    def summary(self, slug):
+        """Return the statistics of the result window of `slug`."""
+        for result in self._read('summary', slug):
+            if result is not None:
+                return result
+        return None
+
+    @property
+    def summaries(self):
+        """Return the statistics of every result window."""
+        return self._merge('summaries')
+
+    def metrics(self):
+        """Return the exposition lines of every runner, joined per family."""
+        merged = {}
+        for result in self._read('metrics'):
+            for family, lines in result.items():
+                merged[family] = merged.get(family, '') + lines
+        return merged
+
+    @property
+    def state(self):
+        """Return a combined snapshot of the runners' request pools."""
+        states = self._read('state')
+        return {
+            'engine': states[0]['engine'] if states else None,
+            'node': ', '.join(s['node'] for s in states if s.get('node')),
+            'thread_count': sum(s['thread_count'] for s in states),
+            'queue_size': sum(s['queue_size'] for s in states),
+            'endpoint_count': sum(s['endpoint_count'] for s in states),
+            'result_bytes': sum(s['result_bytes'] for s in states),
+            'schedule': merge_timing([s['schedule'] for s in states]),
+            'dns': merge_stats([s['dns'] for s in states]),
+            'threads': [t for s in states for t in s['threads']],
+        }
+
+    def timings(self, worst=None):
+        """Return the runners' schedule timing counters, longest lag first."""
+        timings = [t for result in self._read('timings', worst)
+                   for t in result]
+        timings.sort(key=lambda t: t['lag'], reverse=True)
+        return timings[:worst] if worst is not None else timings
+
+    def load(self, endpoints):
+        """Replace the runners' schedules with `endpoints`."""
+        return max(self.call('load', list(endpoints)), default=0)
+
+    @property
+    def versions(self):
+        """Return the `updated` version of every assigned endpoint."""
+        return self._merge('versions')
+
+    def sync(self, endpoints, removed=(), start=True):
+        """Apply changed `endpoints` and `removed` slugs on every runner."""
+        results = self.call('sync', list(endpoints), list(removed), start)
+        return results[0] if results else \
+            {'added': 0, 'updated': 0, 'removed': 0}
+
+    def start(self):
+        """Start the runners' request pools."""
+        self.call('start')
+
+    def stop(self, join=False):
+        """Stop the runners' request pools."""
+        self.call('stop', join=join)
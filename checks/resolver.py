@@ -0,0 +1,193 @@
+"""DNS Resolution Cache.
+
+Thousands of monitors usually share a few hundred host names, and asking
+the system resolver for every check adds latency to the check and load on
+the resolver.  A `DNSCache` keeps the address info of every name for its
+time to live, shared by every worker of the request manager, and also
+remembers names that failed to resolve (negative caching) for a shorter
+time.
+
+The system resolver (``getaddrinfo``) does not report record TTLs, so
+every answer is kept for the same fixed `ttl`, whatever the TTL of its
+records: keep `ttl` below the shortest TTL of the monitored names that
+matters (a failover record, say).  Endpoints with `dns_cache` unset always
+go to the resolver.
+
+"""
+import asyncio
+import socket
+import threading
+import time
+import aiohttp
+
+
+def is_address(host):
+    """Return True if `host` is an IP address rather than a name."""
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (OSError, ValueError):
+            pass
+    return False
+
+
+class DNSCache(object):
+    """Cache of address info by host, port, family and socket type.
+
+    `getaddrinfo` has the signature and exceptions of
+    `socket.getaddrinfo`.  IP addresses are passed through uncached.
+
+    """
+
+    def __init__(self, ttl=60, negative_ttl=10, max_entries=10000,
+                 resolver=None, enabled=True):
+        """Initialize the cache.
+
+        Args:
+            ttl(float): seconds an answer is kept
+            negative_ttl(float): seconds a failure to resolve is kept
+            max_entries(int): entries kept before expired ones are dropped
+            resolver(callable): resolves like `socket.getaddrinfo`, which
+                it is by default
+            enabled(bool): when unset every lookup goes to the resolver
+
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.resolver = resolver or socket.getaddrinfo
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self._entries = {}   # key -> (expires, address info or exception)
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0   # hits of a cached failure
+        self.failures = 0        # lookups the resolver failed
+
+    def caches(self, host):
+        """Return True if lookups of `host` go through the cache."""
+        return self.enabled and not is_address(host)
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Return the address info of `host`, cached or resolved."""
+        if not self.caches(host):
+            return socket.getaddrinfo(host, port, family, type, proto, flags)
+        info = self.cached(host, port, family, type)
+        if info is None:
+            info = self.resolve(host, port, family, type)
+        return info
+
+    def cached(self, host, port, family=0, type=0):
+        """Return the cached address info of `host`, or None on a miss.
+
+        Raises the cached exception if `host` recently failed to resolve.
+
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self._entries.get((host, port, family, type))
+            if entry is None or entry[0] <= now:
+                return None
+            if isinstance(entry[1], Exception):
+                self.negative_hits += 1
+                raise entry[1]
+            self.hits += 1
+            return entry[1]
+
+    def resolve(self, host, port, family=0, type=0):
+        """Resolve `host` and cache the answer, or the failure."""
+        key = (host, port, family, type)
+        now = time.monotonic()
+        with self.lock:
+            self.misses += 1
+        try:
+            info = self.resolver(host, port, family, type)
+        except (socket.gaierror, UnicodeError) as ex:
+            with self.lock:
+                self.failures += 1
+                self._store(key, now + self.negative_ttl, ex)
+            raise
+        with self.lock:
+            self._store(key, now + self.ttl, info)
+        return info
+
+    def _store(self, key, expires, value):
+        """Cache `value` until `expires`; caller holds `lock`."""
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            self._entries = {k: e for k, e in self._entries.items()
+                             if e[0] > now}
+        self._entries[key] = (expires, value)
+
+    def clear(self):
+        """Forget every cached answer."""
+        with self.lock:
+            self._entries = {}
+
+    @property
+    def stats(self):
+        """Return the `entries` cached and the lookup counters."""
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'failures': self.failures,
+            }
+
+
+def merge_stats(stats):
+    """Return the `DNSCache.stats` of several caches as one.
+
+    Counters are added; the caches are `enabled` if any of them is.
+
+    """
+    merged = {'enabled': False, 'entries': 0, 'hits': 0, 'misses': 0,
+              'negative_hits': 0, 'failures': 0}
+    for cache in stats:
+        for key, value in cache.items():
+            if key == 'enabled':
+                merged[key] = merged[key] or value
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+class CachedResolver(aiohttp.abc.AbstractResolver):
+    """aiohttp resolver answering from a `DNSCache`.
+
+    Hits are answered on the event loop; misses are resolved in the loop's
+    default executor, so the loop never blocks on the system resolver.
+
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        infos = None
+        if self.cache.caches(host):
+            infos = self.cache.cached(host, port, family, socket.SOCK_STREAM)
+        if infos is None:
+            infos = await asyncio.get_running_loop().run_in_executor(
+                None, self.cache.getaddrinfo, host, port, family,
+                socket.SOCK_STREAM)
+        hosts = []
+        for family, _, proto, _, address in infos:
+            if family == socket.AF_INET6 and (len(address) < 3 or address[3]):
+                continue  # no IPv6 support, or a scoped link-local address
+            hosts.append({
+                'hostname': host,
+                'host': address[0],
+                'port': address[1],
+                'family': family,
+                'proto': proto,
+                'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+            })
+        return hosts
+
+    async def close(self):
+        pass
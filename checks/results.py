@@ -0,0 +1,449 @@
+"""Result Windows.
+
+The results module keeps the most recent results of every endpoint in
+memory.  Each endpoint has its own `ResultWindow` with its own lock, so
+workers recording results for different endpoints never wait on each
+other, and a reader only ever touches the windows it asks for.
+
+Windows are columnar: results are stored in a ring buffer of one NumPy
+structured array, about 80 bytes per result, with failure messages interned
+across the store.  Readers get a `WindowSnapshot` whose columns are plain
+arrays, and whose rows are rebuilt as `RequestDimension`s on demand.
+
+Every endpoint may ask for its own window size (see
+`Endpoint.window_length`).  The store can be given a memory budget; when the
+windows asked for would not fit, every window is shrunk by the same factor,
+dropping its oldest results.  Every window keeps at least its latest
+result.
+
+"""
+import collections
+import collections.abc
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from checks.metrics import CheckMetrics, collect
+from checks.sketch import WindowStats
+
+
+RequestDimension = collections.namedtuple('RequestDimension', [
+    'date',           # datetime.datetime
+    'timestamp',      # timestamp()
+    'status',         # Boolean (did the request fail or not)
+    'status_code',    # HTTP status code
+    'TTFB',           # Time from request sent to response headers (ms)
+    'elapsed',        # Total elapsed time (ms)
+    'size',           # Bytes of the response body read (capped)
+    'digest',         # SHA-256 of the response body read
+    'sample',         # First bytes of the response body, if sampled
+    'message',        # Any passed message (usually failure reason)
+    'dns',            # DNS resolution time (ms)
+    'connect',        # TCP connect time (ms)
+    'tls',            # TLS handshake time (ms)
+    'transfer',       # Time reading the response body (ms)
+    'throttle',       # Time held by the per-host limits before sending (ms)
+])
+
+# Columns of a result window; messages and samples are kept alongside
+RESULT_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('status', '?'),
+    ('status_code', 'i2'),
+    ('TTFB', 'f4'),
+    ('elapsed', 'f8'),
+    ('size', 'u4'),
+    ('digest', 'V32'),    # raw bytes; 'S' would strip trailing NULs
+    ('dns', 'f4'),
+    ('connect', 'f4'),
+    ('tls', 'f4'),
+    ('transfer', 'f4'),
+    ('throttle', 'f4'),
+])
+# Bytes a window holds per result: its row and a message reference
+SLOT_BYTES = RESULT_DTYPE.itemsize + 8
+# Stored digest of a result without a hashed body
+NO_DIGEST = bytes(32)
+
+
+def digest_hex(digest):
+    """Return a stored `digest` as hex, or None if no body was hashed."""
+    digest = bytes(digest)
+    return digest.hex() if digest != NO_DIGEST else None
+
+
+class MessageTable(object):
+    """Interned result messages.
+
+    Results of a failing endpoint repeat the same few messages; each
+    distinct message is kept once.  At most `limit` messages are interned,
+    beyond which messages are stored as they come.
+
+    """
+
+    def __init__(self, limit=4096):
+        self.limit = limit
+        self._messages = {}
+
+    def intern(self, message):
+        """Return the shared copy of `message`."""
+        if message is None:
+            return None
+        shared = self._messages.get(message)
+        if shared is None:
+            if len(self._messages) >= self.limit:
+                return message
+            shared = self._messages.setdefault(message, message)
+        return shared
+
+
+class WindowSnapshot(collections.abc.Sequence):
+    """Immutable, oldest-first copy of a result window.
+
+    Columns are read as arrays (``snapshot.elapsed``); indexing or iterating
+    yields `RequestDimension` rows.
+
+    """
+
+    def __init__(self, data, messages, samples=None):
+        data.flags.writeable = False
+        self.data = data
+        self.messages = messages
+        self.samples = samples
+        self._rows = None
+
+    def __getattr__(self, name):
+        if name in RESULT_DTYPE.names:
+            return self.data[name]
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        return {'data': self.data, 'messages': self.messages,
+                'samples': self.samples}
+
+    def __setstate__(self, state):
+        self.__init__(state['data'].copy(), state['messages'],
+                      state['samples'])
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    @property
+    def rows(self):
+        """Return every result as a `RequestDimension`."""
+        if self._rows is None:
+            self._rows = [self.row(i) for i in range(len(self.data))]
+        return self._rows
+
+    def row(self, i):
+        """Return result `i` as a `RequestDimension`."""
+        r = self.data[i]
+        timestamp = float(r['timestamp'])
+        return RequestDimension(
+            date=datetime.fromtimestamp(timestamp, timezone.utc),
+            timestamp=timestamp,
+            status=bool(r['status']),
+            status_code=int(r['status_code']),
+            TTFB=float(r['TTFB']),
+            elapsed=float(r['elapsed']),
+            size=int(r['size']),
+            digest=digest_hex(r['digest']),
+            sample=self.samples[i] if self.samples is not None else None,
+            message=self.messages[i],
+            dns=float(r['dns']),
+            connect=float(r['connect']),
+            tls=float(r['tls']),
+            transfer=float(r['transfer']),
+            throttle=float(r['throttle']),
+        )
+
+
+class ResultWindow(object):
+    """Moving window of the last `size` results of one endpoint.
+
+    The window statistics (see `WindowStats`) and the cumulative
+    `CheckMetrics` are updated with every result.  `snapshot` returns an
+    immutable copy that is cached until the next result arrives, so any
+    number of readers share one copy.
+
+    """
+
+    def __init__(self, size=20, messages=None, slug=None):
+        self.size = size
+        self.lock = threading.Lock()
+        self.data = np.zeros(size, dtype=RESULT_DTYPE)
+        self.messages = [None] * size
+        self.samples = None   # allocated once a sample is recorded
+        self.count = 0        # results recorded, ever
+        self.stats = WindowStats()
+        self.metrics = CheckMetrics(slug)
+        self._intern = (messages or MessageTable()).intern
+        self._snapshot = None
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, result):
+        """Add `result`, evicting the oldest result when the window is full."""
+        with self.lock:
+            i = self.count % self.size
+            if self.count >= self.size:
+                oldest = self.data[i]
+                self.stats.remove(float(oldest['elapsed']),
+                                  bool(oldest['status']))
+            self.data[i] = (
+                result.timestamp,
+                result.status,
+                result.status_code,
+                result.TTFB,
+                result.elapsed,
+                result.size,
+                bytes.fromhex(result.digest) if result.digest else NO_DIGEST,
+                result.dns,
+                result.connect,
+                result.tls,
+                result.transfer,
+                result.throttle,
+            )
+            self.messages[i] = self._intern(result.message)
+            if result.sample is not None and self.samples is None:
+                self.samples = [None] * self.size
+            if self.samples is not None:
+                self.samples[i] = result.sample
+            self.count += 1
+            self.stats.add(float(self.data[i]['elapsed']), result.status)
+            self.metrics.add(result)
+            self._snapshot = None
+
+    @property
+    def nbytes(self):
+        """Return the bytes allocated for the window's results."""
+        nbytes = self.size * SLOT_BYTES
+        if self.samples is not None:
+            nbytes += 8 * self.size + sum(len(s) for s in self.samples if s)
+        return nbytes
+
+    def resize(self, size):
+        """Keep at most `size` results, dropping the oldest."""
+        with self.lock:
+            if size == self.size:
+                return
+            order = self._order()[-size:]
+            kept = len(order)
+            data = np.zeros(size, dtype=RESULT_DTYPE)
+            data[:kept] = self.data[order]
+            self.messages = [self.messages[i] for i in order] + \
+                [None] * (size - kept)
+            if self.samples is not None:
+                self.samples = [self.samples[i] for i in order] + \
+                    [None] * (size - kept)
+            self.stats = WindowStats()
+            for elapsed, status in zip(data['elapsed'][:kept].tolist(),
+                                       data['status'][:kept].tolist()):
+                self.stats.add(elapsed, status)
+            self.data = data
+            self.size = size
+            self.count = kept
+            self._snapshot = None
+
+    def _order(self):
+        """Return the ring positions oldest first; caller holds `lock`."""
+        if self.count <= self.size:
+            return list(range(self.count))
+        start = self.count % self.size
+        return list(range(start, self.size)) + list(range(start))
+
+    def snapshot(self):
+        """Return the results as a `WindowSnapshot`."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self.lock:
+                if self._snapshot is None:
+                    order = self._order()
+                    samples = [self.samples[i] for i in order] \
+                        if self.samples is not None else None
+                    self._snapshot = WindowSnapshot(
+                        self.data[order], [self.messages[i] for i in order],
+                        samples)
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def latest(self):
+        """Return the most recent result, or None."""
+        with self.lock:
+            if not self.count:
+                return None
+            i = (self.count - 1) % self.size
+            samples = [self.samples[i]] if self.samples is not None else None
+            return WindowSnapshot(self.data[[i]], [self.messages[i]],
+                                  samples).row(0)
+
+    def summary(self):
+        """Return the window statistics as a dictionary."""
+        with self.lock:
+            return self.stats.summary()
+
+
+class ResultStore(object):
+    """Result windows of every endpoint, keyed by slug.
+
+    The store lock is only taken to add, resize or drop a window; recording
+    and reading results lock just the window concerned.
+
+    Windows are created by `resize` and hold `window_size` results unless
+    it asks for another size.  With a `memory_budget` (bytes), the sizes
+    asked for are scaled down together whenever they would not fit; the
+    scale is only changed in steps, so adding windows does not resize every
+    other window each time.
+
+    """
+
+    # Headroom left when the windows are shrunk to fit the budget
+    HEADROOM = 0.9
+
+    def __init__(self, window_size=20, memory_budget=None):
+        self.window_size = window_size
+        self.memory_budget = memory_budget
+        self.lock = threading.Lock()
+        self.messages = MessageTable()
+        self.scale = 1.0      # share of the asked for sizes windows hold
+        self._windows = {}
+        self._sizes = {}      # slug -> size asked for, when not window_size
+        self._requested = 0   # results asked for by every window
+
+    def _size_of(self, slug):
+        """Return the size `slug` asked for; caller holds `lock`."""
+        return self._sizes.get(slug, self.window_size)
+
+    def _scaled(self, size):
+        """Return `size` scaled to the budget."""
+        return max(1, int(size * self.scale))
+
+    def _fit(self):
+        """Rescale every window if the budget calls for it.
+
+        Windows shrink when the asked for sizes outgrow the budget and grow
+        back once the budget has room for them again.  Caller holds `lock`.
+
+        """
+        target = 1.0
+        if self.memory_budget and self._requested:
+            target = min(1.0, self.memory_budget /
+                         (self._requested * SLOT_BYTES))
+        shrink = target < self.scale
+        grow = self.scale < 1 and \
+            (target == 1 or target * self.HEADROOM ** 2 > self.scale)
+        if not (shrink or grow):
+            return
+        self.scale = 1.0 if target == 1 else target * self.HEADROOM
+        for slug, window in self._windows.items():
+            window.resize(self._scaled(self._size_of(slug)))
+
+    @property
+    def nbytes(self):
+        """Return the bytes allocated for every window's results."""
+        return sum(w.nbytes for w in list(self._windows.values()))
+
+    def resize(self, slug, size=None):
+        """Keep `size` results of `slug` (`window_size` if None).
+
+        Creates the window of `slug` if needed; shrinking drops its oldest
+        results.
+
+        """
+        with self.lock:
+            if slug in self._windows:
+                self._requested -= self._size_of(slug)
+            if size is None or size == self.window_size:
+                self._sizes.pop(slug, None)
+            else:
+                self._sizes[slug] = size
+            self._requested += self._size_of(slug)
+            window = self._windows.get(slug)
+            if window is None:
+                window = ResultWindow(self._scaled(self._size_of(slug)),
+                                      self.messages, slug)
+                self._windows[slug] = window
+            else:
+                window.resize(self._scaled(self._size_of(slug)))
+            self._fit()
+        return window
+
+    def __contains__(self, slug):
+        return slug in self._windows
+
+    def __len__(self):
+        return len(self._windows)
+
+    def append(self, slug, result):
+        """Record `result` in the window of `slug`.
+
+        Only `resize` creates windows: the result of a check that was in
+        flight when its window was dropped (see `discard`) is ignored.
+
+        """
+        window = self._windows.get(slug)
+        if window is not None:
+            window.append(result)
+
+    def discard(self, slug):
+        """Drop the window of `slug`."""
+        with self.lock:
+            if self._windows.pop(slug, None) is not None:
+                self._requested -= self._size_of(slug)
+            self._sizes.pop(slug, None)
+            self._fit()
+
+    def retain(self, slugs):
+        """Drop the windows of every slug not in `slugs`."""
+        slugs = set(slugs)
+        with self.lock:
+            for slug in set(self._windows) - slugs:
+                del self._windows[slug]
+                self._requested -= self._size_of(slug)
+                self._sizes.pop(slug, None)
+            self._fit()
+
+    def clear(self):
+        """Drop every window."""
+        with self.lock:
+            self._windows = {}
+            self._sizes = {}
+            self._requested = 0
+            self.scale = 1.0
+
+    def results_of(self, slug):
+        """Return the results of `slug`, oldest first."""
+        window = self._windows.get(slug)
+        return window.snapshot() if window is not None else ()
+
+    def summary(self, slug):
+        """Return the statistics of `slug`, or None without results."""
+        window = self._windows.get(slug)
+        return window.summary() if window is not None else None
+
+    def snapshot(self):
+        """Return the results of every endpoint, keyed by slug."""
+        return {slug: window.snapshot()
+                for slug, window in list(self._windows.items())}
+
+    def latest(self):
+        """Return the most recent result of every endpoint, keyed by slug."""
+        latest = {}
+        for slug, window in list(self._windows.items()):
+            result = window.latest
+            if result is not None:
+                latest[slug] = result
+        return latest
+
+    def summaries(self):
+        """Return the statistics of every endpoint, keyed by slug."""
+        return {slug: window.summary()
+                for slug, window in list(self._windows.items())}
+
+    def metrics(self):
+        """Return the exposition lines of every window, joined per family."""
+        return collect(w.metrics for w in list(self._windows.values()))
@@ -0,0 +1,290 @@
+"""Result Rollups.
+
+The rollup module downsamples check results into fixed time buckets per
+monitor: one row per minute, hour and day.  Each bucket keeps the count,
+failures, minimum, maximum, sum and sum of squares of the elapsed time and a
+`LatencySketch` for percentiles, so buckets can be merged into coarser ones
+without going back to the raw results.
+
+Rollups are maintained incrementally by the `ResultWriter` as results are
+written, and old raw results and rollups are pruned per tier.
+
+"""
+import logging
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from checks.sketch import LatencySketch
+
+
+# Bucket widths in seconds; tier 0 is the raw results table
+TIERS = (60, 3600, 86400)
+
+# Default retention per tier in seconds
+RETENTION = {
+    0: 2 * 86400,
+    60: 14 * 86400,
+    3600: 90 * 86400,
+    86400: 730 * 86400,
+}
+
+
+def bucket_start(date, tier):
+    """Return the start of the `tier` bucket containing `date`."""
+    ts = date.timestamp()
+    return datetime.fromtimestamp(ts - ts % tier, timezone.utc)
+
+
+def select_tier(span, frequency=10, max_points=2000, tiers=TIERS,
+                retention=RETENTION):
+    """Return the coarsest-needed tier for a time range.
+
+    Raw results (tier 0) are used while a monitor checked every `frequency`
+    seconds produces at most `max_points` results over `span` seconds;
+    otherwise the finest rollup tier that fits in `max_points` buckets and
+    still retains `span` seconds of history.
+
+    """
+    if span / max(frequency, 1) <= max_points and span <= retention.get(0, 0):
+        return 0
+    for tier in tiers:
+        if span / tier <= max_points and span <= retention.get(tier, span):
+            return tier
+    return tiers[-1]
+
+
+class Rollup(object):
+    """Aggregate of the results of one monitor in one bucket."""
+    __slots__ = ('slug', 'tier', 'bucket', 'count', 'failures', 'minimum',
+                 'maximum', 'total', 'total_sq', 'sketch', 'loaded', 'dirty')
+    # columns replaced when the bucket is stored again
+    STORED = ('count', 'failures', 'minimum', 'maximum', 'total', 'total_sq',
+              'p50', 'p95', 'p99', 'sketch')
+
+    def __init__(self, slug, tier, bucket, accuracy=0.01):
+        self.slug = slug
+        self.tier = tier
+        self.bucket = bucket
+        self.count = 0
+        self.failures = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.sketch = LatencySketch(accuracy)
+        self.loaded = False    # stored row merged in
+        self.dirty = False     # changed since last stored
+
+    def add(self, elapsed, status):
+        """Count one result."""
+        self.count += 1
+        if not status:
+            self.failures += 1
+        self.minimum = elapsed if self.minimum is None \
+            else min(self.minimum, elapsed)
+        self.maximum = elapsed if self.maximum is None \
+            else max(self.maximum, elapsed)
+        self.total += elapsed
+        self.total_sq += elapsed * elapsed
+        self.sketch.add(elapsed)
+        self.dirty = True
+
+    @property
+    def key(self):
+        """Return the ``(slug, tier, bucket)`` the rollup is stored under."""
+        return (self.slug, self.tier, self.bucket)
+
+    def copy(self):
+        """Return a copy of the rollup."""
+        rollup = Rollup.__new__(Rollup)
+        for name in self.__slots__:
+            setattr(rollup, name, getattr(self, name))
+        rollup.sketch = LatencySketch.from_dict(self.sketch.to_dict())
+        return rollup
+
+    def merge_row(self, row):
+        """Merge a stored rollup row into this rollup."""
+        self.count += row.count
+        self.failures += row.failures
+        for name, pick in (('minimum', min), ('maximum', max)):
+            stored = getattr(row, name)
+            if stored is not None:
+                current = getattr(self, name)
+                setattr(self, name,
+                        stored if current is None else pick(current, stored))
+        self.total += row.total
+        self.total_sq += row.total_sq
+        self.sketch.merge(LatencySketch.from_dict(row.sketch))
+
+    def values(self):
+        """Return the rollup as a table row."""
+        return {
+            'slug': self.slug,
+            'tier': self.tier,
+            'bucket': self.bucket,
+            'count': self.count,
+            'failures': self.failures,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'total': self.total,
+            'total_sq': self.total_sq,
+            'p50': self.sketch.percentile(50),
+            'p95': self.sketch.percentile(95),
+            'p99': self.sketch.percentile(99),
+            'sketch': self.sketch.to_dict(),
+        }
+
+
+class RollupAccumulator(object):
+    """Incrementally maintained rollups of every tier.
+
+    Results are added as they are written.  `flush` stores every changed
+    bucket; a bucket is stored once more after it closes and is then
+    forgotten.  A bucket seen for the first time is merged with any row
+    already stored for it, so a restart does not lose earlier counts.
+
+    A flush reads the stored rows of new buckets in batches and writes
+    every changed bucket with one upsert on ``uq_check_rollups_bucket``.
+    Buckets are only marked stored once the transaction commits; after a
+    failed flush the next one writes the same buckets again.
+
+    """
+
+    def __init__(self, tiers=TIERS, retention=None, accuracy=0.01,
+                 logger=None):
+        self.tiers = tiers
+        self.retention = dict(RETENTION)
+        self.retention.update(retention or {})
+        self.accuracy = accuracy
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def add(self, rows):
+        """Add result rows (as written by the `ResultWriter`)."""
+        with self.lock:
+            for row in rows:
+                for tier in self.tiers:
+                    bucket = bucket_start(row['date'], tier)
+                    key = (row['slug'], tier, bucket)
+                    rollup = self.buckets.get(key)
+                    if rollup is None:
+                        rollup = Rollup(row['slug'], tier, bucket,
+                                        self.accuracy)
+                        self.buckets[key] = rollup
+                    rollup.add(row['elapsed'], row['status'])
+
+    def flush(self, engine, table, now=None, batch_size=500):
+        """Store every changed bucket and forget closed ones."""
+        now = now or datetime.now(timezone.utc)
+        with self.lock:
+            dirty = [r for r in self.buckets.values() if r.dirty]
+            closed = [k for k, r in self.buckets.items()
+                      if r.bucket + timedelta(seconds=r.tier) < now]
+            if dirty:
+                with engine.begin() as conn:
+                    stored = self._load(
+                        conn, table, [r for r in dirty if not r.loaded],
+                        batch_size)
+                    merged = [stored.get(r.key, r) for r in dirty]
+                    self._upsert(conn, table, merged, batch_size)
+                for rollup in merged:
+                    rollup.loaded = True
+                    rollup.dirty = False
+                    self.buckets[rollup.key] = rollup
+            for key in closed:
+                del self.buckets[key]
+        return len(dirty)
+
+    @staticmethod
+    def _load(conn, table, rollups, batch_size):
+        """Return copies of `rollups` merged with the rows already stored.
+
+        The copies are keyed by ``(slug, tier, bucket)``; rollups without a
+        stored row are left out.
+
+        """
+        merged = {}
+        columns = sa.tuple_(table.c.slug, table.c.tier, table.c.bucket)
+        for i in range(0, len(rollups), batch_size):
+            batch = {r.key: r for r in rollups[i:i + batch_size]}
+            rows = conn.execute(table.select().where(
+                columns.in_(list(batch))))
+            for row in rows:
+                bucket = row.bucket if row.bucket.tzinfo \
+                    else row.bucket.replace(tzinfo=timezone.utc)
+                rollup = batch.get((row.slug, row.tier, bucket))
+                if rollup is None:
+                    continue
+                rollup = rollup.copy()
+                rollup.merge_row(row)
+                merged[rollup.key] = rollup
+        return merged
+
+    @staticmethod
+    def _upsert(conn, table, rollups, batch_size):
+        """Insert or replace the rows of `rollups`."""
+        dialects = {'postgresql': postgresql, 'sqlite': sqlite}
+        if conn.dialect.name not in dialects:
+            raise NotImplementedError(
+                f"Rollups cannot be stored on {conn.dialect.name}")
+        statement = dialects[conn.dialect.name].insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['slug', 'tier', 'bucket'],
+            set_={name: statement.excluded[name] for name in Rollup.STORED})
+        for i in range(0, len(rollups), batch_size):
+            conn.execute(statement,
+                         [r.values() for r in rollups[i:i + batch_size]])
+
+    def prune(self, engine, results_table, table, now=None):
+        """Delete raw results and rollups older than their retention."""
+        now = now or datetime.now(timezone.utc)
+        with engine.begin() as conn:
+            if 0 in self.retention:
+                cutoff = now - timedelta(seconds=self.retention[0])
+                conn.execute(results_table.delete().where(
+                    results_table.c.date < cutoff))
+            for tier in self.tiers:
+                if tier not in self.retention:
+                    continue
+                cutoff = now - timedelta(seconds=self.retention[tier])
+                conn.execute(table.delete().where(
+                    (table.c.tier == tier) & (table.c.bucket < cutoff)))
+
+
+def summarize(rollups):
+    """Merge rollup rows into a single summary of the whole range.
+
+    Returns a dictionary with `count`, `failures`, `availability`,
+    `failRate`, `mean`, `stddev`, `minimum`, `maximum`, the `p75`, `p95`
+    and `p99` percentiles and the merged `sketch`.
+
+    """
+    count = sum(r.count for r in rollups)
+    failures = sum(r.failures for r in rollups)
+    total = sum(r.total for r in rollups)
+    total_sq = sum(r.total_sq for r in rollups)
+    sketch = LatencySketch()
+    for r in rollups:
+        sketch.merge(LatencySketch.from_dict(r.sketch))
+    mean = total / count if count else 0
+    variance = (total_sq - count * mean * mean) / (count - 1) \
+        if count > 1 else 0
+    return {
+        'count': count,
+        'failures': failures,
+        'availability': (count - failures) / count * 100 if count else 0,
+        'failRate': failures / count * 100 if count else 0,
+        'mean': mean,
+        'stddev': math.sqrt(max(variance, 0)),
+        'minimum': min((r.minimum for r in rollups
+                        if r.minimum is not None), default=0),
+        'maximum': max((r.maximum for r in rollups
+                        if r.maximum is not None), default=0),
+        'p75': sketch.percentile(75),
+        'p95': sketch.percentile(95),
+        'p99': sketch.percentile(99),
+        'sketch': sketch,
+    }
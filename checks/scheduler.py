@@ -0,0 +1,545 @@
+"""Endpoint Check Scheduler.
+
+The scheduler module keeps every endpoint in a min-heap keyed by the time its
+next check is due.  A single scheduler thread sleeps until the earliest
+deadline and hands due endpoints to a dispatch callable (usually the worker
+pool's queue), so worker threads only exist for in-flight requests.
+
+First runs are spread over each endpoint's interval rather than all fired
+at once: every slug has a fixed phase, derived from a hash of the slug, and
+its runs fall on that phase of the wall clock.  Endpoints with the same
+frequency therefore stay evenly spread, across restarts and across
+runners, and load on the runner and the targets stays flat.  An optional
+per-host limit caps the checks in flight against any one server and port;
+due endpoints beyond it are held until a check of the same host finishes.
+
+The scheduler also times every run: how late it started after its deadline
+(lag), how long it waited in the queue for a worker, how long it took and
+how many runs were skipped because the previous one overran.  Growing lag
+and queue wait show the pool is saturated before checks are missed.
+
+"""
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+import zlib
+import numpy as np
+
+
+class CheckTiming(object):
+    """Timing counters of one endpoint's runs.
+
+    Times are in seconds; `due` and `started` are wall clock timestamps of
+    the intended and actual start of the last run.
+
+    """
+    __slots__ = ('slug', 'name', 'frequency', 'runs', 'missed', 'late',
+                 'due', 'started', 'lag', 'lag_max', 'queue_wait',
+                 'execution', '_started')
+
+    def __init__(self, endpoint):
+        self.slug = endpoint.slug
+        self.name = endpoint.name
+        self.frequency = endpoint.frequency
+        self.runs = 0
+        self.missed = 0     # runs skipped because a check overran
+        self.late = 0       # runs started at least `LATE_SECONDS` late
+        self.due = None
+        self.started = None
+        self.lag = 0.0
+        self.lag_max = 0.0
+        self.queue_wait = 0.0
+        self.execution = 0.0
+        self._started = None  # monotonic start of the run in flight
+
+    def as_dict(self):
+        """Return the counters as a dictionary."""
+        return {k: getattr(self, k) for k in self.__slots__
+                if not k.startswith('_')}
+
+
+class TimingWindow(object):
+    """Lag, queue wait and execution time of the most recent runs."""
+
+    def __init__(self, size=1024):
+        self.samples = np.zeros((size, 3))
+        self.count = 0
+
+    def add(self, lag, queue_wait, execution):
+        """Add the times of a run, replacing the oldest."""
+        self.samples[self.count % len(self.samples)] = \
+            (lag, queue_wait, execution)
+        self.count += 1
+
+    def percentiles(self, q):
+        """Return the `q` percentiles of lag, queue wait and execution."""
+        if not self.count:
+            return np.zeros((len(q), 3))
+        return np.percentile(self.samples[:self.count], q, axis=0)
+
+
+def merge_timing(summaries):
+    """Return the `Scheduler.timing` summaries of several schedulers as one.
+
+    Counts are added; percentiles cannot be merged, so the worst of each is
+    kept.
+
+    """
+    merged = {'runs': 0, 'missed': 0, 'late': 0, 'in_flight': 0, 'held': 0}
+    for summary in summaries:
+        for key, value in summary.items():
+            if key in merged:
+                merged[key] += value
+            else:
+                merged[key] = max(merged.get(key, 0.0), value)
+    return merged
+
+
+class Scheduler(object):
+    """Deadline driven endpoint scheduler.
+
+    The schedule is a heap of ``[due, sequence, endpoint]`` entries where
+    `due` is a `time.monotonic()` deadline.  Entries are never removed from
+    the middle of the heap; removing an endpoint marks its entry dead and the
+    entry is discarded when it reaches the top.
+
+    An endpoint is *in flight* between being dispatched and being passed back
+    to `reschedule`.  In-flight endpoints are not in the heap, so a slow
+    endpoint is never checked by two workers at once.
+
+    A due endpoint may be held before it is dispatched: by the `limiter`'s
+    rate of its server, pushed back on the heap until its token is due, and
+    then by the per-host concurrency limit, until a check of its server
+    finishes.  Held endpoints never occupy a worker.
+
+    """
+    COUNT = 0
+    # runs starting at least this many seconds after their deadline are late
+    LATE_SECONDS = 1.0
+
+    def __init__(self, dispatch, logger=None, spread=True, host_limit=0,
+                 limiter=None):
+        """Initialize the scheduler.
+
+        Args:
+            dispatch(callable): called with each endpoint as it becomes due
+            spread(bool): phase the first run of each endpoint by its slug
+                (see `first_due`) rather than running it at once
+            host_limit(int): most checks in flight per server and port; 0 is
+                no limit
+            limiter(`HostLimiter`): rate limits checks per server and port
+
+        The schedule outlives the scheduler thread; `stop` followed by `start`
+        resumes dispatching the same endpoints on their existing deadlines.
+        """
+        self.dispatch = dispatch
+        self.logger = logger or logging.getLogger(__name__)
+        self.spread = spread
+        self.host_limit = host_limit
+        self.limiter = limiter
+        self.thread = None
+        self._should_die = threading.Event()  # flag to terminate thread
+        self._heap = []
+        self._entries = {}   # endpoint -> live heap entry
+        self._due = {}       # endpoint -> deadline of the current run
+        self._dispatched = {}   # endpoint -> when its current run was queued
+        self._timings = {}      # slug -> `CheckTiming`
+        self._window = TimingWindow()
+        self._missed = 0
+        self._hosts = collections.Counter()   # host -> checks in flight
+        self._host_of = {}   # in-flight endpoint -> (server, port) counted
+        self._held = collections.defaultdict(collections.deque)  # by host
+        self._held_since = {}   # held endpoint -> when it was held
+        self._held_for = {}     # released endpoint -> seconds it was held
+        self._throttled = {}    # endpoint waiting for its rate -> seconds
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        """Return the number of scheduled (not in flight) endpoints."""
+        with self._condition:
+            return len(self._entries)
+
+    def __contains__(self, endpoint):
+        """Return True if `endpoint` is scheduled or in flight."""
+        with self._condition:
+            return endpoint in self._entries or endpoint in self._due
+
+    @property
+    def endpoint_count(self):
+        """Return the number of endpoints on the schedule, in flight or not."""
+        with self._condition:
+            return len(self._entries) + len(self._due) - len(self._throttled)
+
+    @staticmethod
+    def phase(endpoint):
+        """Return the offset (0 to 1) of `endpoint` within its interval.
+
+        The offset is a hash of the slug, so it is the same in every
+        process.
+
+        """
+        return zlib.crc32(endpoint.slug.encode('utf-8')) / 2 ** 32
+
+    def first_due(self, endpoint, after=None):
+        """Return the deadline of the first run of `endpoint`.
+
+        Without `spread` that is `after` (a `time.monotonic()` deadline,
+        default now); with it, the first wall clock time from `after` on
+        that falls on the endpoint's `phase` of its frequency.
+
+        """
+        now = time.monotonic()
+        if after is None:
+            after = now
+        if not self.spread or not endpoint.frequency:
+            return after
+        wall = time.time() + (after - now)
+        offset = self.phase(endpoint) * endpoint.frequency
+        return after + (offset - wall) % endpoint.frequency
+
+    def add(self, endpoint, due=None):
+        """Schedule `endpoint` to be checked at `due`.
+
+        `due` is a `time.monotonic()` deadline; the endpoint is due
+        immediately when it is omitted.  Adding an endpoint that is already
+        scheduled moves it to the new deadline.  Raises ValueError if the
+        endpoint's frequency is under a second.
+
+        """
+        if endpoint.frequency < 1:
+            raise ValueError(f"{endpoint.name} is checked every "
+                             f"{endpoint.frequency}s; the least is 1s")
+        if due is None:
+            due = time.monotonic()
+        with self._condition:
+            self._discard(endpoint)
+            entry = [due, next(self._counter), endpoint]
+            self._entries[endpoint] = entry
+            heapq.heappush(self._heap, entry)
+            self._condition.notify()
+
+    def pull_in(self, endpoint):
+        """Move a waiting `endpoint` due more than one frequency from now.
+
+        Used after an endpoint's frequency is shortened, so the change takes
+        effect without waiting out the old interval.
+
+        """
+        now = time.monotonic()
+        with self._condition:
+            entry = self._entries.get(endpoint)
+            if entry is not None and endpoint.frequency >= 1 and \
+                    entry[0] > now + endpoint.frequency:
+                self.add(endpoint, now + endpoint.frequency)
+
+    def remove(self, endpoint):
+        """Remove `endpoint` from the schedule."""
+        with self._condition:
+            self._discard(endpoint)
+            self._due.pop(endpoint, None)
+            self._dispatched.pop(endpoint, None)
+            self._timings.pop(endpoint.slug, None)
+            self._held_since.pop(endpoint, None)
+            self._held_for.pop(endpoint, None)
+            self._throttled.pop(endpoint, None)
+
+    def clear(self):
+        """Remove every endpoint from the schedule."""
+        with self._condition:
+            self._heap = []
+            self._entries = {}
+            self._due = {}
+            self._dispatched = {}
+            self._timings = {}
+            self._hosts.clear()
+            self._host_of = {}
+            self._held.clear()
+            self._held_since = {}
+            self._held_for = {}
+            self._throttled = {}
+            self._condition.notify()
+
+    def _discard(self, endpoint):
+        """Mark the live heap entry of `endpoint` dead; caller holds lock."""
+        entry = self._entries.pop(endpoint, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def started(self, endpoint):
+        """Record that a worker started checking the dispatched `endpoint`.
+
+        Workers call this as they take `endpoint` off the queue; the run's
+        lag and queue wait are measured from its deadline and dispatch.
+        Returns the seconds the run was held by the per-host limits.
+
+        """
+        now = time.monotonic()
+        with self._condition:
+            held = self._held_for.pop(endpoint, 0.0)
+            due = self._due.get(endpoint)
+            if due is None:  # removed while queued
+                return held
+            timing = self._timings.get(endpoint.slug)
+            if timing is None:
+                timing = self._timings[endpoint.slug] = CheckTiming(endpoint)
+            clock = time.time() - now
+            timing.name = endpoint.name
+            timing.frequency = endpoint.frequency
+            timing.due = clock + due
+            timing.started = clock + now
+            timing.lag = now - due
+            timing.lag_max = max(timing.lag_max, timing.lag)
+            timing.queue_wait = now - self._dispatched.get(endpoint, now)
+            timing.late += timing.lag >= self.LATE_SECONDS
+            timing._started = now
+        return held
+
+    def reschedule(self, endpoint):
+        """Put an in-flight `endpoint` back on the schedule.
+
+        The next deadline is the previous deadline plus the endpoint's
+        frequency, so cadence does not drift with response time.  When a
+        check overran one or more intervals, the missed runs are skipped
+        rather than fired back to back.  The endpoint's slot of the
+        per-host limit is freed, dispatching the next endpoint held for it.
+        An endpoint whose frequency was changed to under a second while in
+        flight is dropped.
+
+        """
+        now = time.monotonic()
+        with self._condition:
+            released = self._release(endpoint)
+            if endpoint in self._due and endpoint.frequency < 1:
+                self.logger.error(
+                    f"Dropped {endpoint.name}: it is checked every "
+                    f"{endpoint.frequency}s; the least is 1s")
+                self.remove(endpoint)
+            elif endpoint in self._due:  # not removed while in flight
+                self._dispatched.pop(endpoint, None)
+                due = self._due.pop(endpoint) + endpoint.frequency
+                missed = 0
+                if due < now:
+                    missed = int((now - due) // endpoint.frequency) + 1
+                    due += missed * endpoint.frequency
+                self._finished(endpoint, now, missed)
+                self.add(endpoint, due)
+        if released is not None:
+            self.dispatch(released)
+
+    def _acquire(self, endpoint):
+        """Count a due `endpoint` against its server; caller holds lock.
+
+        Returns False, holding the endpoint until a check of the same
+        server and port finishes, if it already has `host_limit` checks in
+        flight.
+
+        """
+        if not self.host_limit:
+            return True
+        host = (endpoint.server, endpoint.port)
+        if self._hosts[host] >= self.host_limit:
+            self._held[host].append(endpoint)
+            self._held_since[endpoint] = time.monotonic()
+            return False
+        self._hosts[host] += 1
+        self._host_of[endpoint] = host
+        return True
+
+    def _release(self, endpoint):
+        """Uncount a finished `endpoint`; caller holds lock.
+
+        Returns the next endpoint held for the same server, counted and
+        ready to dispatch, or None.
+
+        """
+        host = self._host_of.pop(endpoint, None)
+        if host is None:
+            return None
+        self._hosts[host] -= 1
+        held = self._held.get(host)
+        while held:
+            endpoint = held.popleft()
+            # skip endpoints removed, or already released, while held
+            if endpoint in self._due and endpoint not in self._host_of:
+                now = time.monotonic()
+                self._hosts[host] += 1
+                self._host_of[endpoint] = host
+                self._dispatched[endpoint] = now
+                self._held_for[endpoint] = self._held_for.get(endpoint, 0.0) \
+                    + now - self._held_since.pop(endpoint, now)
+                return endpoint
+        if not self._hosts[host]:
+            del self._hosts[host]
+            self._held.pop(host, None)
+        return None
+
+    def _finished(self, endpoint, now, missed):
+        """Record the end of a run of `endpoint`; caller holds lock."""
+        timing = self._timings.get(endpoint.slug)
+        if timing is None or timing._started is None:
+            return
+        timing.execution = now - timing._started
+        timing._started = None
+        timing.runs += 1
+        timing.missed += missed
+        self._missed += missed
+        self._window.add(timing.lag, timing.queue_wait, timing.execution)
+
+    @property
+    def timing(self):
+        """Return a summary of how closely checks keep to the schedule.
+
+        The summary has the total `runs`, `missed` and `late` runs, the
+        endpoints `in_flight` (due, not finished), those of them `held` by
+        the per-host limits and the p50 and p99 of lag, queue wait and
+        execution time of the most recent runs.
+
+        """
+        with self._condition:
+            runs = sum(t.runs for t in self._timings.values())
+            late = sum(t.late for t in self._timings.values())
+            in_flight = len(self._due)
+            held = sum(len(h) for h in self._held.values()) + \
+                len(self._throttled)
+            percentiles = self._window.percentiles([50, 99])
+            missed = self._missed
+        summary = {'runs': runs, 'missed': missed, 'late': late,
+                   'in_flight': in_flight, 'held': held}
+        for i, name in enumerate(('lag', 'queue_wait', 'execution')):
+            summary[f'{name}_p50'] = float(percentiles[0][i])
+            summary[f'{name}_p99'] = float(percentiles[1][i])
+        return summary
+
+    def timings(self, worst=None):
+        """Return the `CheckTiming` counters of every endpoint as dicts.
+
+        Sorted by the lag of their last run, longest first; only the
+        `worst` are returned when given.
+
+        """
+        with self._condition:
+            timings = [t.as_dict() for t in self._timings.values()]
+        timings.sort(key=lambda t: t['lag'], reverse=True)
+        return timings[:worst] if worst is not None else timings
+
+    def _pop_due(self):
+        """Pop every endpoint that is due; caller holds lock.
+
+        Returns the list of due endpoints and the number of seconds until the
+        next deadline (`None` when the schedule is empty).  Endpoints held
+        by the per-host limits are due but not returned; runs the rate
+        limit would hold longer than its `max_wait` are skipped.
+
+        """
+        due = []
+        now = time.monotonic()
+        while self._heap:
+            deadline, _, endpoint = self._heap[0]
+            if endpoint is None:  # removed or moved entry
+                heapq.heappop(self._heap)
+                continue
+            if deadline > now:
+                return due, deadline - now
+            heapq.heappop(self._heap)
+            del self._entries[endpoint]
+            throttled = self._throttled.pop(endpoint, None)
+            if throttled is not None:  # its rate limit token is due
+                self._held_for[endpoint] = throttled
+            else:
+                wait = self._reserve(endpoint)
+                if wait is None:
+                    self._skip(endpoint, deadline, now)
+                    continue
+                self._due[endpoint] = deadline
+                if wait:
+                    self._throttled[endpoint] = wait
+                    entry = [now + wait, next(self._counter), endpoint]
+                    self._entries[endpoint] = entry
+                    heapq.heappush(self._heap, entry)
+                    continue
+            if self._acquire(endpoint):
+                self._dispatched[endpoint] = now
+                due.append(endpoint)
+        return due, None
+
+    def _reserve(self, endpoint):
+        """Return the seconds `endpoint` waits for its rate limit.
+
+        None if the wait would be too long.  Caller holds lock.
+
+        """
+        if self.limiter is None:
+            return 0.0
+        return self.limiter.reserve(endpoint)
+
+    def _skip(self, endpoint, deadline, now):
+        """Count a run the rate limit refused as missed; caller holds lock.
+
+        The endpoint is put back on the schedule at its next deadline.
+
+        """
+        due = deadline + endpoint.frequency
+        missed = 1
+        if due <= now:
+            skipped = int((now - due) // endpoint.frequency) + 1
+            due += skipped * endpoint.frequency
+            missed += skipped
+        timing = self._timings.get(endpoint.slug)
+        if timing is not None:
+            timing.missed += missed
+        self._missed += missed
+        self.add(endpoint, due)
+
+    def is_alive(self):
+        """Return True if the scheduler thread is running."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Start the scheduler thread unless it is already running."""
+        if self.is_alive():
+            return
+        Scheduler.COUNT += 1
+        self._should_die = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, args=(self._should_die,),
+            name=f"EndpointScheduler-{Scheduler.COUNT}")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, join=False):
+        """Tell the scheduler thread to die."""
+        self._should_die.set()
+        with self._condition:
+            self._condition.notify()
+        if join and self.thread is not None:
+            self.thread.join()
+        self.thread = None
+
+    def run(self, should_die):
+        """Thread execution point.
+
+        Sleep until the earliest deadline (or until the schedule changes) and
+        dispatch every endpoint that is due.  Runs until `should_die` is set.
+
+        """
+        self.logger.debug("Starting a new endpoint scheduler")
+        while not should_die.is_set():
+            with self._condition:
+                due, timeout = self._pop_due()
+                if not due:
+                    self._condition.wait(timeout)
+                    continue
+                if should_die.is_set():  # leave them for the next thread
+                    for endpoint in due:
+                        self._dispatched.pop(endpoint, None)
+                        host = self._host_of.pop(endpoint, None)
+                        if host is not None:
+                            self._hosts[host] -= 1
+                        self.add(endpoint, self._due.pop(endpoint))
+                    break
+            for endpoint in due:
+                self.dispatch(endpoint)
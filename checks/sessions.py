@@ -0,0 +1,112 @@
+"""Keep-alive HTTP Sessions.
+
+The sessions module pools `requests.Session` objects per target so checks
+reuse TCP and TLS connections instead of opening a new one for every request.
+
+"""
+import http.cookiejar
+import logging
+import requests
+import threading
+import time
+from checks.timing import TimedHTTPAdapter
+
+
+class SessionPool(object):
+    """Pool of keep-alive sessions shared by every worker thread.
+
+    Sessions are keyed by ``(scheme, server, port)``.  Each session keeps up
+    to `pool_size` idle connections to its target; a session that has not
+    been used for `idle_timeout` seconds is closed along with its
+    connections.
+
+    Sessions never store cookies, so one check cannot change what the next
+    check of the same target sends.  Endpoints that want a cold connection
+    get their own session that closes every connection after one request.
+
+    """
+
+    def __init__(self, pool_size=10, idle_timeout=60, logger=None):
+        """Initialize the session pool.
+
+        Args:
+            pool_size(int): maximum idle connections kept per target
+            idle_timeout(int): seconds before an unused session is closed
+
+        """
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self._sessions = {}   # key -> [session, last used]
+        self._last_eviction = time.monotonic()
+
+    def __len__(self):
+        """Return the number of open sessions."""
+        return len(self._sessions)
+
+    @staticmethod
+    def key(endpoint):
+        """Return the pool key of `endpoint`."""
+        return (endpoint.scheme, endpoint.server, endpoint.port,
+                endpoint.cold_connection)
+
+    def _new_session(self):
+        """Build a cookie-less, phase-timed session with a sized pool."""
+        session = requests.Session()
+        session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = TimedHTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session(self, endpoint):
+        """Return the shared session for `endpoint`'s target."""
+        key = self.key(endpoint)
+        now = time.monotonic()
+        with self.lock:
+            if now - self._last_eviction > self.idle_timeout:
+                self._evict(now)
+            if key not in self._sessions:
+                self.logger.debug(f"Opening a session to {key}")
+                self._sessions[key] = [self._new_session(), now]
+            entry = self._sessions[key]
+            entry[1] = now
+            return entry[0]
+
+    def _evict(self, now):
+        """Close idle sessions; caller holds `lock`."""
+        self._last_eviction = now
+        for key, (session, used) in list(self._sessions.items()):
+            if now - used > self.idle_timeout:
+                self.logger.debug(f"Closing idle session to {key}")
+                del self._sessions[key]
+                session.close()
+
+    def evict(self):
+        """Close every session idle for longer than `idle_timeout`."""
+        with self.lock:
+            self._evict(time.monotonic())
+
+    def request(self, endpoint):
+        """Make the request of `endpoint` and return the streamed response.
+
+        The caller reads the body and closes the response.  Endpoints with
+        `cold_connection` set pay for a new connection (and TLS handshake)
+        every time.
+
+        """
+        url, payload = endpoint.request
+        if endpoint.cold_connection:
+            payload['headers']['Connection'] = 'close'
+        return self.session(endpoint).request(endpoint.verb, url,
+                                              stream=True, **payload)
+
+    def close(self):
+        """Close every session in the pool."""
+        with self.lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions = {}
@@ -0,0 +1,226 @@
+"""Sharded Check Execution.
+
+The shard module spreads monitors across several check runners.  Every
+runner holds a lease row that it renews while it is alive; the runners with
+a live lease form a consistent-hash ring of monitor slugs, and each runner
+only checks the slugs it owns on the ring.  When a runner joins, leaves or
+its lease expires, every runner rebuilds the ring and the slugs move with
+as little churn as consistent hashing allows.
+
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import sqlalchemy as sa
+
+
+def node_name():
+    """Return a name for this runner that is unique on the network."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class HashRing(object):
+    """Consistent-hash ring of runner nodes.
+
+    Each node is placed on the ring `replicas` times so slugs spread evenly
+    and only about ``1 / len(nodes)`` of the slugs move when a node joins
+    or leaves.
+
+    """
+
+    def __init__(self, nodes, replicas=64):
+        self.nodes = tuple(sorted(nodes))
+        self.replicas = replicas
+        points = sorted((self.hash(f"{node}#{i}"), node)
+                        for node in self.nodes for i in range(replicas))
+        self._keys = [key for key, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def hash(value):
+        """Return the ring position of `value`."""
+        return int.from_bytes(
+            hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def owner(self, slug):
+        """Return the node that owns `slug`, or None if the ring is empty."""
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, self.hash(slug)) % len(self._keys)
+        return self._nodes[index]
+
+    def __eq__(self, other):
+        return isinstance(other, HashRing) and self.nodes == other.nodes \
+            and self.replicas == other.replicas
+
+    def __repr__(self):
+        return f"<HashRing {', '.join(self.nodes)}>"
+
+
+class ShardCoordinator(threading.Thread):
+    """Keep this runner's lease alive and its manager's shard up to date.
+
+    Every `heartbeat_interval` seconds the coordinator renews the lease of
+    `node` and reads every lease renewed within `lease_ttl` seconds.  When
+    the set of live nodes changes, it hands a new `HashRing` to
+    `manager.rebalance`.
+
+    Slugs a runner loses are dropped at once; slugs it gains are first
+    checked `takeover_delay` seconds later.  By then every other live
+    runner has seen the same ring and dropped them, and a runner that could
+    not renew its lease has found it expired and dropped its whole shard,
+    so an endpoint is never checked by two runners at once.  Lease queries
+    give up after `timeout` seconds so a hung database cannot keep a runner
+    from noticing.  On `stop` the lease is released so the other runners
+    take over the shard without waiting for it to expire.
+
+    """
+
+    def __init__(self, manager, node=None, address=None,
+                 heartbeat_interval=5, lease_ttl=15, timeout=None,
+                 logger=None):
+        """Initialize the coordinator.
+
+        Args:
+            manager(`RequestsManager`): the manager whose shard is kept
+            node(str): unique name of this runner
+            address(str): where this runner serves results, for display
+            heartbeat_interval(float): seconds between lease renewals
+            lease_ttl(float): seconds a lease lives without renewal
+            timeout(float): seconds a lease query may take; defaults to
+                `heartbeat_interval`
+
+        """
+        super(ShardCoordinator, self).__init__(name="ShardCoordinator")
+        self.daemon = True
+        self.manager = manager
+        self.node = node or node_name()
+        self.address = address
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_ttl = lease_ttl
+        self.timeout = timeout or heartbeat_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.engine = None
+        self.table = None
+        self.ring = None
+        self._renewed = None  # time.monotonic() a renewal last started
+        self._expired = False  # whether the last renewal found dead leases
+        self._should_die = threading.Event()
+
+    @property
+    def takeover_delay(self):
+        """Return the seconds to wait before checking slugs gained.
+
+        A runner whose lease expired drops its shard on the first loop
+        after `lease_ttl` seconds without a renewal, at most a
+        `heartbeat_interval` (and a query `timeout`) after the other
+        runners could have seen the lease expire.
+
+        """
+        return self.lease_ttl + self.heartbeat_interval + self.timeout
+
+    def configure(self, engine, table):
+        """Keep leases in `table` through the SQLAlchemy `engine`.
+
+        On Postgres the leases get their own small engine, whose connects
+        and statements time out after `timeout` seconds.
+
+        """
+        if engine.dialect.name == 'postgresql':
+            timeout = max(1, round(self.timeout))
+            engine = sa.create_engine(
+                engine.url, pool_size=1, max_overflow=0,
+                pool_timeout=timeout, pool_pre_ping=True,
+                connect_args={
+                    'connect_timeout': timeout,
+                    'options': f"-c statement_timeout={timeout * 1000}",
+                })
+        self.engine = engine
+        self.table = table
+
+    def heartbeat(self, now=None):
+        """Renew this runner's lease and return the live nodes."""
+        now = now or datetime.now(timezone.utc)
+        table = self.table
+        with self.engine.begin() as conn:
+            renewed = conn.execute(table.update().where(
+                table.c.node == self.node).values(heartbeat=now))
+            if not renewed.rowcount:
+                conn.execute(table.insert().values(
+                    node=self.node, address=self.address,
+                    started=now, heartbeat=now))
+            cutoff = now - timedelta(seconds=self.lease_ttl)
+            expired = conn.execute(
+                table.delete().where(table.c.heartbeat < cutoff))
+            self._expired = bool(expired.rowcount)
+            rows = conn.execute(table.select().where(
+                table.c.heartbeat >= cutoff)).fetchall()
+        return [row.node for row in rows]
+
+    def update(self):
+        """Renew the lease and rebalance if the live nodes changed.
+
+        A runner starting alone checks at once, unless it found leases
+        that expired: their runners may still be checking.
+
+        """
+        started = time.monotonic()
+        ring = HashRing(self.heartbeat())
+        self._renewed = started
+        if ring != self.ring:
+            alone = self.ring is None and ring.nodes == (self.node,) \
+                and not self._expired
+            self.ring = ring
+            self.logger.info(f"Runner {self.node} is a member of {ring}")
+            self.manager.rebalance(
+                ring, self.node, delay=0 if alone else self.takeover_delay)
+
+    def expire(self):
+        """Drop the shard once our own lease has expired unrenewed."""
+        if self._renewed is None or self.ring is None or not self.ring.nodes:
+            return
+        if time.monotonic() - self._renewed > self.lease_ttl:
+            self.logger.warning(
+                f"Lease of {self.node} expired; dropping its shard")
+            self.ring = HashRing([])
+            self.manager.rebalance(self.ring, self.node)
+
+    def release(self):
+        """Delete this runner's lease."""
+        with self.engine.begin() as conn:
+            conn.execute(self.table.delete().where(
+                self.table.c.node == self.node))
+
+    def stop(self, join=True):
+        """Tell the coordinator to die and release the lease."""
+        self._should_die.set()
+        if join and self.is_alive():
+            self.join()
+        if self.engine is not None:
+            self.release()
+
+    def run(self):
+        """Thread execution point.
+
+        Renew the lease every `heartbeat_interval` seconds until stopped.  A
+        failed renewal is logged and the shard is kept until the lease would
+        have expired, which is checked on every loop; after that no endpoint
+        is checked until a renewal succeeds, since other runners will have
+        taken the shard over.
+
+        """
+        self.logger.debug(f"Starting shard coordination as {self.node}")
+        while not self._should_die.is_set():
+            started = time.monotonic()
+            try:
+                self.update()
+            except Exception:
+                self.logger.exception("Failed to renew the runner lease")
+            self.expire()
+            self._should_die.wait(
+                self.heartbeat_interval - (time.monotonic() - started))
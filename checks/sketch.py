@@ -0,0 +1,201 @@
+"""Latency Sketch.
+
+The sketch module provides a mergeable, fixed-accuracy quantile sketch in
+the style of DDSketch.  Values are counted in logarithmically sized buckets
+so any quantile is answered within a relative error of `accuracy`, no matter
+how many values were added.  Sketches of the same accuracy merge exactly,
+which lets rollups combine minute buckets into hours and days.
+
+`WindowStats` builds on the sketch to keep the statistics of a sliding
+result window up to date as results arrive.
+
+"""
+import math
+
+
+class LatencySketch(object):
+    """Quantile sketch of non-negative latencies.
+
+    A value `x` is counted in bucket ``ceil(log(x, gamma))`` where
+    ``gamma = (1 + accuracy) / (1 - accuracy)``.  Values at or below
+    `min_value` are counted in a single zero bucket.  Values can also be
+    removed, so a sketch can track a sliding window.
+
+    """
+
+    def __init__(self, accuracy=0.01, min_value=1e-3):
+        """Initialize an empty sketch.
+
+        Args:
+            accuracy(float): relative accuracy of quantiles
+            min_value(float): values at or below this count as zero
+
+        """
+        self.accuracy = accuracy
+        self.min_value = min_value
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero = 0
+        self.count = 0
+
+    def _index(self, value):
+        """Return the bucket index of `value`."""
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def _value(self, index):
+        """Return the representative value of bucket `index`."""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        """Count `value` `count` times."""
+        if value <= self.min_value:
+            self.zero += count
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def remove(self, value, count=1):
+        """Forget `count` earlier additions of `value`."""
+        if value <= self.min_value:
+            self.zero -= count
+        else:
+            index = self._index(value)
+            remaining = self.bins.get(index, 0) - count
+            if remaining > 0:
+                self.bins[index] = remaining
+            else:
+                self.bins.pop(index, None)
+        self.count -= count
+
+    def merge(self, other):
+        """Add every value counted by `other` to this sketch."""
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches of equal accuracy can merge")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return the `q` quantile (0 <= q <= 1); 0 if the sketch is empty."""
+        if self.count <= 0:
+            return 0
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return self._value(index)
+        return self._value(max(self.bins))
+
+    def percentile(self, p):
+        """Return the `p` percentile (0 <= p <= 100)."""
+        return self.quantile(p / 100.0)
+
+    def to_dict(self):
+        """Return a JSON serializable copy of the sketch."""
+        return {
+            'accuracy': self.accuracy,
+            'min_value': self.min_value,
+            'zero': self.zero,
+            'bins': {str(k): v for k, v in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a sketch serialized with `to_dict`."""
+        sketch = cls(data['accuracy'], data['min_value'])
+        sketch.zero = data['zero']
+        sketch.bins = {int(k): v for k, v in data['bins'].items()}
+        sketch.count = sketch.zero + sum(sketch.bins.values())
+        return sketch
+
+
+class WindowStats(object):
+    """Incrementally maintained statistics of a result window.
+
+    Results are added as they arrive and removed as they fall out of the
+    window, so reading any statistic never walks the window.  The mean and
+    variance use Welford's method (extended to removals); percentiles come
+    from a `LatencySketch` and are cached until the window changes.
+
+    """
+
+    def __init__(self, accuracy=0.01):
+        self.count = 0
+        self.successes = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.sketch = LatencySketch(accuracy)
+        self._percentiles = {}
+
+    def add(self, elapsed, status):
+        """Add a result that took `elapsed` ms and succeeded if `status`."""
+        self.count += 1
+        if status:
+            self.successes += 1
+        delta = elapsed - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (elapsed - self.mean)
+        self.sketch.add(elapsed)
+        self._percentiles = {}
+
+    def remove(self, elapsed, status):
+        """Remove a result previously passed to `add`."""
+        self.count -= 1
+        if status:
+            self.successes -= 1
+        if self.count <= 0:
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+        else:
+            delta = elapsed - self.mean
+            self.mean -= delta / self.count
+            self._m2 = max(self._m2 - delta * (elapsed - self.mean), 0.0)
+        self.sketch.remove(elapsed)
+        self._percentiles = {}
+
+    @property
+    def stddev(self):
+        """Return the sample standard deviation."""
+        if self.count < 2:
+            return 0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    @property
+    def availability(self):
+        """Return the percentage of successful results."""
+        if not self.count:
+            return 0
+        return self.successes / self.count * 100
+
+    @property
+    def failRate(self):
+        """Return the percentage of failed results."""
+        if not self.count:
+            return 0
+        return (self.count - self.successes) / self.count * 100
+
+    def percentile(self, p):
+        """Return the `p` percentile of elapsed time."""
+        if p not in self._percentiles:
+            self._percentiles[p] = self.sketch.percentile(p)
+        return self._percentiles[p]
+
+    def summary(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'count': self.count,
+            'availability': self.availability,
+            'failRate': self.failRate,
+            'mean': self.mean,
+            'stddev': self.stddev,
+            'p75': self.percentile(75),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
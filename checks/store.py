@@ -0,0 +1,179 @@
+"""Persistent Result Store.
+
+The store module writes check results to a database table.  Workers hand
+results to a `ResultWriter` and return immediately; the writer thread
+batches queued results into multi-row inserts and keeps the rollup tiers
+(see `checks.rollup`) up to date.
+
+"""
+import logging
+import queue
+import threading
+import time
+from checks.rollup import RollupAccumulator
+
+
+class ResultWriter(threading.Thread):
+    """Background, batched result writer.
+
+    Results are queued by `put` and written by the writer thread in batches
+    of up to `batch_size` rows, at least every `flush_interval` seconds while
+    results are arriving.  The queue is bounded by `max_queue`; when the
+    database falls that far behind, new results are dropped (and counted in
+    `dropped`) rather than blocking the check workers.
+
+    Every written result is added to the rollups, which are stored every
+    `rollup_interval` seconds; results and rollups past their retention are
+    pruned every `prune_interval` seconds.
+
+    The writer is inert until `configure` gives it an engine and a table.
+
+    """
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_queue=100000,
+                 rollup_interval=60, prune_interval=3600, logger=None):
+        """Initialize the result writer.
+
+        Args:
+            batch_size(int): maximum rows per insert
+            flush_interval(float): maximum seconds a result waits in the queue
+            max_queue(int): maximum results waiting to be written
+            rollup_interval(int): seconds between rollup writes
+            prune_interval(int): seconds between retention pruning
+
+        """
+        super(ResultWriter, self).__init__(name="ResultWriter")
+        self.daemon = True
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.logger = logger or logging.getLogger(__name__)
+        self.engine = None
+        self.table = None
+        self.rollup_table = None
+        self.rollups = RollupAccumulator()
+        self.rollup_interval = rollup_interval
+        self.prune_interval = prune_interval
+        self._last_rollup = time.monotonic()
+        self._last_prune = time.monotonic()
+        self.should_die = False  # flag to terminate thread
+        self.written = 0
+        self.dropped = 0
+
+    def configure(self, engine, table, rollup_table=None):
+        """Write results to `table` through the SQLAlchemy `engine`.
+
+        Rollups are maintained in `rollup_table` when it is given.
+
+        """
+        self.engine = engine
+        self.table = table
+        self.rollup_table = rollup_table
+
+    @staticmethod
+    def row(slug, request_dimension):
+        """Convert a `RequestDimension` of `slug` into a table row."""
+        rd = request_dimension
+        return {
+            'slug': slug,
+            'date': rd.date,
+            'status': rd.status,
+            'status_code': rd.status_code,
+            'ttfb': rd.TTFB,
+            'elapsed': rd.elapsed,
+            'dns': rd.dns,
+            'connect': rd.connect,
+            'tls': rd.tls,
+            'transfer': rd.transfer,
+            'throttle': rd.throttle,
+            'size': rd.size,
+            'digest': rd.digest,
+            'message': rd.message,
+        }
+
+    def put(self, slug, request_dimension):
+        """Queue a result of `slug` to be written; never blocks."""
+        if self.engine is None:
+            return
+        try:
+            self.queue.put_nowait(self.row(slug, request_dimension))
+        except queue.Full:
+            self.dropped += 1
+
+    def _batch(self):
+        """Wait for and return the next batch of rows (possibly empty)."""
+        rows = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return rows
+
+    def write(self, rows):
+        """Insert `rows` in a single transaction."""
+        with self.engine.begin() as conn:
+            conn.execute(self.table.insert(), rows)
+        self.written += len(rows)
+        if self.rollup_table is not None:
+            self.rollups.add(rows)
+
+    def maintain(self, force=False):
+        """Store rollups and prune old rows when they are due."""
+        if self.rollup_table is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_rollup >= self.rollup_interval:
+            self._last_rollup = now
+            self.rollups.flush(self.engine, self.rollup_table)
+        if not force and now - self._last_prune >= self.prune_interval:
+            self._last_prune = now
+            self.rollups.prune(self.engine, self.table, self.rollup_table)
+
+    def flush(self):
+        """Write everything that is queued right now."""
+        rows = []
+        while True:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(rows) >= self.batch_size:
+                self.write(rows)
+                rows = []
+        if rows:
+            self.write(rows)
+
+    def stop(self, flush=True):
+        """Tell the writer to die, writing queued results first."""
+        self.should_die = True
+        if self.is_alive():
+            self.join()
+        if flush and self.engine is not None:
+            self.flush()
+            self.maintain(force=True)
+
+    def run(self):
+        """Thread execution point.
+
+        Write batches of results until `should_die` is true.  A failed batch
+        is logged and discarded so one bad write cannot stall the store.
+
+        """
+        self.logger.debug("Starting a new ResultWriter Thread")
+        while not self.should_die:
+            rows = self._batch()
+            try:
+                if rows:
+                    self.write(rows)
+            except Exception:
+                self.logger.exception(
+                    f"Failed to write {len(rows)} check results")
+            try:
+                self.maintain()
+            except Exception:
+                self.logger.exception("Failed to maintain check rollups")
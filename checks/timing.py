@@ -0,0 +1,241 @@
+"""Request Phase Timing.
+
+The timing module breaks a check down into the phases of an HTTP request:
+DNS resolution, TCP connect, TLS handshake, time to first byte and body
+transfer.  Every phase is measured with `time.monotonic()`.
+
+The threaded engine records phases through instrumented urllib3 connections
+mounted on a `requests` adapter.  Connections are used by the thread that
+makes the request, so the `Timings` of the current check, and the resolver
+it uses (see `checks.resolver`), are kept in a thread local.  The asyncio
+engine records phases through aiohttp tracing.
+
+"""
+import aiohttp
+import requests
+import socket
+import threading
+import time
+import types
+import urllib3
+
+
+_local = threading.local()
+
+
+class Timings(object):
+    """Phase timings of a single check.
+
+    `dns`, `connect`, `tls` and `ttfb` are accumulated in seconds across every
+    hop of a redirected request; they stay zero when a kept-alive connection
+    was reused.  `sent` and `headers` are monotonic marks of the most recent
+    hop.
+
+    """
+    __slots__ = ('start', 'end', 'dns', 'connect', 'tls', 'ttfb',
+                 'sent', 'headers')
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.end = None
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.sent = None
+        self.headers = None
+
+    def stop(self):
+        """Mark the end of the check."""
+        self.end = time.monotonic()
+
+    @property
+    def elapsed(self):
+        """Return the total time of the check in seconds."""
+        return (self.end or time.monotonic()) - self.start
+
+    @property
+    def transfer(self):
+        """Return the time spent reading the final response body in seconds."""
+        if self.headers is None:
+            return 0.0
+        return (self.end or time.monotonic()) - self.headers
+
+
+def begin(getaddrinfo=None):
+    """Start timing a check on the current thread and return its `Timings`.
+
+    The hosts of the check are resolved with `getaddrinfo`, or
+    `socket.getaddrinfo` when it is not given.
+
+    """
+    _local.timings = Timings()
+    _local.getaddrinfo = getaddrinfo or socket.getaddrinfo
+    return _local.timings
+
+
+def current():
+    """Return the `Timings` of the check running on this thread, if any."""
+    return getattr(_local, 'timings', None)
+
+
+def end():
+    """Stop timing the check on the current thread and return its `Timings`."""
+    timings = current()
+    _local.timings = None
+    if timings is not None:
+        timings.stop()
+    return timings
+
+
+class TimedHTTPConnection(urllib3.connection.HTTPConnection):
+    """HTTP connection that records DNS, connect and TTFB phases."""
+
+    def _new_conn(self):
+        """Resolve and connect, timing each step separately.
+
+        The host is resolved here, with the resolver of the check, and every
+        resolved address is tried in turn until one accepts the connection,
+        as urllib3 does; the connect time is that of the address connected
+        to.  Failures to resolve or connect raise the usual urllib3
+        exceptions.
+
+        """
+        timings = current()
+        if timings is None:
+            return super()._new_conn()
+        host = self._dns_host
+        start = time.monotonic()
+        try:
+            infos = _local.getaddrinfo(
+                host, self.port, urllib3.util.connection.allowed_gai_family(),
+                socket.SOCK_STREAM)
+        except socket.gaierror as ex:
+            raise urllib3.exceptions.NameResolutionError(
+                self.host, self, ex) from ex
+        except UnicodeError:
+            return super()._new_conn()
+        timings.dns += time.monotonic() - start
+        error = None
+        try:
+            for info in infos:
+                self._dns_host = info[4][0]
+                connecting = time.monotonic()
+                try:
+                    conn = super()._new_conn()
+                except (urllib3.exceptions.NewConnectionError,
+                        urllib3.exceptions.ConnectTimeoutError) as ex:
+                    error = ex
+                    continue
+                timings.connect += time.monotonic() - connecting
+                return conn
+        finally:
+            self._dns_host = host
+        if error is None:
+            raise urllib3.exceptions.NameResolutionError(
+                self.host, self, socket.gaierror("getaddrinfo returns an "
+                                                 "empty list"))
+        raise error
+
+    def request(self, *args, **kwargs):
+        """Send the request and mark when it was sent."""
+        result = super().request(*args, **kwargs)
+        timings = current()
+        if timings is not None:
+            timings.sent = time.monotonic()
+        return result
+
+    def getresponse(self, *args, **kwargs):
+        """Wait for the response headers and record the time to first byte."""
+        response = super().getresponse(*args, **kwargs)
+        timings = current()
+        if timings is not None:
+            timings.headers = time.monotonic()
+            if timings.sent is not None:
+                timings.ttfb += timings.headers - timings.sent
+        return response
+
+
+class TimedHTTPSConnection(TimedHTTPConnection,
+                           urllib3.connection.HTTPSConnection):
+    """HTTPS connection that also records the TLS handshake."""
+
+    def connect(self):
+        """Connect and attribute everything after the TCP connect to TLS."""
+        timings = current()
+        if timings is None:
+            return super().connect()
+        start = time.monotonic()
+        before = timings.dns + timings.connect
+        super().connect()
+        tcp = timings.dns + timings.connect - before
+        timings.tls += max(time.monotonic() - start - tcp, 0.0)
+
+
+class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """`requests` adapter whose connections record phase timings."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+def trace_config():
+    """Return an aiohttp `TraceConfig` that records phase timings.
+
+    Requests are traced by passing their `Timings` as `trace_request_ctx`.
+    aiohttp does not report the TLS handshake on its own, so it is included
+    in `connect` and `tls` stays zero.  Connect is the connection setup time
+    less any DNS resolution done during it.
+
+    """
+    async def dns_start(session, ctx, params):
+        ctx.dns_start = time.monotonic()
+
+    async def dns_end(session, ctx, params):
+        ctx.trace_request_ctx.dns += time.monotonic() - ctx.dns_start
+
+    async def connect_start(session, ctx, params):
+        ctx.connect_start = time.monotonic()
+        ctx.connect_dns = ctx.trace_request_ctx.dns
+
+    async def connect_end(session, ctx, params):
+        timings = ctx.trace_request_ctx
+        timings.connect += time.monotonic() - ctx.connect_start - \
+            (timings.dns - ctx.connect_dns)
+
+    async def sent(session, ctx, params):
+        ctx.trace_request_ctx.sent = time.monotonic()
+
+    async def headers(session, ctx, params):
+        timings = ctx.trace_request_ctx
+        timings.headers = time.monotonic()
+        if timings.sent is not None:
+            timings.ttfb += timings.headers - timings.sent
+
+    config = aiohttp.TraceConfig(trace_config_ctx_factory=_trace_context)
+    config.on_dns_resolvehost_start.append(dns_start)
+    config.on_dns_resolvehost_end.append(dns_end)
+    config.on_connection_create_start.append(connect_start)
+    config.on_connection_create_end.append(connect_end)
+    config.on_request_headers_sent.append(sent)
+    config.on_request_redirect.append(headers)
+    config.on_request_end.append(headers)
+    return config
+
+
+def _trace_context(trace_request_ctx=None):
+    """Build the aiohttp trace context; untraced requests get a scratch one."""
+    return types.SimpleNamespace(
+        trace_request_ctx=trace_request_ctx or Timings())
@@ -0,0 +1,172 @@
+"""Response Validation.
+
+Endpoints may carry response assertions, checked against the body of every
+successful response.  An assertion is a dictionary; the supported kinds
+are::
+
+    {'contains': 'text'}                   the body contains the text
+    {'regex': 'pattern'}                   the pattern matches the body
+    {'json': 'data.items.0.id'}            the JSON path exists
+    {'json': 'status', 'equals': 'ok'}     the JSON path has the value
+
+Evaluating assertions on large bodies is CPU work that would serialize the
+request threads on the GIL.  A `Validator` with workers hands the work to
+a pool of processes instead, passing large bodies through shared memory
+rather than pickling them, so I/O stays on the request threads (or event
+loop) and validation runs on every core.
+
+"""
+import concurrent.futures
+import functools
+import json
+import logging
+import multiprocessing
+import re
+from multiprocessing import shared_memory
+
+
+# Bodies at least this large are handed to workers through shared memory
+SHARED_MEMORY_MIN_BYTES = 65536
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_pattern(pattern):
+    """Return the compiled bytes regex `pattern` (cached per process)."""
+    return re.compile(pattern.encode())
+
+
+def json_path(document, path):
+    """Return the value at the dotted `path` of `document`.
+
+    List items are addressed by index.  Raises `KeyError` if the path does
+    not exist.
+
+    """
+    value = document
+    for key in path.split('.') if path else ():
+        if isinstance(value, list):
+            try:
+                value = value[int(key)]
+            except (ValueError, IndexError):
+                raise KeyError(path)
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise KeyError(path)
+    return value
+
+
+def validate(assertions, body):
+    """Return why `body` fails `assertions`, or None if it passes.
+
+    `body` is any bytes-like object.
+
+    """
+    document = None
+    for assertion in assertions:
+        if 'contains' in assertion:
+            if compile_pattern(re.escape(assertion['contains'])) \
+                    .search(body) is None:
+                return f"Body does not contain {assertion['contains']!r}"
+        elif 'regex' in assertion:
+            if compile_pattern(assertion['regex']).search(body) is None:
+                return f"Body does not match {assertion['regex']!r}"
+        elif 'json' in assertion:
+            if document is None:
+                try:
+                    document = json.loads(bytes(body))
+                except ValueError as ex:
+                    return f"Body is not JSON: {ex}"
+            try:
+                value = json_path(document, assertion['json'])
+            except KeyError:
+                return f"JSON path {assertion['json']} not found"
+            if 'equals' in assertion and value != assertion['equals']:
+                return (f"JSON path {assertion['json']} is {value!r}, "
+                        f"expected {assertion['equals']!r}")
+        else:
+            return f"Unknown assertion {assertion!r}"
+    return None
+
+
+def validate_shared(assertions, name, size):
+    """Worker entry point: validate a body left in shared memory `name`.
+
+    The body stays owned (and is unlinked) by the submitting process.
+
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        body = shm.buf[:size]
+        try:
+            return validate(assertions, body)
+        finally:
+            body.release()
+    finally:
+        shm.close()
+
+
+class Validator(object):
+    """Evaluate response assertions inline or in a process pool.
+
+    With no `workers` assertions are evaluated in the calling thread; with
+    `workers`, `start` creates a pool of that many processes.  `submit`
+    returns a `concurrent.futures.Future` either way.
+
+    Workers are spawned rather than forked: forking a process that is
+    running request threads could copy a lock held by one of them.
+
+    """
+
+    def __init__(self, workers=0, logger=None):
+        self.workers = workers
+        self.logger = logger or logging.getLogger(__name__)
+        self.pool = None
+
+    def start(self):
+        """Start the worker processes, if any."""
+        if self.workers and self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'))
+            self.logger.info(
+                f"Started {self.workers} response validation processes")
+
+    def stop(self):
+        """Stop the worker processes once queued validations finish."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def submit(self, assertions, body):
+        """Evaluate `assertions` against the bytes `body`.
+
+        Returns a future of the failure message, or of None if the body
+        passes.
+
+        """
+        if self.pool is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(validate(assertions, body))
+            except Exception as ex:
+                future.set_exception(ex)
+            return future
+        if len(body) < SHARED_MEMORY_MIN_BYTES:
+            return self.pool.submit(validate, assertions, body)
+
+        shm = shared_memory.SharedMemory(create=True, size=len(body))
+        shm.buf[:len(body)] = body
+        try:
+            future = self.pool.submit(validate_shared, assertions,
+                                      shm.name, len(body))
+        except Exception:
+            release(shm)
+            raise
+        future.add_done_callback(lambda f: release(shm))
+        return future
+
+
+def release(shm):
+    """Close and unlink the shared memory `shm`."""
+    shm.close()
+    shm.unlink()
@@ -0,0 +1,85 @@
+"""Check Runner.
+
+The check runner is the single process that schedules and runs checks.  Web
+workers started with ``CHECK_RUNNER`` set do not run checks themselves; they
+read results from (and send reloads to) the runner listening on that
+address, so web workers and checks scale independently.  Monitor edits reach
+the runner through the change feed (see `checks.changes`).  The runner and
+the web workers authenticate with ``CHECK_RUNNER_AUTHKEY``, which must be
+set::
+
+    export CHECK_RUNNER=127.0.0.1:5050
+    export CHECK_RUNNER_AUTHKEY=$(openssl rand -hex 32)
+    python -m runner &
+    gunicorn -w 4 app:app
+
+With ``RUNNER_SHARDING`` set, several runners sharing the database split
+the monitors between them (see `checks.shard`).  Give each runner its own
+``RUNNER_ADDRESS`` and list all of them in the web workers' ``CHECK_RUNNER``::
+
+    RUNNER_SHARDING=1 RUNNER_ADDRESS=127.0.0.1:5051 python -m runner &
+    RUNNER_SHARDING=1 RUNNER_ADDRESS=127.0.0.1:5052 python -m runner &
+    CHECK_RUNNER=127.0.0.1:5051,127.0.0.1:5052 gunicorn -w 4 app:app
+
+"""
+import logging
+import signal
+import threading
+import config
+from checks.remote import RunnerServer
+from checks.shard import HashRing, ShardCoordinator
+from webapp import create_app, db, requestManager, resultWriter, changeFeed
+from webapp.models import Monitor, RunnerLease
+
+config_class = config.configuration()
+address = config_class.RUNNER_ADDRESS or \
+    (config_class.CHECK_RUNNER or '127.0.0.1:5050').split(',')[0]
+
+
+def configure_logging(config):
+    """Configure runner logging."""
+    logging.basicConfig(
+        level=config.LOG_LEVEL,
+        format='[%(asctime)s] %(levelname)s '
+               'in %(module)s (%(threadName)s): %(message)s')
+
+
+def main():
+    """Load every enabled monitor, start checking and serve the results."""
+    configure_logging(config_class)
+    logger = logging.getLogger(__name__)
+    app = create_app(config_class, runner=True)
+
+    coordinator = None
+    if config_class.RUNNER_SHARDING:
+        coordinator = ShardCoordinator(
+            requestManager, config_class.RUNNER_NODE, address,
+            config_class.RUNNER_HEARTBEAT_INTERVAL,
+            config_class.RUNNER_LEASE_TTL, logger=logger)
+        with app.app_context():
+            coordinator.configure(db.engine, RunnerLease.__table__)
+        # own nothing until the coordinator has read the leases
+        requestManager.rebalance(HashRing([]), coordinator.node)
+
+    with app.app_context():
+        count = requestManager.load(Monitor.endpoints())
+    logger.info(f"Check runner loaded {count} monitors")
+    if coordinator is not None:
+        coordinator.start()
+
+    server = RunnerServer(requestManager, address,
+                          config_class.CHECK_RUNNER_AUTHKEY, logger=logger)
+    server.start()
+
+    done = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: done.set())
+    done.wait()
+
+    logger.info("Stopping the check runner")
+    server.stop()
+    changeFeed.stop()
+    if coordinator is not None:
+        coordinator.stop()
+    requestManager.stop(join=True)
+    resultWriter.stop()
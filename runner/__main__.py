@@ -0,0 +1,4 @@
+"""Run the check runner: ``python -m runner``."""
+from runner import main
+
+main()
@@ -14,6 +14,7 @@ setup(
     long_description=__doc__,
     packages=['webapp'],
     include_package_data=True,
+    python_requires='>=3.8',
     setup_requires=[
         'pytest-runner',
     ],
@@ -26,6 +27,7 @@ setup(
         'psycopg2-binary',
         'python-slugify',
         'requests',
+        'aiohttp',
         'sqlalchemy-json',
         'flask-wtf',
         'flask-moment',
@@ -3,6 +3,15 @@
 This package collects runtime statistics about the operating system and
 application.
 
+The collector thread never sleeps inside a probe: rates are computed from
+the counters and time of the previous sample.  Cheap probes (CPU, memory,
+network counters, request manager) run every `interval` seconds; probes
+that walk the process (threads and ``smaps`` memory) and its socket table
+run at their own, longer, intervals.
+
+Besides the graph windows in `stats`, the probes keep the raw psutil
+samples in one timestamped `snapshot`, so pages showing runtime details
+read what was last collected instead of probing the process themselves.
 
 """
 import logging
@@ -11,6 +20,7 @@ import psutil
 import os
 import threading
 import time
+import numpy as np
 from datetime import datetime, timezone
 
 
@@ -23,6 +33,44 @@ Thread = collections.namedtuple('Thread', [
 ])
 
 
+class Series(object):
+    """Fixed size window of ``(value, timestamp)`` samples.
+
+    Samples are kept in two preallocated arrays used as a ring buffer;
+    iterating yields the samples oldest first.
+
+    """
+
+    def __init__(self, size=30):
+        self.size = size
+        self.values = np.zeros(size)
+        self.timestamps = np.zeros(size)
+        self.count = 0
+
+    def append(self, value, ts):
+        """Add a sample, replacing the oldest when the window is full."""
+        i = self.count % self.size
+        self.values[i] = value
+        self.timestamps[i] = ts
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def __iter__(self):
+        start = self.count % self.size if self.count > self.size else 0
+        order = (np.arange(len(self)) + start) % self.size
+        return zip(self.values[order].tolist(),
+                   self.timestamps[order].tolist())
+
+    @property
+    def last(self):
+        """Return the latest value, or 0."""
+        if not self.count:
+            return 0
+        return self.values[(self.count - 1) % self.size].item()
+
+
 class RuntimeStats(object):
     """Runtime statistics object.
 
@@ -30,26 +78,28 @@ class RuntimeStats(object):
     statistics with a running window.  A window of stats are collected so that
     it can be graphed.
 
-    The stats data structure::
+    The stats data structure (every `Series` holds 30 samples)::
 
         {
           'stats': {
             'cpu': {
               'utilization': int,
-              'user': deque[30],
-              'system': deque[30],
-              'idle': deque[30]
+              'user': Series,
+              'system': Series,
+              'idle': Series
             },
             'memory': {
               'free': int,
               'consumed_by_stack': int,
-              'total': deque[30],
-              'available': deque[30]
+              'total': Series,
+              'available': Series
             },
             'network': {
               'connections_total': int,
-              'bytes_sent': deque[30],
-              'bytes_recv': deque[30],
+              'bytes_sent': Series,
+              'bytes_recv': Series,
+              'bytes_sent_s': Series,
+              'bytes_recv_s': Series,
               'connections': list(dict(connections))
             },
             'stack': {
@@ -58,6 +108,8 @@ class RuntimeStats(object):
               'rm_max_threads': int,
               'rm_running_threads': int,
               'queue_size': int,
+              'schedule': dict(schedule_timing),
+              'dns': dict(dns_cache_stats),
               'stack_threads': list(dict(app_threads)),
               'rm_threads': list(dict(requestManager_threads))
             }
@@ -65,205 +117,351 @@ class RuntimeStats(object):
         }
 
     """
+    # endpoints listed in the request manager's `timings`, by lag
+    WORST_TIMINGS = 10
+
+    def __init__(self, request_manager=None, interval=10,
+                 process_interval=60, connections_interval=60):
+        """Initialize the collector and start its thread.
 
-    def __init__(self, request_manager=None):
+        Args:
+            request_manager(`RequestsManager`): the manager to report on
+            interval(float): seconds between cheap samples
+            process_interval(float): seconds between samples of the
+                process' threads and unique memory
+            connections_interval(float): seconds between samples of the
+                process' sockets
+
+        """
         self._stats = {
             'cpu': {
                 'utilization': 0,
-                'user': collections.deque(maxlen=30),
-                'system': collections.deque(maxlen=30),
-                'idle': collections.deque(maxlen=30),
+                'user': Series(),
+                'system': Series(),
+                'idle': Series(),
             },
             'memory': {
                 'free': 0,
                 'consumed_by_stack': 0,
-                'total': collections.deque(maxlen=30),
-                'available': collections.deque(maxlen=30),
+                'used_pct': 0,
+                'total': Series(),
+                'available': Series(),
             },
             'network': {
                 'connections_total': 0,
-                'bytes_sent': collections.deque(maxlen=30),
-                'bytes_recv': collections.deque(maxlen=30),
-                'bytes_sent_s': collections.deque(maxlen=30),
-                'bytes_recv_s': collections.deque(maxlen=30),
+                'bytes_sent': Series(),
+                'bytes_recv': Series(),
+                'bytes_sent_s': Series(),
+                'bytes_recv_s': Series(),
                 'connections': []
             },
             'stack': {
-                'pid': 0,
-                'max_threads': 0,
+                'pid': os.getpid(),
+                'app_thread_count': 0,
                 'running_threads': 0,
+                'rm_max_threads': 0,
+                'rm_running_threads': 0,
                 'queue_size': 0,
+                'schedule': {},
+                'dns': {},
                 'stack_threads': [],
                 'rm_threads': []
             }
         }
 
+        # latest raw samples; see `snapshot`
+        self._system = {'cpu_percent': 0, 'cpu_times': None,
+                        'cpu_stats': None, 'memory': None, 'netio': None}
+        self._proc = {'pid': os.getpid(), 'thread_count': 0, 'threads': [],
+                      'connections': [], 'memory': None, 'created': None}
+        self._rm = {}
+        self._updated = None
+
         self.rm = request_manager
+        self.interval = interval
+        self.process_interval = process_interval
+        self.connections_interval = connections_interval
         self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
-        collect_thread = threading.Thread(target=self.collect, args=())
+        self.process = psutil.Process(os.getpid())
+        self._netio = None        # previous network counters and time
+        self._due = {}            # probe -> monotonic time it is next due
+        self.should_die = threading.Event()
+        collect_thread = threading.Thread(target=self.collect, args=(),
+                                          name="RuntimeStats")
         collect_thread.daemon = True
         collect_thread.start()
 
-    def _update_cpu(self, snapshot, ts):
+    def _update_cpu(self, ts):
         """Update CPU runtime statistics"""
-        _c = snapshot['system']
+        utilization = psutil.cpu_percent(interval=None)
+        times = psutil.cpu_times_percent(interval=None)
+        cpu_stats = psutil.cpu_stats()
         with self.lock:
-            self._stats['cpu']['utilization'] = _c.get('cpu_percent', 0)
-            self._stats['cpu']['user'].append(
-                (_c['cpu_times'].user, ts)
-            )
-            self._stats['cpu']['system'].append(
-                (_c['cpu_times'].system, ts)
-            )
-            self._stats['cpu']['idle'].append(
-                (_c['cpu_times'].idle, ts)
-            )
-
-    def _update_memory(self, snapshot, ts):
+            self._system['cpu_percent'] = utilization
+            self._system['cpu_times'] = times
+            self._system['cpu_stats'] = cpu_stats
+            self._stats['cpu']['utilization'] = utilization
+            self._stats['cpu']['user'].append(times.user, ts)
+            self._stats['cpu']['system'].append(times.system, ts)
+            self._stats['cpu']['idle'].append(times.idle, ts)
+
+    def _update_memory(self, ts):
         """Update Memory runtime statistics"""
-        _m = snapshot['system']['memory']
+        _m = psutil.virtual_memory()
         with self.lock:
+            self._system['memory'] = _m
             self._stats['memory']['free'] = _m.free
-            self._stats['memory']['consumed_by_stack'] = \
-                snapshot['proc']['memory'].uss
-            self._stats['memory']['total'].append(
-                (_m.total, ts)
-            )
-            self._stats['memory']['available'].append(
-                (_m.available, ts)
-            )
+            self._stats['memory']['total'].append(_m.total, ts)
+            self._stats['memory']['available'].append(_m.available, ts)
             self._stats['memory']['used_pct'] = _m.percent
 
-    def _update_network(self, snapshot, ts):
-        """Update Network runtime statistics"""
-        _n = snapshot['system']['netio']
+    def _update_network(self, ts):
+        """Update Network runtime statistics.
+
+        Rates are the change in the counters since the previous sample; the
+        first sample has no rate.
+
+        """
+        _n = psutil.net_io_counters()
+        previous, self._netio = self._netio, (_n, ts)
         with self.lock:
-            self._stats['network']['connections_total'] = \
-                len(snapshot['proc']['connections'])
-            self._stats['network']['bytes_sent'].append(
-                (_n.bytes_sent, ts)
-            )
-            self._stats['network']['bytes_recv'].append(
-                (_n.bytes_recv, ts)
-            )
+            self._system['netio'] = _n
+            self._stats['network']['bytes_sent'].append(_n.bytes_sent, ts)
+            self._stats['network']['bytes_recv'].append(_n.bytes_recv, ts)
+            if previous is None or ts <= previous[1]:
+                return
+            elapsed = ts - previous[1]
             self._stats['network']['bytes_sent_s'].append(
-                (snapshot['system']['netstats']['sent_s'], ts)
-            )
+                max(_n.bytes_sent - previous[0].bytes_sent, 0) / elapsed, ts)
             self._stats['network']['bytes_recv_s'].append(
-                (snapshot['system']['netstats']['recv_s'], ts)
-            )
-            self._stats['network']['connections'] = \
-                snapshot['proc']['connections']
+                max(_n.bytes_recv - previous[0].bytes_recv, 0) / elapsed, ts)
+
+    def _update_connections(self, ts):
+        """Update the sockets of the process (walks the socket tables)."""
+        connections = self.process.connections()
+        with self.lock:
+            self._proc['connections'] = connections
+            self._stats['network']['connections_total'] = len(connections)
+            self._stats['network']['connections'] = connections
 
-    def _update_stack(self, snapshot, ts):
+    def _update_process(self, ts):
+        """Update the threads and unique memory of the process.
+
+        The unique set size is read from ``smaps``, which is slow for large
+        processes.
+
+        """
+        threads = self.process.threads()
+        memory = self.process.memory_full_info()
+        with self.lock:
+            self._proc['threads'] = threads
+            self._proc['memory'] = memory
+            self._stats['memory']['consumed_by_stack'] = memory.uss
+            self._stats['stack']['running_threads'] = len(threads)
+            self._stats['stack']['stack_threads'] = threads
+
+    def _update_stack(self, ts):
         """Update the Flask Stack runtime statistics"""
-        _s = snapshot['proc']
-        _r = snapshot['requestManager']
+        thread_count = self.process.num_threads()
+        _r = self.request_manager['requestManager']
         with self.lock:
-            self._stats['stack']['pid'] = _s['pid']
-            self._stats['stack']['app_thread_count'] = _s['thread_count']
-            self._stats['stack']['running_threads'] = len(_s['threads'])
-            self._stats['stack']['stack_threads'] = _s['threads']
+            self._proc['thread_count'] = thread_count
+            self._rm = _r
+            self._stats['stack']['app_thread_count'] = thread_count
             if self.rm:
                 self._stats['stack']['rm_max_threads'] = _r['thread_count']
                 self._stats['stack']['rm_running_threads'] = \
                     _r['threads']['running']
                 self._stats['stack']['queue_size'] = _r['queue_size']
+                self._stats['stack']['schedule'] = _r['schedule']
+                self._stats['stack']['dns'] = _r['dns']
                 self._stats['stack']['rm_threads'] = _r['threads']['active']
 
     def update(self):
-        """Update the current stats window."""
+        """Run every probe that is due."""
+        with self.update_lock:
+            self._update()
 
+    def _update(self):
+        """Run every probe that is due; caller holds `update_lock`."""
         ts = datetime.now(timezone.utc).timestamp()
-        snapshot = self.snapshot
-        self._update_cpu(snapshot, ts)
-        self._update_memory(snapshot, ts)
-        self._update_network(snapshot, ts)
-        self._update_stack(snapshot, ts)
+        now = time.monotonic()
+        if self._proc['created'] is None:
+            self._proc['created'] = datetime.fromtimestamp(
+                self.process.create_time(), timezone.utc)
+        probes = (
+            (self._update_cpu, self.interval),
+            (self._update_memory, self.interval),
+            (self._update_network, self.interval),
+            (self._update_stack, self.interval),
+            (self._update_process, self.process_interval),
+            (self._update_connections, self.connections_interval),
+        )
+        for probe, interval in probes:
+            if self._due.get(probe.__name__, 0) > now:
+                continue
+            self._due[probe.__name__] = now + interval
+            try:
+                probe(ts)
+            except Exception:
+                self.logger.exception(f"Runtime stats {probe.__name__} failed")
+        with self.lock:
+            self._updated = datetime.fromtimestamp(ts, timezone.utc)
 
     @property
     def stats(self):
         """Return our window of stats"""
         return self._stats
 
+    @property
+    def snapshot(self):
+        """Return the latest raw samples.
+
+        The snapshot is a dictionary of the `timestamp` of the last update,
+        the ``system`` samples (`cpu_percent`, `cpu_times`, `cpu_stats`,
+        `memory`, `netio`), the ``proc`` samples (`pid`, `thread_count`,
+        `threads`, `connections`, `memory`, `created`) and the
+        ``requestManager`` state.  Nothing is probed unless nothing has
+        been collected yet.
+
+        """
+        if self._updated is None:
+            self.update()
+        with self.lock:
+            return {
+                'timestamp': self._updated,
+                'system': dict(self._system),
+                'proc': dict(self._proc),
+                'requestManager': dict(self._rm),
+            }
+
+    def gauges(self):
+        """Return the latest stats as gauges.
+
+        Gauges are ``(name, help, value[, labels])`` tuples, as
+        `checks.metrics.render` takes them.  Only values already collected
+        are read; nothing is measured here.
+
+        """
+        with self.lock:
+            cpu = self._stats['cpu']
+            memory = self._stats['memory']
+            network = self._stats['network']
+            stack = self._stats['stack']
+            schedule = stack.get('schedule') or {}
+            dns = stack.get('dns') or {}
+            gauges = [
+                ('epmonitor_cpu_utilization_percent',
+                 'System CPU utilization.', cpu['utilization']),
+                ('epmonitor_memory_free_bytes',
+                 'Free system memory.', memory['free']),
+                ('epmonitor_memory_available_bytes',
+                 'Available system memory.', memory['available'].last),
+                ('epmonitor_process_memory_bytes',
+                 'Unique memory of this process.',
+                 memory['consumed_by_stack']),
+                ('epmonitor_network_connections',
+                 'Open connections of this process.',
+                 network['connections_total']),
+                ('epmonitor_network_sent_bytes_per_second',
+                 'System network bytes sent per second.',
+                 network['bytes_sent_s'].last),
+                ('epmonitor_network_received_bytes_per_second',
+                 'System network bytes received per second.',
+                 network['bytes_recv_s'].last),
+                ('epmonitor_process_threads',
+                 'Threads of this process.',
+                 stack.get('app_thread_count', 0)),
+            ]
+        if schedule:
+            gauges += [
+                ('epmonitor_schedule_runs',
+                 'Checks run since the pool started.', schedule['runs']),
+                ('epmonitor_schedule_missed',
+                 'Checks skipped because the previous check overran.',
+                 schedule['missed']),
+                ('epmonitor_schedule_late',
+                 'Checks started at least a second after they were due.',
+                 schedule['late']),
+                ('epmonitor_schedule_in_flight',
+                 'Checks due and not yet finished.', schedule['in_flight']),
+                ('epmonitor_schedule_held',
+                 'Due checks held by the per-host concurrency limit.',
+                 schedule['held']),
+                ('epmonitor_schedule_lag_seconds',
+                 'Delay between when recent checks were due and started.',
+                 schedule['lag_p50'], {'quantile': '0.5'}),
+                ('epmonitor_schedule_lag_seconds',
+                 'Delay between when recent checks were due and started.',
+                 schedule['lag_p99'], {'quantile': '0.99'}),
+                ('epmonitor_schedule_queue_wait_seconds',
+                 'Time recent checks waited for a free worker.',
+                 schedule['queue_wait_p50'], {'quantile': '0.5'}),
+                ('epmonitor_schedule_queue_wait_seconds',
+                 'Time recent checks waited for a free worker.',
+                 schedule['queue_wait_p99'], {'quantile': '0.99'}),
+            ]
+        if dns:
+            gauges += [
+                ('epmonitor_dns_cache_entries',
+                 'Hosts held by the DNS cache.', dns['entries']),
+                ('epmonitor_dns_cache_hits',
+                 'Lookups answered by the DNS cache.', dns['hits']),
+                ('epmonitor_dns_cache_misses',
+                 'Lookups the DNS cache sent to the resolver.',
+                 dns['misses']),
+                ('epmonitor_dns_cache_negative_hits',
+                 'Lookups answered with a cached failure to resolve.',
+                 dns['negative_hits']),
+                ('epmonitor_dns_cache_failures',
+                 'Lookups the resolver failed.', dns['failures']),
+            ]
+        return gauges
+
+    def stop(self):
+        """Tell the collector thread to die."""
+        self.should_die.set()
+
     def collect(self):
         """Thread to collect runtime stats and populate internal stats"""
-        while True:  # terminates at application exit
+        while not self.should_die.is_set():  # or at application exit
             self.update()
-            time.sleep(10)  # collect every 10 seconds
+            wait = min(self._due.values()) - time.monotonic()
+            self.should_die.wait(max(wait, 0.1))
 
     @property
     def request_manager(self):
+        """Return the state of the request manager for the stats.
+
+        Threads are returned as `Thread` tuples, along with the `schedule`
+        timing summary, the `dns` cache counters and the `timings` of the
+        `WORST_TIMINGS` endpoints whose last run started latest (with `due`
+        and `started` as datetimes).
+
+        """
         if not self.rm:
             return {'requestManager': {}}
 
-        threads = self.rm.threads
-
-        # iterate over threads and build Thread tuples;
-        # doing this in a list comp is difficult to read
-        active_threads = []
-        for t in threads:
-            message = t.status.split(',')
-            endpoint = ''
-            frequency = ''
-            if len(message) > 0:
-                try:
-                    endpoint = message[1]
-                    frequency = message[2]
-                except IndexError as ex:
-                    pass
-            _t = Thread(
-                t.name,
-                message[0],
-                endpoint,
-                frequency,
-                t.is_alive()
-            )
-            active_threads.append(_t)
-
+        state = self.rm.state
+        timings = self.rm.timings(self.WORST_TIMINGS)
+        for timing in timings:
+            for key in ('due', 'started'):
+                timing[key] = datetime.fromtimestamp(timing[key], timezone.utc)
+        threads = [Thread(t['name'], t['status'], t['endpoint'] or '',
+                          t['frequency'] or '', t['alive'])
+                   for t in state['threads']]
         return {
             'requestManager': {
-                'thread_count': self.rm.thread_count,
-                'queue_size': self.rm.request_queue.qsize(),
+                'thread_count': state['thread_count'],
+                'queue_size': state['queue_size'],
+                'schedule': state['schedule'],
+                'dns': state['dns'],
+                'timings': timings,
                 'threads': {
                     'running': len(threads),
-                    'active': active_threads
-                }
-            }
-        }
-
-    @property
-    def system(self):
-        """Return a dictionary of system stats."""
-        p = psutil.Process(os.getpid())
-        net_before = psutil.net_io_counters()
-        time.sleep(1)
-        net_after = psutil.net_io_counters()
-        return {
-            'system': {
-                'cpu_percent': psutil.cpu_percent(interval=None),
-                'cpu_times': psutil.cpu_times_percent(interval=None),
-                'memory': psutil.virtual_memory(),
-                'netio': net_after,
-                'netstats': {
-                    'sent_s': net_after.bytes_sent - net_before.bytes_sent,
-                    'recv_s': net_after.bytes_recv - net_before.bytes_recv
+                    'active': threads
                 }
-            },
-            'proc': {
-                'pid': p.pid,
-                'parent': p.parent(),
-                'thread_count': p.num_threads(),
-                'threads': p.threads(),
-                'connections': p.connections(),
-                'memory': p.memory_full_info(),
-                'created': datetime.fromtimestamp(
-                    p.create_time(), timezone.utc)
             }
         }
-
-    @property
-    def snapshot(self):
-        """Return a snapshot of current runtime stats."""
-        return {**self.system, **self.request_manager}
@@ -0,0 +1,123 @@
+"""Shared test fixtures."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from checks.endpoint import Endpoint
+from config import DebugConfig
+
+
+class TargetHandler(BaseHTTPRequestHandler):
+    """Answers checks of the local target.
+
+    ``/status/<code>`` answers with that status, ``?bytes=`` sets the size
+    of the body (``hello world`` by default), ``?cookie`` sets a cookie and
+    ``/json`` answers with a JSON document.
+
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super(TargetHandler, self).setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        status = 200
+        body = b'hello world'
+        content_type = 'text/plain'
+        if url.path.startswith('/status/'):
+            status = int(url.path.rsplit('/', 1)[1])
+        elif url.path == '/json':
+            body = b'{"status": "ok", "items": [{"id": 7}]}'
+            content_type = 'application/json'
+        if 'bytes' in query:
+            body = b'x' * int(query['bytes'][0])
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if 'cookie' in query:
+            self.send_header('Set-Cookie', 'session=1; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def target():
+    """Serve a local HTTP target; yields the server, `port` set."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TargetHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def target_endpoint(target):
+    """Return a factory of endpoints checking `path` of the local target."""
+    def make(slug, path='/', frequency=1, **attributes):
+        ep = Endpoint(slug)
+        ep.name = slug
+        ep.frequency = frequency
+        ep.scheme = 'http'
+        ep.server = '127.0.0.1'
+        ep.port = target.port
+        ep.path = path
+        ep.timeout = 2
+        for name, value in attributes.items():
+            setattr(ep, name, value)
+        return ep
+    return make
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Return the web application over a scratch SQLite database.
+
+    Checks run in process, but with no worker threads and no result store;
+    tests add results to the request manager themselves.
+
+    """
+    from webapp import create_app, db, requestManager, changeFeed
+
+    class AppConfig(DebugConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = \
+            f"sqlite:///{tmp_path_factory.mktemp('db') / 'monitor.db'}"
+        CHECK_RUNNER = None
+        REQUEST_THREADS = 0
+        RESULT_STORE = False
+        STREAM_INTERVAL = 0.05
+
+    app = create_app(AppConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    changeFeed.stop()
+    requestManager.stop(join=True)
+
+
+@pytest.fixture
+def client(app):
+    """Return a test client of `app`, with every table emptied after."""
+    from webapp import db
+    yield app.test_client()
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
@@ -0,0 +1,142 @@
+"""JSON API tests."""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from checks.endpoint import HTTPVerb
+from checks.results import RequestDimension
+from checks.store import ResultWriter
+from webapp import db, requestManager, resultBroadcast
+from webapp.models import CheckResult, Monitor
+
+START = datetime.now(timezone.utc).replace(microsecond=0) - \
+    timedelta(minutes=30)
+
+
+def result(seconds=0, status=True):
+    date = START + timedelta(seconds=seconds)
+    return RequestDimension(
+        date=date, timestamp=date.timestamp(), status=status,
+        status_code=200 if status else 500, TTFB=1.0, elapsed=2.0, size=11,
+        digest=None, sample=None, message=None, dns=0.0, connect=0.0,
+        tls=0.0, transfer=0.0, throttle=0.0)
+
+
+@pytest.fixture
+def monitors(app, client):
+    """Add monitors, each with a result in the request manager."""
+    def add(*slugs):
+        with app.app_context():
+            for slug in slugs:
+                db.session.add(Monitor(
+                    name=slug, slug=slug, frequency=60, scheme='http',
+                    server='127.0.0.1', port=80, path='/',
+                    verb=HTTPVerb.GET, enabled=True))
+            db.session.commit()
+            requestManager.load(Monitor.endpoints())
+        for slug in slugs:
+            requestManager.results.append(slug, result())
+    yield add
+    requestManager.load([])
+
+
+@pytest.fixture
+def stored(app, monitors):
+    """Add the monitor `a` with `count` stored results, two per second."""
+    def add(count):
+        monitors('a')
+        with app.app_context():
+            db.session.execute(CheckResult.__table__.insert(), [
+                ResultWriter.row('a', result(i // 2)) for i in range(count)])
+            db.session.commit()
+    return add
+
+
+def test_responses_are_conditional(client, monitors):
+    monitors('a')
+    response = client.get('/api/v1/latest')
+    assert response.status_code == 200
+    assert json.loads(response.data)['data']['a']['status_code'] == 200
+    etag = response.headers['ETag']
+    response = client.get('/api/v1/latest',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    requestManager.results.append('a', result(1, status=False))
+    response = client.get('/api/v1/latest',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_large_responses_are_gzipped(client, monitors):
+    monitors(*(f"monitor-{i}" for i in range(20)))
+    plain = client.get('/api/v1/monitors')
+    assert 'Content-Encoding' not in plain.headers
+    response = client.get('/api/v1/monitors',
+                          headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == plain.headers['ETag']
+    assert gzip.decompress(response.data) == plain.data
+    assert len(json.loads(plain.data)['data']) == 20
+
+
+def test_small_responses_are_not_gzipped(client, monitors):
+    monitors('a')
+    response = client.get('/api/v1/summaries',
+                          headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_pages_follow_the_next_cursor(client, stored):
+    stored(25)
+    url = f"/api/v1/monitors/a/results?start={START.timestamp()}&limit=10"
+    pages = []
+    while url:
+        page = json.loads(client.get(url).data)
+        pages.append(page['data'])
+        url = page['next']
+    assert [len(page) for page in pages] == [10, 10, 5]
+    timestamps = [r['timestamp'] for page in pages for r in page]
+    assert timestamps == sorted(timestamps)
+    assert len(timestamps) == 25
+
+
+@pytest.mark.parametrize('query, status', [
+    ('start=1e20', 400),
+    ('start=yesterday', 400),
+    ('cursor=nope', 400),
+    ('tier=7', 400),
+    ('limit=0', 400),
+    ('range=1y', 400),
+])
+def test_invalid_arguments_are_rejected(client, monitors, query, status):
+    monitors('a')
+    response = client.get(f"/api/v1/monitors/a/results?{query}")
+    assert response.status_code == status
+    assert json.loads(response.data)['error']
+
+
+def test_unknown_monitors_are_not_found(client):
+    response = client.get('/api/v1/monitors/missing')
+    assert response.status_code == 404
+
+
+def test_streams_start_with_every_latest_result(client, monitors,
+                                                monkeypatch):
+    monkeypatch.setattr(resultBroadcast, 'backlog', 10)
+    slugs = {f"monitor-{i}" for i in range(50)}
+    monitors(*slugs)
+    response = client.get('/api/v1/stream', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    events = []
+    chunks = iter(response.response)
+    try:
+        while len(events) < len(slugs):
+            chunk = next(chunks)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith('event: result'):
+                events.append(json.loads(chunk.split('data: ', 1)[1]))
+    finally:
+        response.close()
+    assert {event['slug'] for event in events} == slugs
+    assert resultBroadcast.clients == 0
@@ -0,0 +1,53 @@
+"""Response body digest tests."""
+import hashlib
+import time
+import pytest
+from checks.body import ResponseBody
+from checks.manager import RequestsManager
+
+
+def test_bodies_under_the_limit_are_read_whole():
+    body = ResponseBody(max_bytes=100)
+    assert body.feed(b'hello ')
+    assert body.feed(b'world')
+    assert (body.size, body.truncated) == (11, False)
+    assert body.digest == hashlib.sha256(b'hello world').hexdigest()
+    assert body.sample is None and body.content is None
+
+
+def test_bodies_over_the_limit_are_truncated():
+    body = ResponseBody(max_bytes=8, keep=True)
+    assert body.feed(b'hello ')
+    assert not body.feed(b'world')
+    assert (body.size, body.truncated) == (8, True)
+    assert body.digest == hashlib.sha256(b'hello wo').hexdigest()
+    assert body.content == b'hello wo'
+
+
+def test_the_start_of_the_body_is_sampled():
+    body = ResponseBody(sample_bytes=4)
+    for chunk in (b'he', b'llo', b' world'):
+        body.feed(chunk)
+    assert body.sample == b'hell'
+
+
+@pytest.fixture(params=['threads', 'asyncio'])
+def manager(request):
+    manager = RequestsManager(thread_count=1, engine=request.param,
+                              spread=False, body_limit=1000, body_sample=5)
+    yield manager
+    manager.stop()
+
+
+def test_checks_read_at_most_the_body_limit(manager, target_endpoint):
+    manager.load([target_endpoint('big', '/?bytes=100000'),
+                  target_endpoint('small', '/')])
+    deadline = time.monotonic() + 10
+    while len(manager.latest) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    latest = manager.latest
+    assert latest['big'].size == 1000
+    assert latest['big'].digest == hashlib.sha256(b'x' * 1000).hexdigest()
+    assert latest['big'].sample == b'xxxxx'
+    assert latest['small'].size == len('hello world')
+    assert latest['small'].sample == b'hello'
@@ -0,0 +1,78 @@
+"""Result broadcast tests."""
+import collections
+import time
+import pytest
+from checks.broadcast import ResultBroadcast, Subscription
+
+Result = collections.namedtuple('Result', 'timestamp')
+
+
+class Manager(object):
+    """Serves a fixed set of latest results."""
+
+    def __init__(self, count, timestamp=1):
+        self.latest = {f"monitor-{i}": Result(timestamp)
+                       for i in range(count)}
+
+
+@pytest.fixture
+def broadcast():
+    broadcast = ResultBroadcast(Manager(2000), interval=0.01, max_clients=2,
+                                backlog=100)
+    yield broadcast
+    for subscription in list(broadcast.subscriptions):
+        broadcast.unsubscribe(subscription)
+    if broadcast.thread is not None:
+        broadcast.thread.join()
+
+
+def test_snapshot_larger_than_the_backlog_is_sent(broadcast):
+    broadcast.publish(broadcast.manager.latest)
+    subscription = broadcast.subscribe()
+    results = subscription.get(timeout=1)
+    assert len(results) == 2000
+    assert not subscription.closed
+
+
+def test_first_read_larger_than_the_backlog_is_sent(broadcast):
+    subscription = broadcast.subscribe()
+    results = []
+    deadline = time.monotonic() + 2
+    while len(results) < 2000 and time.monotonic() < deadline:
+        results += subscription.get(timeout=0.1)
+    assert len(results) == 2000
+    assert not subscription.closed
+    assert broadcast.clients == 1
+
+
+def test_slugs_limit_the_snapshot(broadcast):
+    broadcast.publish(broadcast.manager.latest)
+    subscription = broadcast.subscribe({'monitor-1', 'monitor-2'})
+    assert sorted(s for s, r in subscription.get(timeout=1)) == \
+        ['monitor-1', 'monitor-2']
+
+
+def test_streams_falling_behind_are_closed():
+    subscription = Subscription(backlog=2, snapshot={'a': Result(1)})
+    assert subscription.put('b', Result(1))
+    assert subscription.put('a', Result(2))
+    assert subscription.put('a', Result(3))
+    assert not subscription.put('a', Result(4))
+    assert subscription.closed
+    assert [r.timestamp for s, r in subscription.get()] == [1, 1, 2, 3]
+
+
+def test_clients_over_the_limit_are_refused(broadcast):
+    assert broadcast.subscribe() is not None
+    assert broadcast.subscribe() is not None
+    assert broadcast.subscribe() is None
+
+
+def test_reader_stops_without_subscribers(broadcast):
+    subscription = broadcast.subscribe()
+    thread = broadcast.thread
+    broadcast.unsubscribe(subscription)
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert broadcast.thread is None
+    assert broadcast.latest == {}
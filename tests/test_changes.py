@@ -0,0 +1,50 @@
+"""Monitor change feed tests."""
+import queue
+import pytest
+import sqlalchemy as sa
+from checks.changes import ChangeFeed
+
+
+@pytest.fixture
+def feed():
+    feed = ChangeFeed(batch_interval=0.2)
+    batches = queue.Queue()
+    feed.subscribe(batches.put)
+    yield feed, batches
+    feed.stop()
+
+
+def test_changes_are_delivered_in_batches(feed):
+    feed, batches = feed
+    feed.publish('a', 'b')
+    feed.publish('b', 'c')
+    assert batches.get(timeout=2) == {'a', 'b', 'c'}
+    feed.publish('d')
+    assert batches.get(timeout=2) == {'d'}
+
+
+def test_publishing_nothing_delivers_nothing(feed):
+    feed, batches = feed
+    feed.publish()
+    with pytest.raises(queue.Empty):
+        batches.get(timeout=0.5)
+
+
+def test_a_failing_subscriber_keeps_the_feed_alive():
+    feed = ChangeFeed(batch_interval=0)
+    batches = queue.Queue()
+
+    def apply(slugs):
+        batches.put(slugs)
+        raise ValueError("bad monitor")
+    feed.subscribe(apply)
+    feed.publish('a')
+    feed.publish('b')
+    assert batches.get(timeout=2) | batches.get(timeout=2) == {'a', 'b'}
+    feed.stop()
+
+
+def test_only_postgres_shares_changes_between_processes():
+    feed = ChangeFeed()
+    feed.configure(sa.create_engine('sqlite://'))
+    assert not feed.shared
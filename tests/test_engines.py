@@ -0,0 +1,60 @@
+"""Check engine tests."""
+import time
+import pytest
+from checks.manager import RequestsManager
+
+
+def wait_for_results(manager, slugs, count=1, timeout=10):
+    """Wait until every slug has `count` results; return the latest."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(len(manager.results_of(s)) >= count for s in slugs):
+            break
+        time.sleep(0.05)
+    return manager.latest
+
+
+@pytest.fixture(params=['threads', 'asyncio'])
+def manager(request):
+    manager = RequestsManager(thread_count=4, engine=request.param,
+                              concurrency=10, spread=False)
+    yield manager
+    manager.stop()  # workers exit at their next queue timeout
+
+
+def test_checks_record_their_results(manager, target_endpoint):
+    manager.load([target_endpoint('ok', '/'),
+                  target_endpoint('error', '/status/500'),
+                  target_endpoint('big', '/?bytes=5000')])
+    latest = wait_for_results(manager, ['ok', 'error', 'big'])
+    assert latest['ok'].status and latest['ok'].status_code == 200
+    assert latest['ok'].size == len('hello world')
+    assert latest['error'].status_code == 500
+    assert latest['big'].size == 5000
+    assert latest['ok'].elapsed >= latest['ok'].TTFB > 0
+
+
+def test_unreachable_targets_fail_the_check(manager, target_endpoint):
+    manager.load([target_endpoint('closed', port=1)])
+    result = wait_for_results(manager, ['closed'])['closed']
+    assert not result.status
+    assert result.status_code == 0
+    assert result.message
+
+
+def test_endpoints_are_checked_every_frequency(manager, target_endpoint):
+    manager.load([target_endpoint('ok', '/')])
+    wait_for_results(manager, ['ok'], count=2, timeout=5)
+    first, second = manager.results_of('ok')[:2]
+    assert second.timestamp - first.timestamp == pytest.approx(1, abs=0.3)
+    assert manager.state['schedule']['missed'] == 0
+
+
+def test_stop_returns_every_endpoint_to_the_schedule(manager,
+                                                     target_endpoint):
+    endpoints = [target_endpoint(f"ok-{i}", '/') for i in range(20)]
+    manager.load(endpoints)
+    wait_for_results(manager, [ep.slug for ep in endpoints])
+    manager.stop(join=True)
+    assert manager.scheduler.endpoint_count == 20
+    assert all(ep in manager.scheduler for ep in endpoints)
@@ -0,0 +1,69 @@
+"""Request manager tests."""
+import time
+from datetime import datetime, timezone
+import pytest
+from checks.endpoint import Endpoint
+from checks.manager import RequestsManager
+from checks.results import RequestDimension
+
+
+def endpoint(slug, frequency=3600, updated=1):
+    ep = Endpoint(slug)
+    ep.name = slug
+    ep.frequency = frequency
+    ep.updated = updated
+    return ep
+
+
+def result(timestamp=1.0):
+    return RequestDimension(
+        date=datetime.fromtimestamp(timestamp, timezone.utc),
+        timestamp=timestamp, status=True, status_code=200, TTFB=1.0,
+        elapsed=2.0, size=0, digest=None, sample=None, message=None, dns=0.0,
+        connect=0.0, tls=0.0, transfer=0.0, throttle=0.0)
+
+
+@pytest.fixture
+def manager():
+    # no workers: checks are scheduled but never run
+    manager = RequestsManager(thread_count=0)
+    yield manager
+    manager.stop(join=True)
+
+
+def test_load_drops_the_results_of_monitors_not_reloaded(manager):
+    manager.load([endpoint('a'), endpoint('b')])
+    manager.results.append('a', result())
+    manager.results.append('b', result())
+    requested = manager.results._requested
+    manager.load([endpoint('a')])
+    assert set(manager.latest) == {'a'}
+    assert 'b' not in manager.summaries
+    assert manager.results._requested == requested / 2
+
+
+def test_sync_applies_changes_without_a_reload(manager):
+    manager.load([endpoint('a'), endpoint('b')])
+    manager.results.append('a', result())
+    counts = manager.sync([endpoint('a', updated=2), endpoint('c')], ['b'],
+                          start=False)
+    assert counts == {'added': 1, 'updated': 1, 'removed': 1}
+    assert manager.versions == {'a': 2, 'c': 1}
+    assert 'b' not in manager.results
+    assert manager.latest['a'].timestamp == 1.0
+
+
+def test_sync_pulls_in_a_shortened_frequency(manager):
+    manager.load([endpoint('a')])
+    due = manager.scheduler._entries[manager.endpoints['a']][0]
+    manager.sync([endpoint('a', frequency=10)])
+    assert manager.scheduler._entries[manager.endpoints['a']][0] <= \
+        min(due, time.monotonic() + 10)
+
+
+def test_monitors_checked_more_than_once_a_second_are_not_loaded(manager):
+    assert manager.load([endpoint('a', frequency=0)]) == 1
+    assert manager.endpoints == {}
+    manager.sync([endpoint('b')])
+    manager.sync([endpoint('b', frequency=0)])
+    assert 'b' not in manager.endpoints
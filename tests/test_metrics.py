@@ -0,0 +1,80 @@
+"""Prometheus metrics tests."""
+from datetime import datetime, timezone
+from checks import metrics
+from checks.endpoint import Endpoint
+from checks.results import RequestDimension
+from webapp import requestManager
+
+
+def result(elapsed=20.0, status=True, timestamp=1.5):
+    return RequestDimension(
+        date=datetime.fromtimestamp(timestamp, timezone.utc),
+        timestamp=timestamp, status=status,
+        status_code=200 if status else 0, TTFB=1.0, elapsed=elapsed,
+        size=0, digest=None, sample=None, message=None, dns=0.0,
+        connect=0.0, tls=0.0, transfer=0.0, throttle=0.0)
+
+
+def samples(text):
+    """Return the samples of an exposition, keyed by name and labels."""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if not line.startswith('#')}
+
+
+def test_checks_are_counted_into_the_histogram():
+    check = metrics.CheckMetrics('a')
+    check.add(result(elapsed=20.0))        # 0.02s
+    check.add(result(elapsed=3000.0))      # 3s
+    check.add(result(elapsed=60000.0, status=False))
+    exposed = samples(metrics.render(metrics.collect([check])))
+    name = 'epmonitor_check_duration_seconds'
+    assert exposed[f'{name}_bucket{{monitor="a",le="0.01"}}'] == 0
+    assert exposed[f'{name}_bucket{{monitor="a",le="0.025"}}'] == 1
+    assert exposed[f'{name}_bucket{{monitor="a",le="5.0"}}'] == 2
+    assert exposed[f'{name}_bucket{{monitor="a",le="+Inf"}}'] == 3
+    assert exposed[f'{name}_count{{monitor="a"}}'] == 3
+    assert exposed[f'{name}_sum{{monitor="a"}}'] == 63.02
+    assert exposed['epmonitor_checks_total{monitor="a",result="failure"}'] \
+        == 1
+    assert exposed['epmonitor_check_up{monitor="a"}'] == 0
+    assert exposed['epmonitor_check_status_code{monitor="a"}'] == 0
+
+
+def test_families_are_declared_once():
+    checks = [metrics.CheckMetrics(slug) for slug in 'ab']
+    for check in checks:
+        check.add(result())
+    text = metrics.render(metrics.collect(checks + [
+        metrics.CheckMetrics('never-checked')]), [
+        ('epmonitor_dns', 'DNS.', 1, {'kind': 'hits'}),
+        ('epmonitor_dns', 'DNS.', 2, {'kind': 'misses'})])
+    for name, kind, _ in metrics.CHECK_FAMILIES:
+        assert text.count(f'# TYPE {name} {kind}\n') == 1
+    assert text.count('# TYPE epmonitor_dns gauge\n') == 1
+    assert 'never-checked' not in text
+    assert samples(text)['epmonitor_dns{kind="misses"}'] == 2
+
+
+def test_label_values_are_escaped():
+    assert metrics.labels(monitor='a"b\\c\nd') == \
+        '{monitor="a\\"b\\\\c\\nd"}'
+
+
+def test_the_metrics_page_exports_every_monitor(client):
+    endpoints = [Endpoint(slug) for slug in ('a', 'b')]
+    for ep in endpoints:
+        ep.frequency = 60
+    requestManager.load(endpoints)
+    try:
+        requestManager.results.append('a', result())
+        response = client.get('/metrics')
+    finally:
+        requestManager.load([])
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    exposed = samples(response.get_data(as_text=True))
+    assert exposed['epmonitor_checks_total{monitor="a",result="success"}'] \
+        == 1
+    assert 'epmonitor_check_up{monitor="b"}' not in exposed
+    assert exposed['epmonitor_pool_endpoints'] == 2
+    assert exposed['epmonitor_pool_threads'] == 0
@@ -0,0 +1,59 @@
+"""Per-host rate limit tests."""
+import pytest
+from checks.endpoint import Endpoint
+from checks.ratelimit import HostLimiter, TokenBucket
+
+
+def endpoint(server='example.com', port=80):
+    ep = Endpoint(f"{server}-{port}")
+    ep.server = server
+    ep.port = port
+    return ep
+
+
+def test_burst_is_free_then_reservations_queue_up():
+    bucket = TokenBucket(rate=2, burst=3, now=0)
+    assert [bucket.reserve(0) for _ in range(3)] == [0, 0, 0]
+    assert [bucket.reserve(0) for _ in range(3)] == \
+        pytest.approx([0.5, 1.0, 1.5])
+
+
+def test_tokens_refill_at_the_rate_up_to_the_burst():
+    bucket = TokenBucket(rate=1, burst=2, now=0)
+    bucket.reserve(0)
+    bucket.reserve(0)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(1)
+    bucket = TokenBucket(rate=1, burst=2, now=0)
+    assert [bucket.reserve(100) for _ in range(3)] == \
+        pytest.approx([0, 0, 1])
+
+
+def test_reservations_beyond_max_wait_are_refused():
+    bucket = TokenBucket(rate=1, burst=1, now=0, max_wait=2)
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == pytest.approx(1)
+    assert bucket.reserve(0) == pytest.approx(2)
+    assert bucket.reserve(0) is None
+    assert bucket.reserve(0) is None
+    assert bucket.reserve(1) == pytest.approx(2)
+
+
+def test_no_rate_is_no_limit():
+    limiter = HostLimiter()
+    assert all(limiter.reserve(endpoint()) == 0 for _ in range(100))
+
+
+def test_limits_are_kept_per_server_and_port():
+    limiter = HostLimiter(rate=1, burst=1)
+    assert limiter.reserve(endpoint()) == 0
+    assert limiter.reserve(endpoint(port=8080)) == 0
+    assert limiter.reserve(endpoint('other.example.com')) == 0
+    assert limiter.reserve(endpoint()) == pytest.approx(1, abs=0.01)
+
+
+def test_clear_forgets_reservations():
+    limiter = HostLimiter(rate=1, burst=1)
+    limiter.reserve(endpoint())
+    limiter.clear()
+    assert limiter.reserve(endpoint()) == 0
@@ -0,0 +1,80 @@
+"""Check runner server and remote manager tests."""
+import time
+import pytest
+import webapp
+from checks.manager import RequestsManager
+from checks.remote import (RemoteRequestsManager, RunnerError, RunnerServer,
+                           parse_address)
+from config import DebugConfig
+
+AUTHKEY = b'test-runner-key'
+
+
+class Manager(object):
+    """Stands in for the runner's `RequestsManager`."""
+
+    latest = {'a': 1}
+    secret = 'not served'
+
+    def summary(self, slug):
+        return {'slug': slug}
+
+
+@pytest.fixture
+def runner(tmp_path):
+    address = str(tmp_path / 'runner.sock')
+    server = RunnerServer(Manager(), address, AUTHKEY)
+    server.start()
+    deadline = time.monotonic() + 2
+    while server.listener is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield address
+    server.stop()
+
+
+def test_addresses_are_parsed():
+    assert parse_address('10.0.0.1:5050') == ('10.0.0.1', 5050)
+    assert parse_address(':5050') == ('127.0.0.1', 5050)
+    assert parse_address('/run/runner.sock') == '/run/runner.sock'
+
+
+@pytest.mark.parametrize('authkey', [b'', None])
+def test_runners_need_an_authkey(tmp_path, authkey):
+    with pytest.raises(RunnerError):
+        RunnerServer(Manager(), str(tmp_path / 'runner.sock'), authkey)
+    with pytest.raises(RunnerError):
+        RemoteRequestsManager(str(tmp_path / 'runner.sock'), authkey)
+
+
+def test_calls_are_served(runner):
+    manager = RemoteRequestsManager(runner, AUTHKEY)
+    assert manager.latest == {'a': 1}
+    assert manager.summary('b') == {'slug': 'b'}
+
+
+def test_only_runner_methods_are_served(runner):
+    manager = RemoteRequestsManager(runner, AUTHKEY)
+    with pytest.raises(RunnerError):
+        manager.call('secret')
+
+
+def test_a_wrong_key_is_refused(runner):
+    manager = RemoteRequestsManager(runner, b'wrong-key', timeout=1)
+    with pytest.raises(RunnerError):
+        manager.call('latest')
+    assert manager.latest == {}
+
+
+@pytest.mark.parametrize('runner, manager_class', [
+    (True, RequestsManager), (False, RemoteRequestsManager)])
+def test_only_the_runner_runs_checks_with_check_runner_set(
+        monkeypatch, runner, manager_class):
+    class RunnerConfig(DebugConfig):
+        CHECK_RUNNER = '127.0.0.1:5050'
+        CHECK_RUNNER_AUTHKEY = AUTHKEY
+
+    monkeypatch.setattr(webapp, '_requestManager', None)
+    webapp.create_request_manager(RunnerConfig, runner=runner)
+    assert isinstance(webapp.requestManager._get_current_object(),
+                      manager_class)
+    assert RunnerConfig.CHECK_RUNNER == '127.0.0.1:5050'
@@ -0,0 +1,94 @@
+"""DNS cache tests."""
+import asyncio
+import socket
+import pytest
+from checks.resolver import CachedResolver, DNSCache, merge_stats
+
+
+class Resolver(object):
+    """Counts lookups and answers every name with one address."""
+
+    def __init__(self, fail=()):
+        self.lookups = []
+        self.fail = fail
+
+    def __call__(self, host, port, family=0, type=0):
+        self.lookups.append(host)
+        if host in self.fail:
+            raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '',
+                 ('192.0.2.1', port))]
+
+
+def test_answers_are_cached_for_the_ttl():
+    resolver = Resolver()
+    cache = DNSCache(ttl=60, resolver=resolver)
+    first = cache.getaddrinfo('example.com', 443)
+    assert cache.getaddrinfo('example.com', 443) == first
+    assert resolver.lookups == ['example.com']
+    assert (cache.stats['hits'], cache.stats['misses']) == (1, 1)
+    cache.getaddrinfo('example.com', 80)
+    assert len(resolver.lookups) == 2
+
+
+def test_expired_answers_are_resolved_again():
+    resolver = Resolver()
+    cache = DNSCache(ttl=0, resolver=resolver)
+    cache.getaddrinfo('example.com', 443)
+    cache.getaddrinfo('example.com', 443)
+    assert resolver.lookups == ['example.com', 'example.com']
+
+
+def test_failures_are_cached_for_the_negative_ttl():
+    resolver = Resolver(fail={'missing.example'})
+    cache = DNSCache(resolver=resolver)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.getaddrinfo('missing.example', 443)
+    assert resolver.lookups == ['missing.example']
+    assert cache.stats['failures'] == 1
+    assert cache.stats['negative_hits'] == 1
+
+
+def test_addresses_and_disabled_caches_skip_the_cache():
+    resolver = Resolver()
+    cache = DNSCache(resolver=resolver)
+    assert cache.getaddrinfo('127.0.0.1', 80)[0][4] == ('127.0.0.1', 80)
+    cache.enabled = False
+    assert not cache.caches('localhost')
+    assert resolver.lookups == []
+
+
+def test_expired_entries_are_dropped_when_full():
+    cache = DNSCache(ttl=0, max_entries=2, resolver=Resolver())
+    for i in range(5):
+        cache.getaddrinfo(f"host-{i}.example", 443)
+    assert cache.stats['entries'] <= 2
+
+
+def test_stats_of_several_caches_merge():
+    merged = merge_stats([
+        {'enabled': False, 'entries': 1, 'hits': 2, 'misses': 3,
+         'negative_hits': 0, 'failures': 1},
+        {'enabled': True, 'entries': 4, 'hits': 5, 'misses': 6,
+         'negative_hits': 1, 'failures': 0},
+    ])
+    assert merged == {'enabled': True, 'entries': 5, 'hits': 7, 'misses': 9,
+                      'negative_hits': 1, 'failures': 1}
+
+
+def test_the_aiohttp_resolver_answers_from_the_cache():
+    resolver = Resolver()
+    cache = DNSCache(resolver=resolver)
+    aiohttp_resolver = CachedResolver(cache)
+
+    async def resolve():
+        return [await aiohttp_resolver.resolve('example.com', 443)
+                for _ in range(2)]
+
+    first, second = asyncio.run(resolve())
+    assert first == second == [{
+        'hostname': 'example.com', 'host': '192.0.2.1', 'port': 443,
+        'family': socket.AF_INET, 'proto': 6,
+        'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}]
+    assert resolver.lookups == ['example.com']
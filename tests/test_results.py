@@ -0,0 +1,103 @@
+"""Result window and store tests."""
+import hashlib
+import pickle
+from datetime import datetime, timezone
+import pytest
+from checks.results import RequestDimension, ResultStore, SLOT_BYTES
+
+
+def result(timestamp, elapsed=10.0, status=True, digest=None, message=None,
+           sample=None):
+    return RequestDimension(
+        date=datetime.fromtimestamp(timestamp, timezone.utc),
+        timestamp=timestamp, status=status, status_code=200 if status else 0,
+        TTFB=elapsed / 2, elapsed=elapsed, size=100, digest=digest,
+        sample=sample, message=message, dns=1.0, connect=2.0, tls=0.0,
+        transfer=3.0, throttle=0.0)
+
+
+def test_window_keeps_the_latest_results_oldest_first():
+    store = ResultStore(window_size=3)
+    store.resize('a')
+    for i in range(5):
+        store.append('a', result(i, elapsed=i * 10.0))
+    window = store.results_of('a')
+    assert [r.timestamp for r in window] == [2, 3, 4]
+    assert list(window.elapsed) == [20, 30, 40]
+    assert store.latest()['a'].timestamp == 4
+    assert store.summary('a')['mean'] == pytest.approx(30)
+
+
+def test_results_without_a_window_are_ignored():
+    store = ResultStore()
+    store.append('unknown', result(1))
+    store.resize('a')
+    store.discard('a')
+    store.append('a', result(1))
+    assert 'a' not in store and 'unknown' not in store
+    assert store.latest() == {}
+    assert store._requested == 0
+
+
+def test_resize_keeps_the_newest_results():
+    store = ResultStore(window_size=5)
+    store.resize('a')
+    for i in range(5):
+        store.append('a', result(i))
+    store.resize('a', 2)
+    assert [r.timestamp for r in store.results_of('a')] == [3, 4]
+    assert store.summary('a')['count'] == 2
+
+
+def test_windows_shrink_to_fit_the_memory_budget_and_grow_back():
+    store = ResultStore(window_size=100, memory_budget=100 * SLOT_BYTES)
+    store.resize('a')
+    assert store._windows['a'].size == 100
+    store.resize('b')
+    assert store.scale < 0.5
+    assert store.nbytes <= store.memory_budget
+    store.discard('b')
+    assert store._windows['a'].size == 100
+
+
+def test_every_window_keeps_its_latest_result():
+    store = ResultStore(window_size=10, memory_budget=1)
+    for slug in 'abc':
+        store.resize(slug)
+        store.append(slug, result(1))
+    assert all(len(store.results_of(slug)) == 1 for slug in 'abc')
+
+
+def test_digests_ending_in_nul_bytes_survive():
+    digest = hashlib.sha256(b'x').hexdigest()[:-2] + '00'
+    store = ResultStore()
+    store.resize('a')
+    store.append('a', result(1, digest=digest))
+    store.append('a', result(2, status=False, message='timed out'))
+    first, failed = store.results_of('a')
+    assert first.digest == digest
+    assert failed.digest is None
+    assert failed.message == 'timed out'
+
+
+def test_messages_are_interned():
+    store = ResultStore()
+    store.resize('a')
+    store.resize('b')
+    store.append('a', result(1, message=''.join(['time', 'out'])))
+    store.append('b', result(1, message=''.join(['time', 'out'])))
+    assert store.latest()['a'].message is store.latest()['b'].message
+
+
+def test_snapshots_are_cached_read_only_and_picklable():
+    store = ResultStore()
+    store.resize('a')
+    store.append('a', result(1, sample=b'body'))
+    snapshot = store.results_of('a')
+    assert store.results_of('a') is snapshot
+    with pytest.raises(ValueError):
+        snapshot.data['elapsed'][0] = 0
+    copy = pickle.loads(pickle.dumps(snapshot))
+    assert copy[0] == snapshot[0]
+    store.append('a', result(2))
+    assert store.results_of('a') is not snapshot
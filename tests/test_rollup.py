@@ -0,0 +1,136 @@
+"""Result rollup tests."""
+from datetime import datetime, timedelta, timezone
+import pytest
+import sqlalchemy as sa
+from checks.rollup import (RollupAccumulator, bucket_start, select_tier,
+                           summarize)
+from webapp.models import CheckResult, CheckRollup
+
+START = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine():
+    engine = sa.create_engine('sqlite://')
+    CheckRollup.metadata.create_all(
+        engine, tables=[CheckResult.__table__, CheckRollup.__table__])
+    return engine
+
+
+def rows(slug, count, start=START, step=1, failures=0):
+    return [{'slug': slug, 'date': start + timedelta(seconds=i * step),
+             'elapsed': float(10 + i), 'status': i >= failures}
+            for i in range(count)]
+
+
+def stored(engine, tier=60):
+    table = CheckRollup.__table__
+    with engine.connect() as conn:
+        return conn.execute(table.select().where(table.c.tier == tier)
+                            .order_by(table.c.slug, table.c.bucket)).all()
+
+
+def test_buckets_start_on_the_tier():
+    date = START + timedelta(minutes=90, seconds=7)
+    assert bucket_start(date, 60) == START + timedelta(minutes=90)
+    assert bucket_start(date, 3600) == START + timedelta(hours=1)
+    assert bucket_start(date, 86400) == START - timedelta(hours=12)
+
+
+@pytest.mark.parametrize('span, tier', [
+    (3600, 0), (86400, 60), (30 * 86400, 3600), (365 * 86400, 86400)])
+def test_tier_fits_the_span(span, tier):
+    assert select_tier(span, frequency=10) == tier
+
+
+def test_flush_stores_every_tier(engine):
+    rollups = RollupAccumulator()
+    rollups.add(rows('a', 120, failures=3))
+    assert rollups.flush(engine, CheckRollup.__table__, now=START) == 4
+    minutes = stored(engine)
+    assert [r.count for r in minutes] == [60, 60]
+    assert [r.failures for r in minutes] == [3, 0]
+    summary = summarize(stored(engine, 3600))
+    assert summary['count'] == 120
+    assert summary['mean'] == pytest.approx(sum(range(10, 130)) / 120)
+
+
+def test_later_flushes_replace_the_bucket(engine):
+    rollups = RollupAccumulator()
+    rollups.add(rows('a', 10))
+    rollups.flush(engine, CheckRollup.__table__, now=START)
+    rollups.add(rows('a', 10, start=START + timedelta(seconds=30)))
+    assert rollups.flush(engine, CheckRollup.__table__, now=START) == 3
+    assert rollups.flush(engine, CheckRollup.__table__, now=START) == 0
+    assert [r.count for r in stored(engine)] == [20]
+
+
+def test_a_restart_merges_the_stored_bucket(engine):
+    first = RollupAccumulator()
+    first.add(rows('a', 10))
+    first.flush(engine, CheckRollup.__table__, now=START)
+    second = RollupAccumulator()
+    second.add(rows('a', 5, start=START + timedelta(seconds=30)))
+    second.flush(engine, CheckRollup.__table__, now=START)
+    second.add(rows('a', 5, start=START + timedelta(seconds=40)))
+    second.flush(engine, CheckRollup.__table__, now=START)
+    minute, = stored(engine)
+    assert minute.count == 20
+    assert summarize([minute])['minimum'] == 10
+
+
+def test_a_failed_flush_loses_nothing(engine, monkeypatch):
+    first = RollupAccumulator()
+    first.add(rows('a', 10))
+    first.flush(engine, CheckRollup.__table__, now=START)
+    rollups = RollupAccumulator()
+    rollups.add(rows('a', 5, start=START + timedelta(seconds=30)))
+    rollups.add(rows('b', 5))
+
+    def fail(*args):
+        raise sa.exc.OperationalError('INSERT', {}, Exception('lost'))
+    monkeypatch.setattr(RollupAccumulator, '_upsert', staticmethod(fail))
+    with pytest.raises(sa.exc.OperationalError):
+        rollups.flush(engine, CheckRollup.__table__, now=START)
+    monkeypatch.undo()
+    rollups.flush(engine, CheckRollup.__table__, now=START)
+    assert [(r.slug, r.count) for r in stored(engine)] == \
+        [('a', 15), ('b', 5)]
+
+
+def test_a_flush_batches_its_statements(engine):
+    rollups = RollupAccumulator()
+    for i in range(300):
+        rollups.add(rows(f"monitor-{i}", 2))
+    statements = []
+    sa.event.listen(engine, 'before_cursor_execute',
+                    lambda *args: statements.append(args[2]))
+    assert rollups.flush(engine, CheckRollup.__table__, now=START,
+                         batch_size=500) == 900
+    assert len(statements) <= 10
+    assert len(stored(engine)) == 300
+
+
+def test_closed_buckets_are_forgotten_after_their_last_flush(engine):
+    rollups = RollupAccumulator()
+    rollups.add(rows('a', 10))
+    rollups.flush(engine, CheckRollup.__table__,
+                  now=START + timedelta(minutes=2))
+    assert {tier for _, tier, _ in rollups.buckets} == {3600, 86400}
+
+
+def test_prune_deletes_past_the_retention(engine):
+    rollups = RollupAccumulator(retention={0: 3600, 60: 7200})
+    rollups.add(rows('a', 3, step=3600))
+    rollups.flush(engine, CheckRollup.__table__, now=START)
+    results = CheckResult.__table__
+    with engine.begin() as conn:
+        conn.execute(results.insert(), [
+            dict(row, status_code=200, ttfb=1, dns=0, connect=0, tls=0,
+                 transfer=0, size=0) for row in rows('a', 3, step=3600)])
+    rollups.prune(engine, results, CheckRollup.__table__,
+                  now=START + timedelta(hours=2, minutes=30))
+    with engine.connect() as conn:
+        assert conn.execute(sa.select(sa.func.count()).select_from(
+            results)).scalar() == 1
+    assert len(stored(engine)) == 2
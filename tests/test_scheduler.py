@@ -0,0 +1,171 @@
+"""Scheduler tests."""
+import time
+import pytest
+from checks.endpoint import Endpoint
+from checks.ratelimit import HostLimiter
+from checks.scheduler import Scheduler
+
+
+def endpoint(slug, frequency=10, server='example.com', port=80):
+    ep = Endpoint(slug)
+    ep.name = slug
+    ep.frequency = frequency
+    ep.server = server
+    ep.port = port
+    return ep
+
+
+def pop_due(scheduler):
+    """Return the endpoints due now, as the scheduler thread would."""
+    with scheduler._condition:
+        return scheduler._pop_due()[0]
+
+
+def test_phase_is_stable_and_in_range():
+    slugs = [f"monitor-{i}" for i in range(200)]
+    phases = [Scheduler.phase(endpoint(s)) for s in slugs]
+    assert all(0 <= p < 1 for p in phases)
+    assert phases == [Scheduler.phase(endpoint(s)) for s in slugs]
+    assert len(set(phases)) == len(phases)
+
+
+def test_first_due_without_spread_is_now():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    after = time.monotonic() + 5
+    assert scheduler.first_due(endpoint('a'), after) == after
+
+
+def test_first_due_falls_on_the_phase_of_the_wall_clock():
+    scheduler = Scheduler(lambda ep: None)
+    ep = endpoint('spread-me', frequency=30)
+    now = time.monotonic()
+    due = scheduler.first_due(ep, now)
+    assert now <= due < now + ep.frequency
+    wall = time.time() + (due - time.monotonic())
+    offset = wall % ep.frequency
+    expected = Scheduler.phase(ep) * ep.frequency
+    assert min(abs(offset - expected),
+               ep.frequency - abs(offset - expected)) < 0.05
+
+
+def test_due_endpoints_are_dispatched_in_deadline_order():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    now = time.monotonic()
+    late, early, future = endpoint('late'), endpoint('early'), endpoint('f')
+    scheduler.add(late, now - 1)
+    scheduler.add(early, now - 2)
+    scheduler.add(future, now + 60)
+    assert pop_due(scheduler) == [early, late]
+    assert scheduler.endpoint_count == 3
+    assert len(scheduler) == 1
+
+
+def test_reschedule_keeps_the_cadence():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    ep = endpoint('a', frequency=10)
+    due = time.monotonic() - 0.5
+    scheduler.add(ep, due)
+    assert pop_due(scheduler) == [ep]
+    scheduler.started(ep)
+    scheduler.reschedule(ep)
+    assert scheduler._entries[ep][0] == pytest.approx(due + 10)
+    assert scheduler.timing['missed'] == 0
+
+
+def test_reschedule_skips_overrun_runs():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    ep = endpoint('a', frequency=10)
+    due = time.monotonic() - 35
+    scheduler.add(ep, due)
+    pop_due(scheduler)
+    scheduler.started(ep)
+    scheduler.reschedule(ep)
+    assert scheduler._entries[ep][0] == pytest.approx(due + 40)
+    assert scheduler.timing['missed'] == 3
+    assert scheduler.timing['late'] == 1
+
+
+def test_removed_endpoint_is_not_rescheduled():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    ep = endpoint('a')
+    scheduler.add(ep, time.monotonic() - 1)
+    pop_due(scheduler)
+    scheduler.remove(ep)
+    scheduler.reschedule(ep)
+    assert ep not in scheduler
+
+
+@pytest.mark.parametrize('frequency', [0, -5])
+def test_frequencies_under_a_second_are_rejected(frequency):
+    scheduler = Scheduler(lambda ep: None)
+    with pytest.raises(ValueError):
+        scheduler.add(endpoint('a', frequency=frequency))
+
+
+def test_frequency_dropped_under_a_second_in_flight_is_removed():
+    scheduler = Scheduler(lambda ep: None, spread=False)
+    ep = endpoint('a')
+    scheduler.add(ep, time.monotonic() - 1)
+    pop_due(scheduler)
+    ep.frequency = 0
+    scheduler.reschedule(ep)
+    assert ep not in scheduler
+
+
+def test_host_limit_holds_checks_until_one_finishes():
+    dispatched = []
+    scheduler = Scheduler(dispatched.append, spread=False, host_limit=1)
+    first, second = endpoint('first'), endpoint('second')
+    other = endpoint('other', server='other.example.com')
+    now = time.monotonic()
+    scheduler.add(first, now - 2)
+    scheduler.add(second, now - 1)
+    scheduler.add(other, now - 1)
+    assert pop_due(scheduler) == [first, other]
+    assert scheduler.timing['held'] == 1
+    scheduler.started(first)
+    scheduler.reschedule(first)
+    assert dispatched == [second]
+    assert scheduler.started(second) > 0
+    assert scheduler.timing['held'] == 0
+
+
+def test_rate_limited_checks_wait_in_the_schedule():
+    scheduler = Scheduler(lambda ep: None, spread=False,
+                          limiter=HostLimiter(rate=10, burst=1))
+    first, second = endpoint('first'), endpoint('second')
+    now = time.monotonic()
+    scheduler.add(first, now - 1)
+    scheduler.add(second, now - 1)
+    assert pop_due(scheduler) == [first]
+    assert scheduler.timing['held'] == 1
+    assert pop_due(scheduler) == []
+    time.sleep(0.15)
+    assert pop_due(scheduler) == [second]
+    # held until the next token, at most 1 / rate after the first run
+    assert 0 < scheduler.started(second) <= 0.1
+
+
+def test_checks_over_the_rate_limit_wait_are_skipped():
+    scheduler = Scheduler(lambda ep: None, spread=False,
+                          limiter=HostLimiter(rate=1, burst=1, max_wait=0.5))
+    first, second = endpoint('first'), endpoint('second', frequency=5)
+    now = time.monotonic()
+    scheduler.add(first, now - 1)
+    scheduler.add(second, now - 1)
+    assert pop_due(scheduler) == [first]
+    assert scheduler.timing['missed'] == 1
+    assert scheduler._entries[second][0] == pytest.approx(now + 4)
+
+
+def test_stop_and_start_keep_the_schedule():
+    dispatched = []
+    scheduler = Scheduler(dispatched.append, spread=False)
+    ep = endpoint('a')
+    scheduler.add(ep, time.monotonic() + 0.05)
+    scheduler.start()
+    deadline = time.monotonic() + 2
+    while not dispatched and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop(join=True)
+    assert dispatched == [ep]
@@ -0,0 +1,59 @@
+"""Keep-alive session pool tests."""
+import pytest
+from checks.sessions import SessionPool
+
+
+@pytest.fixture
+def pool():
+    pool = SessionPool(pool_size=2, idle_timeout=60)
+    yield pool
+    pool.close()
+
+
+def check(pool, endpoint):
+    response = pool.request(endpoint)
+    body = response.content
+    response.close()
+    return response, body
+
+
+def test_one_session_per_target(pool, target_endpoint):
+    first = pool.session(target_endpoint('a'))
+    assert pool.session(target_endpoint('b', '/other')) is first
+    assert pool.session(target_endpoint('c', port=1)) is not first
+    assert pool.session(target_endpoint('d', cold_connection=True)) \
+        is not first
+    assert len(pool) == 3
+
+
+def test_connections_are_kept_alive(pool, target, target_endpoint):
+    endpoint = target_endpoint('a')
+    check(pool, endpoint)
+    connections = target.connections
+    for _ in range(5):
+        response, body = check(pool, endpoint)
+        assert body == b'hello world'
+    assert target.connections == connections
+
+
+def test_cold_connections_connect_every_check(pool, target,
+                                              target_endpoint):
+    endpoint = target_endpoint('a', cold_connection=True)
+    connections = target.connections
+    for _ in range(3):
+        check(pool, endpoint)
+    assert target.connections == connections + 3
+
+
+def test_cookies_are_not_kept(pool, target_endpoint):
+    endpoint = target_endpoint('a', '/?cookie')
+    response, _ = check(pool, endpoint)
+    assert 'Set-Cookie' in response.headers
+    assert not pool.session(endpoint).cookies
+
+
+def test_idle_sessions_are_closed(pool, target_endpoint):
+    pool.session(target_endpoint('a'))
+    pool.idle_timeout = 0
+    pool.evict()
+    assert len(pool) == 0
@@ -0,0 +1,147 @@
+"""Hash ring and runner lease tests."""
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+import sqlalchemy as sa
+from checks.shard import HashRing, ShardCoordinator
+
+SLUGS = [f"monitor-{i}" for i in range(2000)]
+
+
+class Manager(object):
+    """Records the rings it is rebalanced to."""
+
+    def __init__(self):
+        self.calls = []
+
+    def rebalance(self, ring, node, delay=0):
+        self.calls.append((ring, node, delay))
+
+
+@pytest.fixture
+def leases():
+    engine = sa.create_engine('sqlite://')
+    table = sa.Table(
+        'runner_leases', sa.MetaData(),
+        sa.Column('node', sa.String(256), primary_key=True),
+        sa.Column('address', sa.String(256)),
+        sa.Column('started', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('heartbeat', sa.TIMESTAMP(timezone=True), nullable=False))
+    table.metadata.create_all(engine)
+    return engine, table
+
+
+def coordinator(leases, node, manager=None):
+    shard = ShardCoordinator(manager or Manager(), node, heartbeat_interval=5,
+                             lease_ttl=15)
+    shard.configure(*leases)
+    return shard
+
+
+def test_empty_ring_owns_nothing():
+    assert HashRing([]).owner('a') is None
+
+
+def test_owners_are_stable_and_balanced():
+    ring = HashRing(['a', 'b', 'c'])
+    owners = [ring.owner(slug) for slug in SLUGS]
+    assert owners == [HashRing(['c', 'b', 'a']).owner(s) for s in SLUGS]
+    for node in 'abc':
+        assert 0.2 < owners.count(node) / len(SLUGS) < 0.47
+
+
+def test_a_joining_node_only_takes_slugs():
+    before = HashRing(['a', 'b', 'c'])
+    after = HashRing(['a', 'b', 'c', 'd'])
+    moved = [s for s in SLUGS if before.owner(s) != after.owner(s)]
+    assert all(after.owner(s) == 'd' for s in moved)
+    assert 0.1 < len(moved) / len(SLUGS) < 0.4
+
+
+def test_rings_of_the_same_nodes_are_equal():
+    assert HashRing(['a', 'b']) == HashRing(['b', 'a'])
+    assert HashRing(['a', 'b']) != HashRing(['a'])
+
+
+def test_heartbeat_sees_every_live_lease(leases):
+    first, second = coordinator(leases, 'a'), coordinator(leases, 'b')
+    assert first.heartbeat() == ['a']
+    assert sorted(second.heartbeat()) == ['a', 'b']
+    assert sorted(first.heartbeat()) == ['a', 'b']
+
+
+def test_expired_leases_are_dropped(leases):
+    old = datetime.now(timezone.utc) - timedelta(seconds=60)
+    coordinator(leases, 'dead').heartbeat(old)
+    assert coordinator(leases, 'a').heartbeat() == ['a']
+
+
+def test_joining_a_ring_delays_gained_slugs(leases):
+    coordinator(leases, 'a').heartbeat()
+    manager = Manager()
+    shard = coordinator(leases, 'b', manager)
+    shard.update()
+    ring, node, delay = manager.calls[-1]
+    assert ring == HashRing(['a', 'b'])
+    assert node == 'b'
+    assert delay == shard.takeover_delay >= shard.lease_ttl
+    shard.update()
+    assert len(manager.calls) == 1
+
+
+def test_a_lone_runner_starts_at_once(leases):
+    manager = Manager()
+    coordinator(leases, 'a', manager).update()
+    assert manager.calls == [(HashRing(['a']), 'a', 0)]
+
+
+def test_a_lone_runner_waits_out_expired_leases(leases):
+    old = datetime.now(timezone.utc) - timedelta(seconds=60)
+    coordinator(leases, 'dead').heartbeat(old)
+    manager = Manager()
+    shard = coordinator(leases, 'a', manager)
+    shard.update()
+    assert manager.calls == [(HashRing(['a']), 'a', shard.takeover_delay)]
+
+
+def test_an_unrenewed_lease_drops_the_shard(leases):
+    manager = Manager()
+    shard = coordinator(leases, 'a', manager)
+    shard.update()
+    shard.expire()
+    assert len(manager.calls) == 1
+    shard._renewed -= shard.lease_ttl + 1
+    shard.expire()
+    assert manager.calls[-1] == (HashRing([]), 'a', 0)
+
+
+def test_expiry_is_checked_while_renewals_fail(leases):
+    manager = Manager()
+    shard = coordinator(leases, 'a', manager)
+    shard.heartbeat_interval = 0.01
+    shard.update()
+    shard._renewed -= shard.lease_ttl + 1
+    shard.engine = sa.create_engine('sqlite:////nonexistent/leases.db')
+    shard.start()
+    deadline = time.monotonic() + 2
+    while len(manager.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    shard._should_die.set()
+    shard.join()
+    assert manager.calls[-1] == (HashRing([]), 'a', 0)
+
+
+def test_postgres_leases_have_their_own_engine_with_timeouts():
+    engine = sa.create_engine('postgresql+psycopg2://user:pw@db/monitors')
+    shard = ShardCoordinator(Manager(), 'a', heartbeat_interval=5)
+    shard.configure(engine, None)
+    assert shard.engine is not engine
+    assert shard.engine.url == engine.url
+    assert shard.engine.pool.timeout() == 5
+
+
+def test_release_deletes_the_lease(leases):
+    shard = coordinator(leases, 'a')
+    shard.heartbeat()
+    shard.stop()
+    assert coordinator(leases, 'b').heartbeat() == ['b']
@@ -0,0 +1,97 @@
+"""Latency sketch and window statistics tests."""
+import random
+import numpy as np
+import pytest
+from checks.sketch import LatencySketch, WindowStats
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(7)
+    return [rng.lognormvariate(4, 1) for _ in range(5000)]
+
+
+@pytest.mark.parametrize('q', [0.5, 0.75, 0.95, 0.99])
+def test_quantiles_are_within_the_relative_accuracy(values, q):
+    sketch = LatencySketch(accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    exact = np.quantile(values, q, method='lower')
+    assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_empty_sketch_quantile_is_zero():
+    assert LatencySketch().quantile(0.5) == 0
+
+
+def test_values_at_or_below_min_value_count_as_zero():
+    sketch = LatencySketch(min_value=1)
+    for value in (0, 0.5, 1, 100):
+        sketch.add(value)
+    assert sketch.zero == 3
+    assert sketch.quantile(0.5) == 0
+
+
+def test_merge_equals_one_sketch_of_every_value(values):
+    whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+    first.merge(second)
+    assert first.bins == whole.bins
+    assert first.count == whole.count
+
+
+def test_merge_needs_equal_accuracy():
+    with pytest.raises(ValueError):
+        LatencySketch(0.01).merge(LatencySketch(0.02))
+
+
+def test_remove_undoes_add(values):
+    sketch = LatencySketch()
+    for value in values[:100]:
+        sketch.add(value)
+    before = dict(sketch.bins), sketch.count
+    for value in values[100:200]:
+        sketch.add(value)
+    for value in values[100:200]:
+        sketch.remove(value)
+    assert (sketch.bins, sketch.count) == before
+
+
+def test_round_trips_through_a_dict(values):
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+    copy = LatencySketch.from_dict(sketch.to_dict())
+    assert copy.bins == sketch.bins
+    assert copy.count == sketch.count
+    assert copy.quantile(0.99) == sketch.quantile(0.99)
+
+
+def test_window_stats_follow_a_sliding_window(values):
+    size = 20
+    stats = WindowStats()
+    statuses = [i % 7 != 0 for i in range(len(values))]
+    for i, (value, status) in enumerate(zip(values[:500], statuses)):
+        if i >= size:
+            stats.remove(values[i - size], statuses[i - size])
+        stats.add(value, status)
+        window = values[max(0, i - size + 1):i + 1]
+        assert stats.count == len(window)
+        assert stats.mean == pytest.approx(np.mean(window))
+        if len(window) > 1:
+            assert stats.stddev == pytest.approx(np.std(window, ddof=1),
+                                                 rel=1e-6)
+    window_statuses = statuses[500 - size:500]
+    assert stats.availability == pytest.approx(
+        sum(window_statuses) / size * 100)
+    assert stats.failRate == pytest.approx(100 - stats.availability)
+
+
+def test_window_stats_reset_when_emptied():
+    stats = WindowStats()
+    stats.add(10, True)
+    stats.remove(10, True)
+    assert (stats.count, stats.mean, stats.stddev) == (0, 0.0, 0)
+    assert stats.summary()['p99'] == 0
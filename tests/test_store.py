@@ -0,0 +1,90 @@
+"""Result writer tests."""
+from datetime import datetime, timedelta, timezone
+import pytest
+import sqlalchemy as sa
+from checks.results import RequestDimension
+from checks.store import ResultWriter
+from webapp.models import CheckResult, CheckRollup
+
+START = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine():
+    # one shared connection, so the writer thread sees the tables
+    engine = sa.create_engine(
+        'sqlite://', poolclass=sa.pool.StaticPool,
+        connect_args={'check_same_thread': False})
+    CheckResult.metadata.create_all(
+        engine, tables=[CheckResult.__table__, CheckRollup.__table__])
+    return engine
+
+
+def result(seconds=0, status=True):
+    date = START + timedelta(seconds=seconds)
+    return RequestDimension(
+        date=date, timestamp=date.timestamp(), status=status,
+        status_code=200 if status else 500, TTFB=1.0, elapsed=2.0, size=11,
+        digest='abc', sample=None, message=None, dns=0.0, connect=0.0,
+        tls=0.0, transfer=0.0, throttle=0.0)
+
+
+def count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(sa.select(sa.func.count()).select_from(table)) \
+            .scalar()
+
+
+def test_results_are_dropped_until_configured():
+    writer = ResultWriter()
+    writer.put('a', result())
+    assert writer.queue.qsize() == 0
+    assert writer.dropped == 0
+
+
+def test_queued_results_are_written_in_batches(engine):
+    writer = ResultWriter(batch_size=2)
+    writer.configure(engine, CheckResult.__table__)
+    statements = []
+    sa.event.listen(engine, 'before_execute',
+                    lambda *args: statements.append(args[1]))
+    for i in range(5):
+        writer.put('a', result(i))
+    writer.flush()
+    assert writer.written == 5
+    assert len(statements) == 3
+    assert count(engine, CheckResult.__table__) == 5
+
+
+def test_results_past_max_queue_are_dropped(engine):
+    writer = ResultWriter(max_queue=3)
+    writer.configure(engine, CheckResult.__table__)
+    for i in range(5):
+        writer.put('a', result(i))
+    assert writer.dropped == 2
+    writer.flush()
+    assert count(engine, CheckResult.__table__) == 3
+
+
+def test_the_writer_thread_writes_queued_results(engine):
+    writer = ResultWriter(flush_interval=0.05)
+    writer.configure(engine, CheckResult.__table__)
+    writer.start()
+    for i in range(10):
+        writer.put('a', result(i))
+    writer.stop()
+    assert not writer.is_alive()
+    assert writer.written == 10
+    assert count(engine, CheckResult.__table__) == 10
+
+
+def test_stop_stores_the_rollups_of_written_results(engine):
+    writer = ResultWriter()
+    writer.configure(engine, CheckResult.__table__, CheckRollup.__table__)
+    writer.put('a', result(0))
+    writer.put('a', result(1, status=False))
+    writer.stop()
+    table = CheckRollup.__table__
+    with engine.connect() as conn:
+        minute = conn.execute(table.select().where(table.c.tier == 60)).one()
+    assert (minute.slug, minute.count, minute.failures) == ('a', 2, 1)
@@ -0,0 +1,107 @@
+"""Request phase timing tests."""
+import asyncio
+import socket
+import time
+import aiohttp
+import pytest
+import requests
+from checks import timing
+from checks.sessions import SessionPool
+
+
+def slow_resolver(*addresses, delay=0.05):
+    """Return a getaddrinfo answering with `addresses` after `delay`."""
+    def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        time.sleep(delay)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (a, port))
+                for a in addresses]
+    return getaddrinfo
+
+
+@pytest.fixture
+def pool():
+    pool = SessionPool()
+    yield pool
+    pool.close()
+
+
+def timed_check(pool, endpoint, getaddrinfo=None):
+    timing.begin(getaddrinfo)
+    try:
+        response = pool.request(endpoint)
+        response.content
+        response.close()
+    finally:
+        timings = timing.end()
+    return timings
+
+
+def test_timings_add_up():
+    timings = timing.Timings()
+    assert timings.transfer == 0.0
+    timings.headers = timings.start + 0.5
+    timings.end = timings.start + 2
+    assert timings.elapsed == 2
+    assert timings.transfer == 1.5
+
+
+def test_phases_of_a_new_connection(pool, target_endpoint):
+    endpoint = target_endpoint('a', server='target.test')
+    timings = timed_check(pool, endpoint, slow_resolver('127.0.0.1'))
+    assert timings.dns >= 0.05
+    assert 0 < timings.connect < timings.dns
+    assert timings.ttfb > 0
+    assert timings.tls == 0
+    assert timings.elapsed >= timings.dns + timings.connect + timings.ttfb
+
+
+def test_a_kept_alive_connection_skips_dns_and_connect(pool, target_endpoint):
+    endpoint = target_endpoint('a', server='target.test')
+    timed_check(pool, endpoint, slow_resolver('127.0.0.1'))
+    timings = timed_check(pool, endpoint, slow_resolver('127.0.0.1'))
+    assert timings.dns == timings.connect == 0
+    assert timings.ttfb > 0
+
+
+def test_every_resolved_address_is_tried(pool, target_endpoint):
+    endpoint = target_endpoint('a', server='target.test')
+    # nothing listens on 127.0.0.2 at the target's port
+    timings = timed_check(pool, endpoint,
+                          slow_resolver('127.0.0.2', '127.0.0.1', delay=0))
+    assert timings.connect > 0
+    assert timings.ttfb > 0
+
+
+def test_resolution_failures_fail_the_request(pool, target_endpoint):
+    endpoint = target_endpoint('a', server='target.test')
+    with pytest.raises(requests.exceptions.ConnectionError):
+        timed_check(pool, endpoint, slow_resolver(delay=0))
+
+    def unknown(*args):
+        raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        timed_check(pool, endpoint, unknown)
+
+
+def test_untimed_requests_are_not_timed(pool, target_endpoint):
+    response = pool.request(target_endpoint('a'))
+    response.close()
+    assert timing.current() is None
+
+
+def test_aiohttp_traces_record_the_phases(target):
+    async def check():
+        timings = timing.Timings()
+        async with aiohttp.ClientSession(
+                trace_configs=[timing.trace_config()]) as session:
+            async with session.get(f"http://127.0.0.1:{target.port}/",
+                                   trace_request_ctx=timings) as response:
+                await response.read()
+        timings.stop()
+        return timings
+
+    timings = asyncio.run(check())
+    assert timings.connect > 0
+    assert timings.ttfb > 0
+    assert timings.headers is not None
+    assert timings.elapsed >= timings.connect + timings.ttfb
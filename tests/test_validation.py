@@ -0,0 +1,95 @@
+"""Response validation tests."""
+import json
+import re
+import time
+import pytest
+from checks import validation
+from checks.manager import RequestsManager
+from checks.validation import Validator, validate
+
+DOCUMENT = b'{"status": "ok", "items": [{"id": 7}]}'
+
+
+@pytest.mark.parametrize('assertions', [
+    [],
+    [{'contains': '"ok"'}],
+    [{'regex': r'"id": \d+'}],
+    [{'json': 'items.0.id'}],
+    [{'json': 'status', 'equals': 'ok'},
+     {'json': 'items.0', 'equals': {'id': 7}}],
+])
+def test_passing_assertions(assertions):
+    assert validate(assertions, DOCUMENT) is None
+
+
+@pytest.mark.parametrize('assertions, failure', [
+    ([{'contains': 'error'}], "Body does not contain 'error'"),
+    ([{'regex': '^ok'}], "Body does not match '^ok'"),
+    ([{'json': 'items.1.id'}], "JSON path items.1.id not found"),
+    ([{'json': 'items.id'}], "JSON path items.id not found"),
+    ([{'json': 'status', 'equals': 'down'}],
+     "JSON path status is 'ok', expected 'down'"),
+    ([{'length': 1}], "Unknown assertion {'length': 1}"),
+])
+def test_failing_assertions(assertions, failure):
+    assert validate(assertions, DOCUMENT) == failure
+
+
+def test_bodies_that_are_not_json_fail_json_assertions():
+    assert validate([{'json': 'status'}], b'<html>').startswith(
+        "Body is not JSON")
+
+
+def test_assertions_are_evaluated_inline_without_workers():
+    validator = Validator()
+    validator.start()
+    assert validator.pool is None
+    assert validator.submit([{'contains': 'ok'}], DOCUMENT).result() is None
+    future = validator.submit([{'regex': '('}], DOCUMENT)
+    with pytest.raises(re.error):
+        future.result()
+
+
+def test_workers_validate_small_and_shared_bodies(monkeypatch):
+    released = []
+    release = validation.release
+
+    def counted_release(shm):
+        released.append(shm.name)
+        release(shm)
+    monkeypatch.setattr(validation, 'release', counted_release)
+    large = json.dumps({'items': [{'id': 7}], 'padding': 'x' *
+                        validation.SHARED_MEMORY_MIN_BYTES}).encode()
+    validator = Validator(workers=1)
+    validator.start()
+    try:
+        small = validator.submit([{'json': 'items.0.id', 'equals': 7}],
+                                 DOCUMENT)
+        shared = validator.submit([{'json': 'items.0.id', 'equals': 8}],
+                                  large)
+        assert small.result(timeout=60) is None
+        assert shared.result(timeout=60) == \
+            "JSON path items.0.id is 7, expected 8"
+    finally:
+        validator.stop()
+    assert len(released) == 1
+
+
+def test_failed_assertions_fail_the_check(target_endpoint):
+    manager = RequestsManager(thread_count=1, spread=False)
+    passing = target_endpoint('passing', '/json')
+    passing.assertions = [{'json': 'status', 'equals': 'ok'}]
+    failing = target_endpoint('failing', '/json')
+    failing.assertions = [{'contains': 'error'}]
+    manager.load([passing, failing])
+    try:
+        deadline = time.monotonic() + 10
+        while len(manager.latest) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        latest = manager.latest
+    finally:
+        manager.stop()
+    assert latest['passing'].status
+    assert not latest['failing'].status
+    assert latest['failing'].status_code == 200
+    assert latest['failing'].message == "Body does not contain 'error'"
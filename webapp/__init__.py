@@ -9,7 +9,12 @@ from config import Config
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_moment import Moment
+from werkzeug.local import LocalProxy
+from checks.broadcast import ResultBroadcast
+from checks.changes import ChangeFeed
 from checks.manager import RequestsManager
+from checks.remote import RemoteRequestsManager
+from checks.store import ResultWriter
 from stats.runtime import RuntimeStats
 from webapp.utils.jinja import (
     percentile, failRate, availability, stddev, megabytes, gigabytes)
@@ -18,24 +23,124 @@ from webapp.utils.jinja import (
 db = SQLAlchemy()
 migrate = Migrate()
 moment = Moment()
-requestManager = RequestsManager()
+# The manager of this process' checks, created by `create_app`
+_requestManager = None
+requestManager = LocalProxy(lambda: _requestManager)
+resultWriter = ResultWriter()
+changeFeed = ChangeFeed()
+resultBroadcast = ResultBroadcast(requestManager)
 runtimeStats = RuntimeStats()
 runtimeStats.rm = requestManager
 
 
-def configure_extensions(app, config):
-    """Configure Flask Extensions."""
+def create_request_manager(config, runner=False):
+    """Create the manager of this process' checks, once.
+
+    A web application with a ``CHECK_RUNNER`` reads results from (and sends
+    reloads to) the check runner; see `runner`.  The runner itself, and a
+    web application without one, run the checks in process.
+
+    """
+    global _requestManager
+    if _requestManager is not None:
+        return
+    if config.CHECK_RUNNER and not runner:
+        _requestManager = RemoteRequestsManager(config.CHECK_RUNNER,
+                                                config.CHECK_RUNNER_AUTHKEY)
+    else:
+        _requestManager = RequestsManager()
+
+
+def configure_extensions(app, config, remote=False):
+    """Configure Flask Extensions.
+
+    `remote` is true when the checks run in a check runner.
+
+    """
     db.init_app(app)
     migrate.init_app(app, db)
     moment.init_app(app)
-    requestManager.thread_count = config.REQUEST_THREADS
     # TODO: FixMe, I shouldn't have to pass app.logger here.  Python logging
     # is a PITA
     requestManager.logger = app.logger
     runtimeStats.logger = app.logger
+    runtimeStats.interval = config.RUNTIME_STATS_INTERVAL
+    runtimeStats.process_interval = config.RUNTIME_PROCESS_INTERVAL
+    runtimeStats.connections_interval = config.RUNTIME_CONNECTIONS_INTERVAL
+    resultBroadcast.logger = app.logger
+    resultBroadcast.interval = config.STREAM_INTERVAL
+    resultBroadcast.max_clients = config.STREAM_MAX_CLIENTS
+    if not remote:
+        configure_request_manager(app, config)
+    configure_change_feed(app, config, remote)
     app.logger.debug("Flask extensions registered.")
 
 
+def configure_change_feed(app, config, remote=False):
+    """Apply published monitor changes to the running checks.
+
+    A process running its own checks always subscribes.  A web worker
+    backed by check runners subscribes only to a local feed, and forwards
+    the changes to the runners; over Postgres the runners listen
+    themselves.
+
+    """
+    with app.app_context():
+        changeFeed.configure(db.engine)
+    changeFeed.logger = app.logger
+    if remote and changeFeed.shared:
+        return
+
+    def apply_changes(slugs):
+        from webapp.models import Monitor
+        with app.app_context():
+            endpoints, removed = Monitor.changes_of(slugs)
+        requestManager.sync(endpoints, removed, start=False)
+
+    changeFeed.subscribe(apply_changes)
+
+
+def configure_request_manager(app, config):
+    """Configure the in-process `RequestsManager` and its result store."""
+    requestManager.thread_count = config.REQUEST_THREADS
+    requestManager.engine = config.REQUEST_ENGINE
+    requestManager.concurrency = config.REQUEST_CONCURRENCY
+    requestManager.pool_size = config.REQUEST_POOL_SIZE
+    requestManager.pool_idle_timeout = config.REQUEST_POOL_IDLE_TIMEOUT
+    requestManager.body_limit = config.RESPONSE_MAX_BYTES
+    requestManager.body_sample = config.RESPONSE_SAMPLE_BYTES
+    requestManager.validation_workers = config.VALIDATION_WORKERS
+    requestManager.scheduler.spread = config.SCHEDULE_SPREAD
+    requestManager.scheduler.host_limit = config.SCHEDULE_HOST_CONCURRENCY
+    requestManager.limiter.rate = config.SCHEDULE_HOST_RATE
+    requestManager.limiter.burst = config.SCHEDULE_HOST_BURST
+    requestManager.limiter.max_wait = config.SCHEDULE_HOST_MAX_WAIT
+    requestManager.resolver.enabled = config.DNS_CACHE
+    requestManager.resolver.ttl = config.DNS_CACHE_TTL
+    requestManager.resolver.negative_ttl = config.DNS_CACHE_NEGATIVE_TTL
+    requestManager.results.window_size = config.RESULT_WINDOW_SIZE
+    requestManager.results.memory_budget = config.RESULT_MEMORY_BUDGET
+    if config.RESULT_STORE:
+        configure_result_store(app, config)
+
+
+def configure_result_store(app, config):
+    """Persist check results through the background `ResultWriter`."""
+    from webapp.models import CheckResult, CheckRollup
+    with app.app_context():
+        resultWriter.configure(db.engine, CheckResult.__table__,
+                               CheckRollup.__table__)
+    resultWriter.batch_size = config.RESULT_BATCH_SIZE
+    resultWriter.flush_interval = config.RESULT_FLUSH_INTERVAL
+    resultWriter.rollup_interval = config.ROLLUP_INTERVAL
+    resultWriter.rollups.retention.update(config.RESULT_RETENTION)
+    resultWriter.logger = app.logger
+    requestManager.writer = resultWriter
+    if not resultWriter.is_alive():
+        resultWriter.start()
+    app.logger.debug("Result store configured.")
+
+
 def register_blueprints(app):
     """Register Blueprint packages with the application."""
 
@@ -54,6 +159,11 @@ def register_blueprints(app):
     app.register_blueprint(settings_blueprint, url_prefix='/settings')
     app.logger.debug("Registered settings blueprint")
 
+    # Register the API blueprint
+    from webapp.api import bp as api_blueprint
+    app.register_blueprint(api_blueprint, url_prefix='/api/v1')
+    app.logger.debug("Registered API blueprint")
+
 
 def configure_jinja_extensions(app):
     """Register Jinja extensions.
@@ -70,16 +180,20 @@ def configure_jinja_extensions(app):
     app.logger.debug("Custom Jinja extensions registered.")
 
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, runner=False):
     """Flask application factory.
 
     This function is responsible for constructing an instance of the flask
-    application with the desired configuration state.
+    application with the desired configuration state.  The check runner
+    passes `runner` to run checks in process rather than use
+    ``CHECK_RUNNER``, which it serves.
 
     """
     app = Flask(__name__)
     app.config.from_object(config_class)
-    configure_extensions(app, config_class)
+    create_request_manager(config_class, runner)
+    configure_extensions(app, config_class,
+                         remote=bool(config_class.CHECK_RUNNER) and not runner)
     register_blueprints(app)
     configure_jinja_extensions(app)
 
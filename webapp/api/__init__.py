@@ -0,0 +1,10 @@
+"""API Package
+
+This package contains the versioned JSON API used by dashboards and
+wallboards to read monitor results without rendering the UI pages.
+
+"""
+from flask import Blueprint
+
+bp = Blueprint('api', __name__)
+from webapp.api import routes
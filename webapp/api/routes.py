@@ -0,0 +1,300 @@
+"""API routes
+
+This module contains the routes of version 1 of the JSON API.  Every
+response carries an ETag, honours ``If-None-Match`` and is gzipped when the
+client accepts it, so polling an unchanged resource costs a 304.
+
+    /api/v1/monitors                    monitors, latest result, statistics
+    /api/v1/monitors/<slug>             one monitor
+    /api/v1/monitors/<slug>/window      live result window, by column
+    /api/v1/monitors/<slug>/results     stored results or rollups, paged
+    /api/v1/latest                      latest result of every monitor
+    /api/v1/summaries                   window statistics of every monitor
+    /api/v1/stream                      new results as Server-Sent Events
+
+"""
+import gzip
+import json
+from datetime import datetime, timezone
+import sqlalchemy as sa
+from checks.results import digest_hex
+from webapp import requestManager, resultBroadcast
+from webapp.api import bp
+from webapp.models import Monitor, CheckResult, CheckRollup
+from webapp.monitors.routes import RANGES
+from flask import Response, request, url_for, current_app
+
+
+# Result fields returned by the API, in order
+RESULT_FIELDS = ('timestamp', 'status', 'status_code', 'TTFB', 'elapsed',
+                 'dns', 'connect', 'tls', 'transfer', 'throttle', 'size',
+                 'digest', 'message')
+# Rollup fields returned by the API, in order
+ROLLUP_FIELDS = ('timestamp', 'count', 'failures', 'minimum', 'maximum',
+                 'elapsed', 'p50', 'p95', 'p99')
+MAX_PAGE_SIZE = 5000
+GZIP_MIN_BYTES = 1024   # smaller responses are sent as is
+
+
+class APIError(Exception):
+    """An API request could not be served."""
+
+    def __init__(self, message, status=400):
+        super(APIError, self).__init__(message)
+        self.status = status
+
+
+@bp.errorhandler(APIError)
+def api_error(error):
+    """Return `error` as a JSON response."""
+    return Response(json.dumps({'error': str(error)}), status=error.status,
+                    mimetype='application/json')
+
+
+def json_response(data):
+    """Return `data` as a conditional, possibly gzipped, JSON response.
+
+    The ETag is taken over the uncompressed body, so a client gets a 304
+    for an unchanged resource whether or not it accepts gzip.
+
+    """
+    body = json.dumps(data, separators=(',', ':')).encode()
+    response = Response(body, mimetype='application/json')
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    response.make_conditional(request)
+    if response.status_code == 200 and len(body) >= GZIP_MIN_BYTES and \
+            'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def result_to_dict(result):
+    """Return a result or stored result as a dictionary."""
+    return {field: getattr(result, field) for field in RESULT_FIELDS}
+
+
+def rollup_to_dict(rollup):
+    """Return a stored rollup as a dictionary."""
+    return {field: getattr(rollup, field) for field in ROLLUP_FIELDS}
+
+
+def monitor_to_dict(monitor, latest=None, summary=None):
+    """Return `monitor` and its live results as a dictionary."""
+    return {
+        'slug': monitor.slug,
+        'name': monitor.name,
+        'enabled': monitor.enabled,
+        'frequency': monitor.frequency,
+        'url': monitor.to_endpoint().url,
+        'verb': monitor.verb.name if monitor.verb else None,
+        'updated': monitor.updated.isoformat(),
+        'latest': result_to_dict(latest) if latest else None,
+        'summary': summary,
+    }
+
+
+def get_monitor(slug):
+    """Return the monitor `slug`, or raise a 404 `APIError`."""
+    monitor = Monitor.query.filter_by(slug=slug).first()
+    if monitor is None:
+        raise APIError(f"No monitor {slug}", 404)
+    return monitor
+
+
+def parse_date(name):
+    """Return the ISO 8601 (or POSIX timestamp) argument `name`, or None."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        date = datetime.fromtimestamp(float(value), timezone.utc)
+    except (OverflowError, OSError):
+        raise APIError(f"{name} is out of range: {value}")
+    except ValueError:
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            raise APIError(f"{name} is not a date: {value}")
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+def parse_int(name, default, minimum=0, maximum=None):
+    """Return the integer argument `name`, or `default`."""
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        raise APIError(f"{name} is not an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise APIError(f"{name} is out of range")
+    return value
+
+
+@bp.route('/monitors')
+def monitors():
+    """Return every monitor with its latest result and statistics."""
+    latest = requestManager.latest
+    summaries = requestManager.summaries
+    return json_response({'data': [
+        monitor_to_dict(m, latest.get(m.slug), summaries.get(m.slug))
+        for m in Monitor.query.order_by(Monitor.slug)]})
+
+
+@bp.route('/monitors/<slug>')
+def monitor(slug):
+    """Return one monitor with its latest result and statistics."""
+    monitor = get_monitor(slug)
+    results = requestManager.results_of(slug)
+    return json_response({'data': monitor_to_dict(
+        monitor, results[-1] if len(results) else None,
+        requestManager.summary(slug) if len(results) else None)})
+
+
+@bp.route('/monitors/<slug>/window')
+def window(slug):
+    """Return the live result window of a monitor, oldest first.
+
+    Results are returned by column; every column is a list with one value
+    per result.
+
+    """
+    get_monitor(slug)
+    results = requestManager.results_of(slug)
+    if hasattr(results, 'data'):  # a columnar result window
+        columns = {field: getattr(results, field).tolist()
+                   for field in RESULT_FIELDS[:-2]}
+        columns['digest'] = [digest_hex(d) for d in results.digest.tolist()]
+        columns['message'] = list(results.messages)
+    else:
+        columns = {field: [getattr(r, field) for r in results]
+                   for field in RESULT_FIELDS}
+    return json_response({'data': columns, 'count': len(results)})
+
+
+@bp.route('/monitors/<slug>/results')
+def results(slug):
+    """Return the stored results of a monitor over a time range.
+
+    Query arguments:
+
+        range   one of the details page ranges (``1h``, ``24h``, ...), or
+        start   ISO 8601 date or POSIX timestamp (default: one hour ago)
+        end     ISO 8601 date or POSIX timestamp (default: now)
+        tier    rollup tier in seconds; 0 (default) for raw results
+        limit   results per page (default 500)
+        cursor  the ``next`` cursor of the previous page
+
+    Pages are ordered oldest first; ``next`` is the URL of the next page, or
+    null on the last page.
+
+    """
+    monitor = get_monitor(slug)
+    end = parse_date('end')
+    selected = request.args.get('range')
+    if selected:
+        if selected not in RANGES:
+            raise APIError(f"range must be one of {', '.join(RANGES)}")
+        start = datetime.now(timezone.utc) - RANGES[selected]
+    else:
+        start = parse_date('start') or \
+            datetime.now(timezone.utc) - RANGES['1h']
+    tier = parse_int('tier', 0)
+    tiers = current_app.config['RESULT_RETENTION']
+    if tier not in tiers:
+        raise APIError(f"tier must be one of {', '.join(map(str, tiers))}")
+    limit = parse_int('limit', 500, minimum=1, maximum=MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+
+    if tier:
+        query = CheckRollup.between(monitor.slug, tier, start, end)
+        if cursor:
+            query = query.filter(CheckRollup.bucket > parse_cursor(cursor)[0])
+        rows = query.limit(limit + 1).all()
+        data = [rollup_to_dict(r) for r in rows[:limit]]
+        last = rows[limit - 1] if len(rows) > limit else None
+        next_cursor = f"{last.timestamp}" if last else None
+    else:
+        query = CheckResult.between(monitor.slug, start, end) \
+            .order_by(CheckResult.id)
+        if cursor:
+            date, last_id = parse_cursor(cursor)
+            query = query.filter(sa.or_(
+                CheckResult.date > date,
+                sa.and_(CheckResult.date == date, CheckResult.id > last_id)))
+        rows = query.limit(limit + 1).all()
+        data = [result_to_dict(r) for r in rows[:limit]]
+        last = rows[limit - 1] if len(rows) > limit else None
+        next_cursor = f"{last.timestamp}:{last.id}" if last else None
+
+    args = dict(request.args, cursor=next_cursor)
+    return json_response({
+        'data': data,
+        'tier': tier,
+        'next': url_for('api.results', slug=slug, **args)
+        if next_cursor else None,
+    })
+
+
+def parse_cursor(cursor):
+    """Return the date and id of a page `cursor`."""
+    timestamp, _, last_id = cursor.partition(':')
+    try:
+        return (datetime.fromtimestamp(float(timestamp), timezone.utc),
+                int(last_id or 0))
+    except (ValueError, OverflowError, OSError):
+        raise APIError(f"Invalid cursor {cursor}")
+
+
+@bp.route('/latest')
+def latest():
+    """Return the latest result of every monitor, keyed by slug."""
+    return json_response({'data': {
+        slug: result_to_dict(r) for slug, r in requestManager.latest.items()}})
+
+
+@bp.route('/summaries')
+def summaries():
+    """Return the window statistics of every monitor, keyed by slug."""
+    return json_response({'data': requestManager.summaries})
+
+
+@bp.route('/stream')
+def stream():
+    """Stream new results as Server-Sent Events.
+
+    Every new result is sent as a ``result`` event whose data is the result
+    with its ``slug``; the latest result of every monitor is sent first.
+    ``?slug=`` limits the stream to a comma separated list of monitors.
+    Results are read once per process for every stream (see
+    `ResultBroadcast`) and a comment is sent every 15 seconds to keep idle
+    connections open.
+
+    Every stream holds a worker thread while it is open, so at most
+    ``STREAM_MAX_CLIENTS`` are served at once; more get a 503.
+
+    """
+    slugs = {s for s in request.args.get('slug', '').split(',') if s}
+    subscription = resultBroadcast.subscribe(slugs)
+    if subscription is None:
+        raise APIError("Too many open streams, try again later", 503)
+
+    def events():
+        try:
+            while not subscription.closed:
+                results = subscription.get(timeout=15)
+                if not results:
+                    yield ": keep-alive\n\n"
+                for slug, result in results:
+                    data = dict(result_to_dict(result), slug=slug)
+                    yield f"event: result\ndata: {json.dumps(data)}\n\n"
+        finally:
+            resultBroadcast.unsubscribe(subscription)
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # do not buffer behind nginx
+    })
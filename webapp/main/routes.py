@@ -3,11 +3,13 @@
 This module contains the main routes of the web application.
 
 """
-from flask import render_template, flash, redirect, url_for, request
+from flask import (render_template, flash, redirect, url_for, request,
+                   Response)
 from webapp.main import bp
 from webapp.models import Monitor
 from webapp import requestManager, runtimeStats
-from checks.endpoint import Endpoint
+from checks import metrics as check_metrics
+from checks.remote import RunnerError
 
 
 @bp.route('/start')
@@ -25,39 +27,53 @@ def stop():
 
 @bp.route('/stats')
 def stats():
-    # TODO: Testing purposes only; move to an API
-    return f"{requestManager.window}"
+    """Moved to the JSON API."""
+    return redirect(url_for('api.latest'))
+
+
+@bp.route('/metrics')
+def metrics():
+    """Export check results and runtime stats for Prometheus.
+
+    Per-monitor metrics were rendered as results arrived (see
+    `checks.metrics`); this only joins them and adds the request pool and
+    runtime gauges.
+
+    """
+    state = requestManager.state
+    gauges = [
+        ('epmonitor_pool_threads', 'Request pool worker threads.',
+         state['thread_count']),
+        ('epmonitor_pool_threads_alive', 'Request pool threads alive.',
+         sum(1 for t in state['threads'] if t['alive'])),
+        ('epmonitor_pool_queue_size', 'Checks due and waiting for a worker.',
+         state['queue_size']),
+        ('epmonitor_pool_endpoints', 'Endpoints checked.',
+         state['endpoint_count']),
+        ('epmonitor_result_window_bytes',
+         'Memory held by the result windows.', state['result_bytes']),
+    ] + runtimeStats.gauges()
+    body = check_metrics.render(requestManager.metrics(), gauges)
+    return Response(body,
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @bp.route('/load')
 def load():
-    """Convert Monitors to Endpoints and queue them for requests."""
-    # TODO: find a place for this to live; ideally this should be able to
-    #       occur outside of route.  Maybe this belongs in a utility function
-    #       that is called with an application_context on start.  Also, this
-    #       will need to be called from the UI
-
-    # Now we need to clear the queue
-    requestManager.stop(join=True)
-    requestManager.clear()
-
-    count = 0
-    for monitor in Monitor.query.all():
-        if monitor.enabled:
-            count += 1
-            ep = Endpoint(monitor.slug)
-            ep.name = monitor.name
-            ep.frequency = monitor.frequency
-            ep.scheme = monitor.scheme
-            ep.server = monitor.server
-            ep.port = monitor.port
-            ep.path = monitor.path
-            ep.verb = monitor.verb
-            ep.payload = monitor.payload
-            ep.header(**monitor.headers)
-            requestManager.request_queue.put(ep)
-    flash(f"Loaded {count} monitors")
-    requestManager.start()
+    """Apply monitors changed since the last load to the running checks.
+
+    Only new, updated and removed monitors are touched; every other check
+    keeps running on its schedule.
+
+    """
+    try:
+        endpoints, removed = Monitor.changes(requestManager.versions)
+        counts = requestManager.sync(endpoints, removed)
+    except RunnerError as ex:
+        flash(f"Failed to load monitors: {ex}")
+    else:
+        flash(f"Loaded monitors: {counts['added']} added, "
+              f"{counts['updated']} updated, {counts['removed']} removed")
     return redirect(url_for('monitors.index'))
 
 
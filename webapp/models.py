@@ -5,7 +5,8 @@ in the application.
 
 """
 from datetime import datetime
-from checks.endpoint import HTTPVerb
+from checks.endpoint import Endpoint, HTTPVerb
+import sqlalchemy as sa
 from sqlalchemy import CheckConstraint
 from sqlalchemy_json import MutableJson
 from webapp import db
@@ -38,6 +39,200 @@ class Monitor(db.Model):
     payload = db.Column(db.Text)
     headers = db.Column(MutableJson)
     enabled = db.Column(db.Boolean(name='monitor_enabled'), nullable=False)
+    cold_connection = db.Column(db.Boolean(name='monitor_cold_connection'),
+                                default=False, server_default=sa.false(),
+                                nullable=False)
+    dns_cache = db.Column(db.Boolean(name='monitor_dns_cache'), default=True,
+                          server_default=sa.true(), nullable=False)
+    # results kept in memory, as a count or a span of seconds; neither is
+    # the configured RESULT_WINDOW_SIZE
+    window_size = db.Column(db.Integer)
+    window_span = db.Column(db.Integer)
 
     def __repr__(self):
         return "<Monitor {}: >".format(self.slug, self.name)
+
+    def to_endpoint(self):
+        """Return the `Endpoint` checked for this monitor."""
+        ep = Endpoint(self.slug)
+        ep.name = self.name
+        ep.frequency = self.frequency
+        ep.scheme = self.scheme
+        ep.server = self.server
+        ep.port = self.port
+        if self.path:
+            ep.path = self.path
+        ep.verb = self.verb
+        if self.payload:
+            ep.payload = self.payload
+        if self.headers:
+            ep.header(**self.headers)
+        ep.cold_connection = self.cold_connection
+        ep.dns_cache = self.dns_cache
+        ep.window_size = self.window_size
+        ep.window_span = self.window_span
+        ep.updated = self.updated
+        return ep
+
+    @classmethod
+    def endpoints(cls):
+        """Return the endpoints of every enabled monitor."""
+        return [m.to_endpoint() for m in cls.query.filter_by(enabled=True)]
+
+    @classmethod
+    def changes(cls, versions):
+        """Return what changed since `versions` (slug to `updated`).
+
+        Returns the endpoints of enabled monitors that are new or were
+        updated, and the slugs that are no longer enabled.  Only the slug
+        and `updated` columns of unchanged monitors are read.
+
+        """
+        live = dict(db.session.query(cls.slug, cls.updated)
+                    .filter(cls.enabled.is_(True)))
+        changed = [slug for slug, updated in live.items()
+                   if slug not in versions or versions[slug] != updated]
+        removed = [slug for slug in versions if slug not in live]
+        endpoints = [m.to_endpoint()
+                     for m in cls.query.filter(cls.slug.in_(changed))] \
+            if changed else []
+        return endpoints, removed
+
+    @classmethod
+    def changes_of(cls, slugs):
+        """Return the current state of the monitors `slugs`.
+
+        Returns the endpoints of those that exist and are enabled, and the
+        slugs of the rest (deleted, disabled or renamed away).
+
+        """
+        monitors = cls.query.filter(cls.slug.in_(list(slugs)),
+                                    cls.enabled.is_(True)).all()
+        endpoints = [m.to_endpoint() for m in monitors]
+        live = {m.slug for m in monitors}
+        return endpoints, [slug for slug in slugs if slug not in live]
+
+
+class CheckResult(db.Model):
+    """Check Result.
+
+    One row per check, appended by the `ResultWriter`.  Column names mirror
+    `RequestDimension` so rows can be rendered anywhere a result window is.
+    Rows are not tied to a monitor row; results outlive deleted monitors.
+
+    """
+    __tablename__ = 'check_results'
+    __table_args__ = (
+        db.Index('ix_check_results_slug_date', 'slug', 'date'),
+        db.Index('ix_check_results_date', 'date'),  # retention pruning
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'),
+                   primary_key=True)
+    slug = db.Column(db.String(), nullable=False)
+    date = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    status = db.Column(db.Boolean(name='check_result_status'),
+                       nullable=False)
+    status_code = db.Column(db.SmallInteger, nullable=False)
+    TTFB = db.Column('ttfb', db.Float, nullable=False)
+    elapsed = db.Column(db.Float, nullable=False)
+    dns = db.Column(db.Float, nullable=False)
+    connect = db.Column(db.Float, nullable=False)
+    tls = db.Column(db.Float, nullable=False)
+    transfer = db.Column(db.Float, nullable=False)
+    throttle = db.Column(db.Float, nullable=False, server_default='0')
+    size = db.Column(db.Integer, nullable=False)
+    digest = db.Column(db.String(64))
+    message = db.Column(db.Text)
+
+    @property
+    def timestamp(self):
+        """Return the start of the check as a POSIX timestamp."""
+        return self.date.timestamp()
+
+    @classmethod
+    def between(cls, slug, start, end=None):
+        """Return a query of results of `slug` from `start` until `end`."""
+        query = cls.query.filter(cls.slug == slug, cls.date >= start)
+        if end is not None:
+            query = query.filter(cls.date < end)
+        return query.order_by(cls.date)
+
+    def __repr__(self):
+        return "<CheckResult {}: {}>".format(self.slug, self.date)
+
+
+class CheckRollup(db.Model):
+    """Check Result Rollup.
+
+    Aggregate of a monitor's results over one bucket of `tier` seconds,
+    maintained by the `ResultWriter` (see `checks.rollup`).  The `date`,
+    `timestamp` and `elapsed` properties let buckets be charted like results.
+
+    """
+    __tablename__ = 'check_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('slug', 'tier', 'bucket',
+                            name='uq_check_rollups_bucket'),
+        db.Index('ix_check_rollups_tier_bucket', 'tier', 'bucket'),
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'),
+                   primary_key=True)
+    slug = db.Column(db.String(), nullable=False)
+    tier = db.Column(db.Integer, nullable=False)
+    bucket = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    failures = db.Column(db.Integer, nullable=False)
+    minimum = db.Column(db.Float)
+    maximum = db.Column(db.Float)
+    total = db.Column(db.Float, nullable=False)
+    total_sq = db.Column(db.Float, nullable=False)
+    p50 = db.Column(db.Float)
+    p95 = db.Column(db.Float)
+    p99 = db.Column(db.Float)
+    sketch = db.Column(db.JSON, nullable=False)
+
+    @property
+    def date(self):
+        """Return the start of the bucket."""
+        return self.bucket
+
+    @property
+    def timestamp(self):
+        """Return the start of the bucket as a POSIX timestamp."""
+        return self.bucket.timestamp()
+
+    @property
+    def elapsed(self):
+        """Return the mean elapsed time of the bucket."""
+        return self.total / self.count if self.count else 0
+
+    @classmethod
+    def between(cls, slug, tier, start, end=None):
+        """Return a query of `tier` rollups of `slug` from `start` to `end`."""
+        query = cls.query.filter(cls.slug == slug, cls.tier == tier,
+                                 cls.bucket >= start)
+        if end is not None:
+            query = query.filter(cls.bucket < end)
+        return query.order_by(cls.bucket)
+
+    def __repr__(self):
+        return "<CheckRollup {}: {}@{}>".format(
+            self.slug, self.bucket, self.tier)
+
+
+class RunnerLease(db.Model):
+    """Check Runner Lease.
+
+    One row per live check runner when checks are sharded; renewed by the
+    runner's `ShardCoordinator` (see `checks.shard`).  Runners whose lease
+    has not been renewed within the lease TTL are considered dead.
+
+    """
+    __tablename__ = 'runner_leases'
+    node = db.Column(db.String(256), primary_key=True)
+    address = db.Column(db.String(256))
+    started = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    heartbeat = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return "<RunnerLease {}: {}>".format(self.node, self.heartbeat)
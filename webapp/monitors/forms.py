@@ -7,8 +7,8 @@ from checks.endpoint import HTTPVerb
 from flask_wtf import FlaskForm
 from wtforms import Form
 from wtforms import (StringField, SelectField, SubmitField, TextAreaField,
-                     IntegerField, FieldList, FormField)
-from wtforms.validators import DataRequired, Length
+                     IntegerField, FieldList, FormField, BooleanField)
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
 
 
 # Dynamically populate a SelectField with our HTTPVerb enum
@@ -19,6 +19,17 @@ SchemeChoices = [
     ('http', 'HTTP'),
     ('https', 'HTTPS')
 ]
+# Units of the result window; seconds per unit, 0 for a count of results
+WindowUnits = {
+    'results': 0,
+    'minutes': 60,
+    'hours': 3600,
+}
+WindowUnitChoices = [
+    ('results', 'Results'),
+    ('minutes', 'Minutes'),
+    ('hours', 'Hours'),
+]
 
 
 def multi_header_input_widget(field, ul_class='', **kwargs):
@@ -36,7 +47,7 @@ class EndpointForm(FlaskForm):
     name = StringField('Monitor Name',
                        validators=[DataRequired(), Length(min=3, max=128)])
     frequency = IntegerField('Monitor Frequency',
-                             validators=[DataRequired()])
+                             validators=[DataRequired(), NumberRange(min=1)])
     scheme = SelectField('Scheme', choices=SchemeChoices,
                          validators=[DataRequired()])
     server = StringField('Server/IP',
@@ -47,6 +58,15 @@ class EndpointForm(FlaskForm):
     verb = SelectField('HTTP Verb', choices=EndpointVerbs,
                        validators=[DataRequired()])
     payload = TextAreaField('Payload')
+    cold_connection = BooleanField('Cold Connection')
+    dns_cache = BooleanField('Cache DNS', default=True)
+    window = IntegerField('Result Window',
+                          validators=[Optional(), NumberRange(min=1)])
+    window_unit = SelectField('Result Window Unit', choices=WindowUnitChoices,
+                              default='results')
     headers = FieldList(FormField(HeaderForm))
     submit = SubmitField('Submit It')
 
+
+class MonitorActionForm(FlaskForm):
+    """Form to enable, disable or delete a monitor; only its CSRF token."""
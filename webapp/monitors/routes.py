@@ -4,12 +4,25 @@ This module contains the routes used by the monitors package.
 
 """
 import slugify
-from checks.endpoint import Endpoint
-from webapp import requestManager, db
+from datetime import datetime, timedelta, timezone
+from checks.rollup import select_tier, summarize
+from webapp import requestManager, changeFeed, db
 from webapp.monitors import bp
-from webapp.models import Monitor
-from webapp.monitors.forms import EndpointForm, HeaderForm
-from flask import render_template, flash, url_for, redirect, request
+from webapp.models import Monitor, CheckResult, CheckRollup
+from webapp.monitors.forms import (EndpointForm, HeaderForm, MonitorActionForm,
+                                   WindowUnits)
+from flask import (render_template, flash, url_for, redirect, request,
+                   current_app, abort)
+
+
+# Time ranges the details page can load from the result store
+RANGES = {
+    '1h': timedelta(hours=1),
+    '6h': timedelta(hours=6),
+    '24h': timedelta(days=1),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
 
 
 @bp.route('/')
@@ -20,47 +33,56 @@ def index():
 
     """
     monitors = Monitor.query.all()
-    results = requestManager.window
+    results = requestManager.latest
     return render_template('monitors/index.html.j2',
                            monitors=monitors,
-                           results=results)
+                           results=results,
+                           summaries=requestManager.summaries,
+                           action_form=MonitorActionForm())
 
 
 @bp.route('/<slug>')
 def details(slug):
     """Load a monitor for viewing.
 
-    This loads the details page for a monitor.
+    This loads the details page for a monitor.  By default the live result
+    window is shown; `?range=` (one of `RANGES`) loads that much history from
+    the result store instead, from the coarsest rollup tier needed to chart
+    it.
 
     """
     monitor = Monitor.query.filter_by(slug=slug).first_or_404()
-    # TODO: clean this up, it seems messy; not sure why we keep converting a
-    #       monitor to endpoint and back.
-    #       maybe merge Endpoint and the Monitor data class?
-    endpoint = Endpoint(monitor.slug)
-    endpoint.frequency = monitor.frequency
-    endpoint.scheme = monitor.scheme
-    endpoint.server = monitor.server
-    endpoint.port = monitor.port
-    if monitor.path:
-        endpoint.path = monitor.path
-    endpoint.verb = monitor.verb
-    if monitor.payload:
-        endpoint.payload = monitor.payload
-    if monitor.headers:
-        endpoint.header(**monitor.headers)
+    endpoint = monitor.to_endpoint()
     title = f"Monitor {monitor.name}"
 
-    if monitor.slug in requestManager.window:
-        results = requestManager.window[monitor.slug]
+    selected = request.args.get('range')
+    tier = 0
+    summary = None
+    if selected in RANGES:
+        start = datetime.now(timezone.utc) - RANGES[selected]
+        tier = select_tier(RANGES[selected].total_seconds(),
+                           monitor.frequency,
+                           retention=current_app.config['RESULT_RETENTION'])
+        if tier:
+            results = CheckRollup.between(monitor.slug, tier, start).all()
+            summary = summarize(results)
+        else:
+            results = CheckResult.between(monitor.slug, start).all()
     else:
-        results = []
+        selected = None
+        results = requestManager.results_of(monitor.slug)
+        if results:
+            summary = requestManager.summary(monitor.slug)
 
     return render_template('monitors/details.html.j2',
                            title=title,
                            monitor=monitor,
                            endpoint=endpoint,
-                           results=results)
+                           results=results,
+                           ranges=RANGES,
+                           selected=selected,
+                           tier=tier,
+                           summary=summary)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
@@ -105,6 +127,9 @@ def edit(slug):
         form.path.data = monitor.path
         form.verb.data = monitor.verb
         form.payload.data = monitor.payload
+        form.cold_connection.data = monitor.cold_connection
+        form.dns_cache.data = monitor.dns_cache
+        form.window.data, form.window_unit.data = window_of(monitor)
         for key, value in monitor.headers.items():
             hf = HeaderForm()
             hf.key = key
@@ -115,6 +140,32 @@ def edit(slug):
                            form=form, monitor=monitor)
 
 
+@bp.route('/<slug>/toggle', methods=['POST'])
+def toggle(slug):
+    """Enable or disable a monitor."""
+    if not MonitorActionForm().validate_on_submit():
+        abort(400)
+    monitor = Monitor.query.filter_by(slug=slug).first_or_404()
+    monitor.enabled = not monitor.enabled
+    db.session.commit()
+    changeFeed.publish(monitor.slug)
+    flash(f"{monitor.name} {'enabled' if monitor.enabled else 'disabled'}")
+    return redirect(url_for('monitors.index'))
+
+
+@bp.route('/<slug>/delete', methods=['POST'])
+def delete(slug):
+    """Delete a monitor; its stored results are kept."""
+    if not MonitorActionForm().validate_on_submit():
+        abort(400)
+    monitor = Monitor.query.filter_by(slug=slug).first_or_404()
+    db.session.delete(monitor)
+    db.session.commit()
+    changeFeed.publish(slug)
+    flash(f"{monitor.name} deleted")
+    return redirect(url_for('monitors.index'))
+
+
 def parse_headers(headers):
     """Parse form headers.
 
@@ -129,13 +180,25 @@ def parse_headers(headers):
     return _h
 
 
+def window_of(monitor):
+    """Return the result window of `monitor` as a form value and unit."""
+    if monitor.window_span:
+        for unit, seconds in sorted(WindowUnits.items(),
+                                    key=lambda u: -u[1]):
+            if seconds and monitor.window_span % seconds == 0:
+                return monitor.window_span // seconds, unit
+    return monitor.window_size, 'results'
+
+
 def process_form_data(form, monitor):
     """Process data from the EndpointForm.
 
     Process data from the EndpointForm and convert it to a Monitor while
-    serializing the result to the database.
+    serializing the result to the database, then publish the change to the
+    running checks.
 
     """
+    previous = monitor.slug
     monitor.name = form.name.data
     monitor.slug = slugify.slugify(form.name.data)
     monitor.frequency = form.frequency.data
@@ -146,10 +209,20 @@ def process_form_data(form, monitor):
     monitor.verb = form.verb.data
     monitor.payload = form.payload.data
     monitor.headers = parse_headers(form.headers.data)
+    monitor.cold_connection = form.cold_connection.data
+    monitor.dns_cache = form.dns_cache.data
+    seconds = WindowUnits.get(form.window_unit.data, 0)
+    if form.window.data and seconds:
+        monitor.window_size = None
+        monitor.window_span = form.window.data * seconds
+    else:
+        monitor.window_size = form.window.data or None
+        monitor.window_span = None
 
     # TODO: Fix this and make properties/UI
     monitor.enabled = True
 
     db.session.add(monitor)
     db.session.commit()
+    changeFeed.publish(*{previous, monitor.slug} - {None})
     return monitor
@@ -3,22 +3,21 @@
 The runtime settings package is designed to display and allow runtime
 configuration changes of the application.
 
+Runtime details come from the snapshot `RuntimeStats` keeps up to date in
+the background (see `stats.runtime`); rendering a page never probes the
+process or walks its sockets.
+
 """
-import psutil
-import os
-from datetime import datetime, timezone
 from flask import render_template
 from webapp.settings import bp
-from webapp import requestManager
+from webapp import runtimeStats
 from webapp.models import Monitor
 
 
 @bp.route('/new')
 def new_layout_temp():
-    system = system_stats()
-    rm = requestManager_stats()
     return render_template('settings/new.html.j2', title='new layout',
-                           stats={**system, **rm})
+                           stats=runtime_stats())
 
 
 @bp.route('/')
@@ -28,54 +27,19 @@ def display_runtime_settings():
     Display's the current runtime configuration of the application.
 
     """
-    system = system_stats()
-    rm = requestManager_stats()
     return render_template(
         'settings/index.html.j2',
         title="Runtime Settings",
-        stats={**system, **rm},
+        stats=runtime_stats(),
     )
 
 
-def system_stats():
-    """Return a snapshot of the running system.
-
-    Return a dictionary of runtime system settings.
-
-    """
-    p = psutil.Process(os.getpid())
-    return {
-        'system': {
-            'cpu_percent': psutil.cpu_percent(interval=None),
-            'cpu_times': psutil.cpu_times_percent(interval=None),
-            'memory': psutil.virtual_memory(),
-            'netio': psutil.net_io_counters(),
-        },
-        'proc': {
-            'pid': p.pid,
-            'parent': p.parent(),
-            'thread_count': p.num_threads(),
-            'threads': p.threads(),
-            'connections': p.connections(),
-            'memory': p.memory_full_info(),
-            'created': datetime.fromtimestamp(p.create_time(), timezone.utc)
-        }
-    }
-
-
-def requestManager_stats():
-    """Return a snapshot of the requestManager settings."""
-    threads = requestManager.threads
-
-    # TODO: Fix Me; only return monitors with enabled = True for monitor count
-    return {
-        'requestManager': {
-            'thread_count': requestManager.thread_count,
-            'queue_size': requestManager.request_queue.qsize(),
-            'endpoint_count': len(Monitor.query.all()),
-            'threads': {
-                'running': len(threads),
-                'active': [(t.name, t.status, t.is_alive()) for t in threads]
-            }
-        }
-    }
+def runtime_stats():
+    """Return the latest runtime snapshot with the enabled monitor count."""
+    stats = runtimeStats.snapshot
+    stats['requestManager'] = dict(
+        {'thread_count': 0, 'queue_size': 0, 'schedule': {}, 'dns': {},
+         'timings': [], 'threads': {'running': 0, 'active': []}},
+        **stats['requestManager'],
+        endpoint_count=Monitor.query.filter_by(enabled=True).count())
+    return stats
@@ -24,6 +24,8 @@ def availability(window):
     A window data point is considered 'available' if the status was success
 
     """
+    if hasattr(window, 'data'):  # a columnar result window
+        return float(np.mean(window.status)) * 100
     success = Counter([r for r in window if r.status])
     return (len(success) / len(window)) * 100
 
@@ -34,6 +36,8 @@ def failRate(window):
     A window data point is considered to have failed if the request failed
 
     """
+    if hasattr(window, 'data'):  # a columnar result window
+        return 100 - availability(window) if len(window) else 0
     failures = Counter([r for r in window if not r.status])
     if failures:
         return (len(failures)/len(window)) * 100
@@ -45,34 +49,27 @@ def percentile(window, p):
 
     Args:
         p(int): The percentile to calculate
-        window(list): A list of data points to calculate the percentile on
+        window(list): A list (or result window) of data points to calculate
+            the percentile on
 
     """
-    if not isinstance(window, list):
+    if not isinstance(window, (list, tuple)) and not hasattr(window, 'data'):
         raise ValueError("percentile window expects a list")
 
-    if not window:
+    if not len(window):
         return 0   # we got an empty list; not what we expected
 
-    if isinstance(window[0], tuple):  # we have a list of Monitor Results
-        arry = np.array(epresult_to_list(window))
-    else:  # assume we have a list of numeric data
-        arry = np.array(window)
-    return np.percentile(arry, p)
+    return np.percentile(epresult_to_array(window), p)
 
 
 def stddev(window):
     """Return the standard deviation of `monitor_result`."""
-    if not isinstance(window, list):
+    if not isinstance(window, (list, tuple)) and not hasattr(window, 'data'):
         raise ValueError('stddev window expected to be a list')
 
-    if not window:
+    if not len(window):
         return 0   # an empty list is not what we expected
-    if isinstance(window[0], tuple):
-        data = epresult_to_list(window)
-    else:
-        data = window
-    return np.std(data, ddof=1)
+    return np.std(epresult_to_array(window), ddof=1)
 
 
 def epresult_to_list(result):
@@ -83,3 +80,17 @@ def epresult_to_list(result):
 
     """
     return [r.elapsed for r in result]
+
+
+def epresult_to_array(window):
+    """Return the elapsed times of `window` as an array.
+
+    `window` is a columnar result window, a list of endpoint results or a
+    list of numerics.
+
+    """
+    if hasattr(window, 'data'):  # a columnar result window
+        return window.elapsed
+    if hasattr(window[0], 'elapsed'):  # we have a list of Monitor Results
+        return np.array(epresult_to_list(window))
+    return np.array(window)  # assume we have a list of numeric data